@@ -0,0 +1,104 @@
+"""
+Benchmark of the track load time as a function of the track area.
+
+Synthetic serpentine tracks of increasing size are written to a temporary tracks folder and loaded with Environment.
+A serpentine track is the worst case for the flood fill: the number of distance rings grows with the area of the
+track instead of with its width. Tracks are loaded without the track cache and bundles, so the load time includes the
+flood fill. The distance matrix is also rebuilt for every neighbourhood.
+
+Run from the repository root:
+
+> python -m benchmarks.distance_matrix
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from PIL import Image
+
+from src.game import Environment
+
+SIZES = [128, 256, 512, 1024]
+CORRIDOR_WIDTH = 16
+
+
+def make_serpentine_track(size, corridor_width=CORRIDOR_WIDTH):
+    """
+    Build a square track in which a single corridor zigzags from the top left to the bottom of the image.
+
+    :param size: width and height in pixels
+    :param corridor_width: width of the corridor in pixels
+    :return: RGB numpy ndarray of shape (size, size, 3), indexed as (y, x) like an image
+    """
+    image = np.zeros((size, size, 3), dtype=np.uint8)
+    image[:, :, 0] = 255
+
+    lane_pitch = corridor_width + 1
+    lanes = (size - 1) // lane_pitch
+    for lane in range(lanes):
+        top = 1 + lane * lane_pitch
+        image[top:top + corridor_width, 1:size - 1, 0] = 0
+
+        # Open the wall between this lane and the next one, alternating between the right and the left side
+        if lane < lanes - 1:
+            gap = np.s_[size - 1 - corridor_width:size - 1] if lane % 2 == 0 else np.s_[1:1 + corridor_width]
+            image[top + corridor_width, gap, 0] = 0
+
+    image[1, 1, 1] = 255
+    last_top = 1 + (lanes - 1) * lane_pitch
+    finish_x = 1 if lanes % 2 == 0 else size - 2
+    image[last_top:last_top + corridor_width, finish_x, 2] = 255
+    return image
+
+
+def time_call(function, repeat=3):
+    """
+    :param function: function without arguments
+    :return: best wall clock time in seconds out of repeat calls
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    results = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cwd = os.getcwd()
+        os.chdir(tmp_dir)
+        try:
+            for size in SIZES:
+                name = f'serpentine_{size}'
+                os.makedirs(f'tracks/{name}')
+                image = Image.fromarray(make_serpentine_track(size))
+                image.save(f'tracks/{name}/track.png')
+                image.save(f'tracks/{name}/track_bg.png')
+
+                environment = Environment(name, cache=False, bundle=False)
+                row = dict(
+                    size=size,
+                    area=size * size,
+                    rings=int(environment.distance_matrix.max()),
+                    load=time_call(lambda: Environment(name, cache=False, bundle=False), repeat=1),
+                )
+                for neighbourhood in Environment.NEIGHBOURHOODS:
+                    row[neighbourhood] = time_call(lambda: environment.get_distance_matrix(neighbourhood))
+                results.append(row)
+        finally:
+            os.chdir(cwd)
+
+    columns = ['size', 'area', 'rings', 'load'] + list(Environment.NEIGHBOURHOODS)
+    print(' '.join(f'{column:>12}' for column in columns))
+    for row in results:
+        print(' '.join(
+            f'{row[column]:>12.4f}' if isinstance(row[column], float) else f'{row[column]:>12}' for column in columns
+        ))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
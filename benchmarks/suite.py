@@ -0,0 +1,269 @@
+"""
+Reproducible benchmark suite for the hot paths of the game: loading tracks, playing turns, ray tracing sensors and
+collision checks.
+
+Results are written as JSON, so they can be stored per commit and compared. When compared with a baseline, the suite
+fails if any benchmark regressed by more than the threshold.
+
+Run from the repository root:
+
+> python -m benchmarks.suite --output results.json
+> python -m benchmarks.suite --compare results.json --threshold 0.2
+
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+from loguru import logger
+from PIL import Image
+
+from benchmarks.distance_matrix import make_serpentine_track, time_call
+from src import bresenham, track_bundle
+from src.game import Engine, Environment
+from src.player import NaiveAi
+from src.termination import MaxTicks
+
+TRACKS = ['assen', 'monaco']
+SYNTHETIC_TRACK_SIZE = 1024
+PLAYER_COUNTS = [1, 100, 1000]
+TICKS = 100
+RAYS = 20000
+COLLISION_PLAYERS = 1000
+MAX_SPEED = 10  # pixels per turn
+SENSOR_DEPTH = NaiveAi.SENSOR_DISTANCE
+
+
+def benchmark_track_load(results, quick):
+    """
+    Time loading the included tracks and a synthetic large track, without cache and bundle (parse and flood), with
+    cache and, for the synthetic track, from a compiled bundle.
+    """
+    for track in TRACKS:
+        results[f'load/{track}/cold'] = _result(time_call(lambda: Environment(track, cache=False, bundle=False)), 's')
+        Environment(track)
+        results[f'load/{track}/warm'] = _result(time_call(lambda: Environment(track)), 's')
+
+    size = SYNTHETIC_TRACK_SIZE // 2 if quick else SYNTHETIC_TRACK_SIZE
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        cwd = os.getcwd()
+        os.chdir(tmp_dir)
+        try:
+            name = f'serpentine_{size}'
+            os.makedirs(f'tracks/{name}')
+            Image.fromarray(make_serpentine_track(size)).save(f'tracks/{name}/track.png')
+            results[f'load/{name}/cold'] = _result(
+                time_call(lambda: Environment(name, cache=False, bundle=False), repeat=1), 's'
+            )
+            track_bundle.compile_track(name, wall_distance_depth=None, drawables=False)
+            results[f'load/{name}/bundle'] = _result(time_call(lambda: Environment(name, cache=False)), 's')
+        finally:
+            os.chdir(cwd)
+
+
+def benchmark_ticks(results, quick):
+    """
+    Measure turns per second of headless games with NaiveAi players, in scalar and in vectorized mode. Games that end
+    before TICKS turns, because all players died or finished, are measured over the turns they played.
+    """
+    environment = Environment('assen')
+    for player_count in PLAYER_COUNTS[:2] if quick else PLAYER_COUNTS:
+        for vectorized in [False, True]:
+            ticks = []
+
+            def play():
+                players = [NaiveAi() for _ in range(player_count)]
+                engine = Engine(environment, players, headless=True, vectorized=vectorized,
+                                termination_policies=[MaxTicks(TICKS)])
+                engine.play()
+                ticks.append(engine.tick)
+
+            mode = 'vectorized' if vectorized else 'scalar'
+            duration = time_call(play, repeat=1 if player_count > 100 else 3)
+            results[f'ticks/{player_count}/{mode}'] = _result(ticks[-1] / duration, 'ticks/s', higher_is_better=True)
+
+
+def benchmark_rays(results, quick):
+    """
+    Measure rays per second of the sensor path: bresenham lines, exact ray traces, batched ray traces and lookups in
+    the wall distance table.
+    """
+    environment = Environment('assen')
+    rng = np.random.default_rng(0)
+    rays = RAYS // 4 if quick else RAYS
+    xs, ys = np.nonzero(environment.distance_matrix)
+    picks = rng.integers(0, len(xs), rays)
+    positions = np.stack([xs[picks], ys[picks]], axis=1) + rng.uniform(-0.49, 0.49, (rays, 2))
+    angles = rng.uniform(0, 360, rays)
+    sensors = list(zip([tuple(p) for p in positions.tolist()], angles.tolist()))
+
+    targets = [environment.translate(p, SENSOR_DEPTH, a, pixel=True) for p, a in sensors]
+    origins = [environment.location_to_pixel(p) for p, _ in sensors]
+    duration = time_call(lambda: [bresenham.get_line(o, t) for o, t in zip(origins, targets)])
+    results['rays/bresenham'] = _result(rays / duration, 'rays/s', higher_is_better=True)
+
+    duration = time_call(lambda: [environment.ray_trace_to_wall(p, a, SENSOR_DEPTH) for p, a in sensors])
+    results['rays/exact'] = _result(rays / duration, 'rays/s', higher_is_better=True)
+
+    duration = time_call(lambda: environment.ray_trace_batch(positions, angles, SENSOR_DEPTH))
+    results['rays/batch'] = _result(rays / duration, 'rays/s', higher_is_better=True)
+
+    environment.enable_wall_distance_table(depth=SENSOR_DEPTH)
+    duration = time_call(lambda: [environment.ray_trace_to_wall(p, a, SENSOR_DEPTH) for p, a in sensors])
+    results['rays/table'] = _result(rays / duration, 'rays/s', higher_is_better=True)
+    duration = time_call(lambda: environment.ray_trace_batch(positions, angles, SENSOR_DEPTH))
+    results['rays/table_batch'] = _result(rays / duration, 'rays/s', higher_is_better=True)
+
+
+def benchmark_collisions(results, quick):
+    """
+    Measure the time per turn of the collision check of 1000 players: checking only the destination pixel, the swept
+    check along the whole path of all players at once and the swept check per player.
+    """
+    environment = Environment('assen')
+    rng = np.random.default_rng(0)
+    xs, ys = np.nonzero(environment.distance_matrix)
+    picks = rng.integers(0, len(xs), COLLISION_PLAYERS)
+    origins_x = xs[picks] + rng.uniform(-0.49, 0.49, COLLISION_PLAYERS)
+    origins_y = ys[picks] + rng.uniform(-0.49, 0.49, COLLISION_PLAYERS)
+    speeds = rng.uniform(0, MAX_SPEED, COLLISION_PLAYERS)
+    rotations = rng.uniform(0, 360, COLLISION_PLAYERS)
+    destinations_x, destinations_y = environment.translate_batch(origins_x, origins_y, speeds, rotations)
+
+    def point():
+        pixels_x, pixels_y = environment.locations_to_pixels(destinations_x, destinations_y)
+        np.clip(pixels_x, 0, environment.width - 1, out=pixels_x)
+        np.clip(pixels_y, 0, environment.height - 1, out=pixels_y)
+        return environment.boundaries[pixels_x, pixels_y]
+
+    results[f'collisions/{COLLISION_PLAYERS}/point'] = _result(time_call(point), 's')
+    results[f'collisions/{COLLISION_PLAYERS}/swept_batch'] = _result(time_call(
+        lambda: environment.sweep_batch(origins_x, origins_y, destinations_x, destinations_y)
+    ), 's')
+    origins = list(zip(origins_x.tolist(), origins_y.tolist()))
+    destinations = list(zip(destinations_x.tolist(), destinations_y.tolist()))
+    results[f'collisions/{COLLISION_PLAYERS}/swept'] = _result(time_call(
+        lambda: [environment.sweep(origin, destination) for origin, destination in zip(origins, destinations)]
+    ), 's')
+
+
+BENCHMARKS = dict(
+    load=benchmark_track_load,
+    ticks=benchmark_ticks,
+    rays=benchmark_rays,
+    collisions=benchmark_collisions
+)
+
+
+def run(names=None, quick=False):
+    """
+    :param names: names of the benchmark groups to run, see BENCHMARKS. Defaults to all.
+    :param quick: whether to use smaller workloads
+    :return: dict with meta data and results
+    """
+    random.seed(0)
+    results = {}
+    for name in names or BENCHMARKS:
+        logger.info(f"Running benchmark {name}")
+        BENCHMARKS[name](results, quick)
+
+    report = dict(
+        meta=dict(
+            commit=_get_commit(),
+            time=time.strftime('%Y-%m-%dT%H:%M:%S'),
+            python=platform.python_version(),
+            numpy=np.__version__,
+            machine=platform.machine(),
+            quick=quick
+        ),
+        results=results
+    )
+    return report
+
+
+def compare(report, baseline, threshold):
+    """
+    Compare results with a baseline.
+
+    :param report: output of run()
+    :param baseline: output of run() on an earlier commit
+    :param threshold: relative change that counts as regression, e.g. 0.2 for 20%
+    :return: list of names of the benchmarks that regressed
+    """
+    regressions = []
+    for name, result in report['results'].items():
+        if name not in baseline['results']:
+            continue
+        old = baseline['results'][name]['value']
+        new = result['value']
+        worse = new < old if result['higher_is_better'] else new > old
+        if old == 0:
+            # No relative change from zero, any change for the worse counts as regression
+            regressed = worse
+            change_text = 'n/a'
+        else:
+            change = (new - old) / old
+            if result['higher_is_better']:
+                change = -change
+            regressed = change > threshold
+            change_text = f'{-change:+.1%}'
+        status = 'REGRESSION' if regressed else 'ok'
+        print(f"{name:<32} {old:>14.4g} {new:>14.4g} {result['unit']:<8} {change_text:>8} {status}")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def _result(value, unit, higher_is_better=False):
+    return dict(value=value, unit=unit, higher_is_better=higher_is_better)
+
+
+def _get_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('benchmarks', nargs='*', help=f"benchmark groups to run, any of {', '.join(BENCHMARKS)}")
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--compare', help='JSON file with baseline results to compare with')
+    parser.add_argument('--threshold', type=float, default=0.2, help='allowed relative regression (default 0.2)')
+    parser.add_argument('--quick', action='store_true', help='use smaller workloads')
+    args = parser.parse_args()
+    unknown = set(args.benchmarks) - set(BENCHMARKS)
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(sorted(unknown))}")
+
+    logger.remove()
+    logger.add(sys.stderr, level='INFO', filter=lambda record: record['name'].startswith('benchmarks'))
+
+    report = run(args.benchmarks, args.quick)
+    if args.output:
+        with open(args.output, 'w') as output_file:
+            json.dump(report, output_file, indent=2)
+    else:
+        for name, result in report['results'].items():
+            print(f"{name:<32} {result['value']:>14.4g} {result['unit']}")
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""
+Accuracy and speed of the wall distance table compared with the exact bresenham ray trace.
+
+Sensors are placed at random positions on the track, with random headings, like the DistanceSensor of NaiveAi. A
+percept of None counts as the sensor depth, as in DistanceSensor.perceive.
+
+Run from the repository root:
+
+> python -m benchmarks.wall_distance
+"""
+import sys
+import time
+
+import numpy as np
+
+from src.game import Environment
+
+TRACKS = ['assen', 'monaco']
+BINS = [360, 720]
+SENSOR_DEPTH = 60
+SAMPLES = 20000
+
+
+def sample_sensors(environment, samples, seed=0):
+    """
+    :return: list of (position, angle) on pixels that are reachable from the finish
+    """
+    rng = np.random.default_rng(seed)
+    xs, ys = np.nonzero(environment.distance_matrix)
+    picks = rng.integers(0, len(xs), samples)
+    positions = np.stack([xs[picks], ys[picks]], axis=1) + rng.uniform(-0.49, 0.49, (samples, 2))
+    angles = rng.uniform(0, 360, samples)
+    return [(tuple(position), angle) for position, angle in zip(positions.tolist(), angles.tolist())]
+
+
+def perceive_all(environment, sensors):
+    """
+    :return: percepts as numpy array and the time it took in seconds
+    """
+    start = time.perf_counter()
+    percepts = [environment.ray_trace_to_wall(position, angle, SENSOR_DEPTH) for position, angle in sensors]
+    duration = time.perf_counter() - start
+    percepts = np.array([SENSOR_DEPTH if p is None else p for p in percepts])
+    return percepts, duration
+
+
+def main():
+    print(f"{'track':>8} {'bins':>6} {'build':>8} {'exact/s':>10} {'table/s':>10} "
+          f"{'identical':>10} {'<=1px':>8} {'<=2px':>8} {'max':>5}")
+    for track in TRACKS:
+        environment = Environment(track, cache=False)
+        sensors = sample_sensors(environment, SAMPLES)
+        exact, exact_duration = perceive_all(environment, sensors)
+
+        for bins in BINS:
+            start = time.perf_counter()
+            environment.enable_wall_distance_table(bins=bins, depth=SENSOR_DEPTH)
+            build_duration = time.perf_counter() - start
+
+            approximate, table_duration = perceive_all(environment, sensors)
+            environment.disable_wall_distance_table()
+
+            error = np.abs(approximate - exact)
+            print(
+                f"{track:>8} {bins:>6} {build_duration:>8.2f} {SAMPLES / exact_duration:>10.0f} "
+                f"{SAMPLES / table_duration:>10.0f} {np.mean(error == 0):>10.2%} {np.mean(error <= 1):>8.2%} "
+                f"{np.mean(error <= 2):>8.2%} {error.max():>5}"
+            )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
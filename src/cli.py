@@ -0,0 +1,109 @@
+"""
+:author: Laurens Koppenol
+
+Command line tools. Run from the repository root:
+
+> python -m src.cli compile-track tracks/assen
+> python -m src.cli edit-track tracks/assen --save-path tracks/assen_2/track.png
+
+Tracks are given by name or by their folder in tracks/, the folder the game loads tracks from.
+
+"""
+import argparse
+import os
+import sys
+
+from loguru import logger
+
+from src import track_bundle
+
+TRACKS_FOLDER = 'tracks'
+
+
+def get_track_name(folder):
+    """
+    :param folder: name of a track, or its folder, e.g. tracks/assen
+    :return: name of the track
+    """
+    if os.path.dirname(os.path.normpath(folder)) == '':
+        return os.path.normpath(folder)
+
+    parent, track = os.path.split(os.path.realpath(folder))
+    if parent != os.path.realpath(TRACKS_FOLDER):
+        raise ValueError(f"{folder} is not a folder in {TRACKS_FOLDER}/, tracks are loaded from there")
+    return track
+
+
+def compile_track(args):
+    """
+    Validate and compile tracks into bundles, see track_bundle.
+
+    :param args: parsed command line arguments
+    :return: exit code
+    """
+    exit_code = 0
+    for folder in args.folders:
+        try:
+            track = get_track_name(folder)
+            track_bundle.compile_track(
+                track,
+                neighbourhood=args.neighbourhood,
+                wall_distance_bins=args.wall_distance_bins,
+                wall_distance_depth=None if args.no_wall_distance else args.wall_distance_depth,
+                drawables=not args.no_drawables
+            )
+        except (ValueError, OSError) as error:
+            logger.error(str(error))
+            exit_code = 1
+    return exit_code
+
+
+def edit_track(args):
+    """
+    Open a track in the track editor, see editor.TrackEditor.
+
+    :param args: parsed command line arguments
+    :return: exit code
+    """
+    from src.editor import TrackEditor
+    from src.game import Environment
+    from src.player import NaiveAi
+
+    try:
+        environment = Environment(get_track_name(args.folder), neighbourhood=args.neighbourhood)
+    except (ValueError, OSError) as error:
+        logger.error(str(error))
+        return 1
+    players = [NaiveAi() for _ in range(args.players)]
+    TrackEditor(environment, players=players, save_path=args.save_path).edit()
+    return 0
+
+
+def main():
+    from src.game import Environment
+
+    parser = argparse.ArgumentParser(description='Train-a-Train command line tools')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    compile_parser = subparsers.add_parser('compile-track', help='validate tracks and compile them into bundles')
+    compile_parser.add_argument('folders', nargs='+', help='track names or folders, e.g. tracks/assen')
+    compile_parser.add_argument('--neighbourhood', default='diagonal', choices=list(Environment.NEIGHBOURHOODS))
+    compile_parser.add_argument('--wall-distance-bins', type=int, default=360)
+    compile_parser.add_argument('--wall-distance-depth', type=int, default=100)
+    compile_parser.add_argument('--no-wall-distance', action='store_true', help='leave out the wall distance table')
+    compile_parser.add_argument('--no-drawables', action='store_true', help='leave out the scaled drawables')
+    compile_parser.set_defaults(function=compile_track)
+
+    edit_parser = subparsers.add_parser('edit-track', help='edit a track in the game window')
+    edit_parser.add_argument('folder', help='track name or folder, e.g. tracks/assen')
+    edit_parser.add_argument('--neighbourhood', default='diagonal', choices=list(Environment.NEIGHBOURHOODS))
+    edit_parser.add_argument('--save-path', help='png to save the track to, default tracks/<name>_edited/track.png')
+    edit_parser.add_argument('--players', type=int, default=1, help='number of naive AI players to race with')
+    edit_parser.set_defaults(function=edit_track)
+
+    args = parser.parse_args()
+    return args.function(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""
+:author: Laurens Koppenol
+
+Population controllers drive many players with a single call per turn, for example a neural network that is evaluated
+for a whole population at once. The engine hands the controller the state of all its live members as arrays and gets
+arrays of commands back, which are clamped to [-1, 1] like the commands of any other player.
+
+> controller = NaiveController()
+> members = [ControlledPlayer(controller) for _ in range(100)]
+> game_engine = Engine(track, members, headless=True, vectorized=True)
+
+Controlled players can race together with normal players.
+
+"""
+from abc import abstractmethod, ABC
+
+import numpy as np
+
+from src.player import Player
+
+
+class PopulationController(ABC):
+    """
+    Base class of population controllers. Subclasses implement control().
+    """
+    @abstractmethod
+    def control(self, track, states):
+        """
+        Choose the commands of all live members.
+
+        :param track: game.Environment object
+        :param states: dict of numpy arrays with a value per live member: id, x, y, speed, rotation and score
+        :return: (acceleration_commands, rotation_commands), numpy arrays with a value per live member
+        """
+        pass
+
+
+class ControlledPlayer(Player):
+    """
+    Member of a population that is driven by a PopulationController. Has no sensors and does not plan by itself.
+    """
+    def __init__(self, controller):
+        """
+        :param controller: PopulationController
+        """
+        super().__init__()
+        self.controller = controller
+
+    def sense(self, track, keys):
+        return None
+
+    @classmethod
+    def sense_batch(cls, players, track, keys):
+        return [None] * len(players)
+
+    def plan(self, percepts):
+        raise TypeError("ControlledPlayers are planned for by their controller, see Engine._plan")
+
+
+class NaiveController(PopulationController):
+    """
+    Example controller that steers like player.NaiveAi, with two sensors per member that are ray traced in one batch.
+    """
+    SENSOR_ANGLES = (-30, 30)
+    SENSOR_DISTANCE = 60
+
+    def control(self, track, states):
+        count = len(states['id'])
+        positions = np.repeat(np.stack([states['x'], states['y']], axis=1), len(self.SENSOR_ANGLES), axis=0)
+        angles = (states['rotation'][:, None] + np.array(self.SENSOR_ANGLES)).ravel()
+        wall_distances = track.ray_trace_batch(positions, angles, self.SENSOR_DISTANCE).reshape(count, -1)
+        percepts = np.where(wall_distances == -1, self.SENSOR_DISTANCE, wall_distances)
+
+        rotation_commands = np.where(percepts[:, 0] > percepts[:, 1], -1, 1)
+        acceleration_commands = (states['speed'] < 1).astype(float)
+        return acceleration_commands, rotation_commands
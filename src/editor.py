@@ -0,0 +1,139 @@
+"""
+:author: Laurens Koppenol
+
+Edit tracks in the game window instead of in Paint: paint walls, track and finish with the mouse, move the start and
+race players on the edited track right away. Only the part of the distance matrix and of the drawables that is affected
+by an edit is updated, see Environment.paint.
+
+> editor = TrackEditor(Environment('assen'), players=[NaiveAi()], save_path='tracks/assen_2/track.png')
+> editor.edit()
+
+The following keys can be used:
+
+- w, e, f: paint walls, erase walls (paint track) or paint finish with the left mouse button
+- s: move the start with the left mouse button
+- the right mouse button always erases
+- '[' and ']': decrease or increase the brush size
+- space: race the players from the start, again
+- return: save the track to save_path, and the edited background next to it as track_bg.png
+
+"""
+import os
+import time
+
+import pygame
+from loguru import logger
+
+from src.game import Engine
+
+
+class TrackEditor(object):
+    """
+    Interactive track editor, see module docstring.
+    """
+    TOOLS = ('wall', 'track', 'finish', 'start')
+    MAX_RADIUS = 20
+
+    def __init__(self, environment, players=(), save_path=None):
+        """
+        :param environment: game.Environment to edit, it is changed in place
+        :param players: optional players to race on the track while editing
+        :param save_path: png file the track is saved to when return is pressed, defaults to a new track folder
+            tracks/<name>_edited/track.png
+        """
+        self.environment = environment
+        self.players = list(players)
+        self.save_path = save_path or f'tracks/{environment.name}_edited/track.png'
+        self.tool = 'wall'
+        self.radius = 2
+        self.racing = False
+
+    def edit(self):
+        """
+        Open a game window and edit the track until the window is closed.
+
+        :return: self
+        """
+        engine = Engine(self.environment, self.players)
+        engine.bind_action(pygame.K_w, lambda: self._set_tool('wall'))
+        engine.bind_action(pygame.K_e, lambda: self._set_tool('track'))
+        engine.bind_action(pygame.K_f, lambda: self._set_tool('finish'))
+        engine.bind_action(pygame.K_s, lambda: self._set_tool('start'))
+        engine.bind_action(pygame.K_LEFTBRACKET, lambda: self._set_radius(self.radius - 1))
+        engine.bind_action(pygame.K_RIGHTBRACKET, lambda: self._set_radius(self.radius + 1))
+        engine.bind_action(pygame.K_SPACE, lambda: self._start_race(engine))
+        engine.bind_action(pygame.K_RETURN, self.save)
+        self._update_caption()
+
+        while engine.is_running():
+            if self.racing:
+                engine._turn()
+                engine.tick += 1
+                self.racing = not engine._is_game_over()
+            else:
+                engine._handle_pygame_events()
+                if not engine.is_running():
+                    break
+                engine._draw()
+
+            self._handle_mouse(engine)
+
+            time_to_next_frame = Engine.SECONDS_PER_FRAME - time.time() % Engine.SECONDS_PER_FRAME
+            time.sleep(time_to_next_frame)
+        return self
+
+    def save(self):
+        """
+        Save the track to self.save_path and its edited background to track_bg.png in the same folder, so the folder
+        can be loaded as a new track.
+
+        :return: self
+        """
+        self.environment.save_track(self.save_path)
+        background_path = os.path.join(os.path.dirname(self.save_path), 'track_bg.png')
+        pygame.image.save(self.environment.get_drawable('background'), background_path)
+        logger.info(f"Saved track to {self.save_path}")
+        return self
+
+    def _handle_mouse(self, engine):
+        """
+        Apply the current tool where a mouse button is held and mark the changed part of the window for redrawing.
+
+        :param engine: game.Engine that draws the track
+        :return: Nothing
+        """
+        left, _, right = pygame.mouse.get_pressed()
+        if not (left or right):
+            return
+
+        mouse_x, mouse_y = pygame.mouse.get_pos()
+        position = (mouse_x / Engine.SCALE, mouse_y / Engine.SCALE)
+        if left and self.tool == 'start':
+            self.environment.move_start(position)
+            return
+
+        rect = self.environment.paint(position, self.radius, 'track' if right else self.tool)
+        if rect is not None and engine.game_settings['background'] == 2:
+            engine._drawn_background = None  # The gray values of the whole score map change with its maximum
+        elif rect is not None:
+            engine._dirty_rects.append(pygame.Rect(
+                int(rect.left * Engine.SCALE),
+                int(rect.top * Engine.SCALE),
+                int(rect.width * Engine.SCALE) + 2,
+                int(rect.height * Engine.SCALE) + 2
+            ))
+
+    def _start_race(self, engine):
+        engine.reset()
+        self.racing = True
+
+    def _set_tool(self, tool):
+        self.tool = tool
+        self._update_caption()
+
+    def _set_radius(self, radius):
+        self.radius = min(max(radius, 0), TrackEditor.MAX_RADIUS)
+        self._update_caption()
+
+    def _update_caption(self):
+        pygame.display.set_caption(f'Train-a-Train editor - {self.tool}, brush size {self.radius}')
@@ -0,0 +1,138 @@
+"""
+:author: Laurens Koppenol
+
+Cache for the results of races, so players that did not change (for example the elite of a genetic algorithm) are not
+raced again on the same track. Races are deterministic, so the result only depends on:
+
+- the content of the track and its scoring neighbourhood
+- the class and parameters of the player, see Player.get_parameters()
+- the physics constants of the engine and the seed
+- the tick budget
+
+> cache = EvaluationCache(path='.evaluation_cache')
+> results = evaluate_population(players, ['assen'], max_ticks=2000, cache=cache)
+> cache.hits, cache.misses
+(40, 60)
+
+Players whose get_parameters() returns None are always raced. Clear the disk cache after changing the game logic.
+
+"""
+import collections
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+
+from loguru import logger
+
+CACHE_VERSION = 1  # Increase when the game logic changes the outcome of races
+
+
+class EvaluationCache(object):
+    """
+    Least recently used cache of race outcomes in memory, optionally backed by a folder with a JSON file per outcome.
+    """
+    def __init__(self, max_size=100000, path=None):
+        """
+        :param max_size: maximum number of outcomes kept in memory
+        :param path: optional folder to store outcomes on disk, shared between runs and processes
+        """
+        self.max_size = max_size
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._outcomes = collections.OrderedDict()
+        if path is not None:
+            os.makedirs(path, exist_ok=True)
+
+    def get(self, key):
+        """
+        :param key: see get_key
+        :return: outcome dict, or None if the key is not cached
+        """
+        outcome = self._outcomes.get(key)
+        if outcome is not None:
+            self._outcomes.move_to_end(key)
+        elif self.path is not None:
+            outcome = self._load(key)
+            if outcome is not None:
+                self._remember(key, outcome)
+
+        if outcome is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return dict(outcome)
+
+    def put(self, key, outcome):
+        """
+        :param key: see get_key
+        :param outcome: JSON serializable dict
+        :return: Nothing
+        """
+        self._remember(key, dict(outcome))
+        if self.path is not None:
+            self._store(key, outcome)
+
+    def clear(self):
+        """
+        Remove all outcomes from memory and disk.
+
+        :return: Nothing
+        """
+        self._outcomes.clear()
+        if self.path is not None:
+            for entry in os.listdir(self.path):
+                if entry.endswith('.json'):
+                    os.remove(os.path.join(self.path, entry))
+
+    def __len__(self):
+        return len(self._outcomes)
+
+    def _remember(self, key, outcome):
+        self._outcomes[key] = outcome
+        self._outcomes.move_to_end(key)
+        while len(self._outcomes) > self.max_size:
+            self._outcomes.popitem(last=False)
+
+    def _load(self, key):
+        try:
+            with open(os.path.join(self.path, f'{key}.json')) as outcome_file:
+                return json.load(outcome_file)
+        except (OSError, ValueError):
+            return None
+
+    def _store(self, key, outcome):
+        """
+        Write to a temporary file first and then rename, so other processes never read a half written outcome.
+        """
+        try:
+            with tempfile.NamedTemporaryFile('w', dir=self.path, suffix='.tmp', delete=False) as tmp_file:
+                json.dump(outcome, tmp_file)
+            os.replace(tmp_file.name, os.path.join(self.path, f'{key}.json'))
+        except OSError as error:
+            logger.warning(f"Could not write evaluation cache in {self.path}: {error}")
+
+
+def get_key(environment, player, max_ticks, *parameters):
+    """
+    :param environment: game.Environment the player races on
+    :param player: player.Player
+    :param max_ticks: tick budget of the race
+    :param parameters: other values the outcome depends on, must be picklable
+    :return: string key, or None if the player cannot be cached
+    """
+    from src.game import Engine
+
+    player_parameters = player.get_parameters()
+    if player_parameters is None:
+        return None
+
+    player_class = f'{type(player).__module__}.{type(player).__qualname__}'
+    physics = (Engine.SECONDS_PER_FRAME, Engine.ACCELERATION, Engine.ROTATION_SPEED)
+    key_content = (
+        CACHE_VERSION, environment.get_track_hash(), environment.neighbourhood, player_class, player_parameters,
+        physics, max_ticks, parameters
+    )
+    return hashlib.sha1(pickle.dumps(key_content, protocol=4)).hexdigest()
@@ -0,0 +1,361 @@
+"""
+:author: Laurens Koppenol
+
+Neuro-evolution: train a population of small neural networks to drive, by racing them headless, keeping the best and
+breeding the next generation from them with crossover and mutation.
+
+The weights of all networks of a population are stored as stacked numpy matrices, one row per genome. In vectorized
+mode the engine lets all NeuralPlayers plan at once (see Player.plan_batch), which is one batched matrix product per
+layer per turn for the whole population.
+
+> evolution = Evolution(Environment('assen'), population_size=100, checkpoint_path='checkpoints/assen.npz')
+> evolution.train(generations=50)
+>
+> players = load_players('checkpoints/assen.npz', count=3)
+> Engine(Environment('assen'), players).play()
+
+"""
+import os
+
+import numpy as np
+from loguru import logger
+
+from src.game import Engine
+from src.player import Player, DistanceSensor
+from src.termination import MaxTicks, NoProgress
+
+SENSOR_ANGLES = (-60, -30, 0, 30, 60)
+SENSOR_DEPTH = 60
+SPEED_SCALE = 5  # Speed in pixels per turn that is fed to the network as 1
+HIDDEN_UNITS = 8
+LAYERS = (len(SENSOR_ANGLES) + 1, HIDDEN_UNITS, 2)
+
+
+class Population(object):
+    """
+    Genomes of a population of fully connected networks with tanh activations. self.genomes has a row per network;
+    the weight matrices and biases of every layer are views into it, stacked over the population.
+    """
+    def __init__(self, genomes, layers=LAYERS):
+        """
+        :param genomes: numpy array of shape (population size, Population.get_genome_size(layers))
+        :param layers: number of units per layer, from inputs to outputs
+        """
+        self.layers = tuple(layers)
+        self.genomes = np.ascontiguousarray(genomes, dtype=float)
+        if self.genomes.shape[1] != self.get_genome_size(self.layers):
+            raise ValueError(f"Genomes of size {self.genomes.shape[1]} do not fit layers {self.layers}")
+
+        self.weights = []
+        self.biases = []
+        offset = 0
+        for n_in, n_out in zip(self.layers[:-1], self.layers[1:]):
+            self.weights.append(self.genomes[:, offset:offset + n_in * n_out].reshape(-1, n_in, n_out))
+            offset += n_in * n_out
+            self.biases.append(self.genomes[:, offset:offset + n_out])
+            offset += n_out
+
+    @classmethod
+    def random(cls, size, rng, layers=LAYERS):
+        """
+        :param size: number of genomes
+        :param rng: numpy.random.Generator
+        :param layers: number of units per layer
+        :return: Population with normally distributed weights
+        """
+        return cls(rng.normal(0, 1, (size, cls.get_genome_size(layers))), layers)
+
+    @staticmethod
+    def get_genome_size(layers):
+        """
+        :param layers: number of units per layer
+        :return: number of weights and biases of a network
+        """
+        return sum(n_in * n_out + n_out for n_in, n_out in zip(layers[:-1], layers[1:]))
+
+    def __len__(self):
+        return len(self.genomes)
+
+    def forward(self, indices, inputs):
+        """
+        Run the networks of some genomes, each on its own input.
+
+        :param indices: numpy array of genome indices
+        :param inputs: numpy array of shape (len(indices), layers[0])
+        :return: numpy array of shape (len(indices), layers[-1]) in range [-1, 1]
+        """
+        activations = inputs
+        for weights, biases in zip(self.weights, self.biases):
+            activations = np.tanh(np.matmul(activations[:, None, :], weights[indices])[:, 0, :] + biases[indices])
+        return activations
+
+
+class NeuralPlayer(Player):
+    """
+    Player driven by the network of one genome of a Population. Sees the distance to the wall in five directions and its
+    own speed.
+    """
+    def __init__(self, population, index):
+        """
+        :param population: Population
+        :param index: index of the genome of this player in the population
+        """
+        super().__init__()
+        self.population = population
+        self.index = index
+        self.sensors += [DistanceSensor(self, angle, SENSOR_DEPTH) for angle in SENSOR_ANGLES]
+
+    def sense(self, track, keys):
+        """
+        :param track: Environment object
+        :param keys: Not used
+        :return: list with the distance per sensor
+        """
+        return [sensor.perceive(track) for sensor in self.sensors]
+
+    @classmethod
+    def sense_batch(cls, players, track, keys):
+        """
+        Ray trace the sensors of all players in a single batch, see DistanceSensor.perceive_batch. Falls back to
+        sense() per player for subclasses that override sense().
+        """
+        if cls.sense is not NeuralPlayer.sense:
+            return super().sense_batch(players, track, keys)
+
+        sensors = [sensor for player in players for sensor in player.sensors]
+        percepts = DistanceSensor.perceive_batch(sensors, track)
+
+        batched_percepts = []
+        i = 0
+        for player in players:
+            batched_percepts.append(percepts[i:i + len(player.sensors)])
+            i += len(player.sensors)
+        return batched_percepts
+
+    def plan(self, percepts):
+        """
+        :param percepts: list with the distance per sensor
+        :return: acceleration_command, rotation_command
+        """
+        acceleration_command, rotation_command = self.plan_batch([self], [percepts])[0]
+        return acceleration_command, rotation_command
+
+    @classmethod
+    def plan_batch(cls, players, percepts):
+        """
+        Run the networks of all players, with a batched matrix product per population.
+
+        :param players: list of NeuralPlayers
+        :param percepts: list with the distances per sensor, one per player
+        :return: numpy array with an (acceleration_command, rotation_command) per player
+        """
+        inputs = np.empty((len(players), len(SENSOR_ANGLES) + 1))
+        inputs[:, :-1] = np.array(percepts, dtype=float).reshape(len(players), -1) / SENSOR_DEPTH
+        inputs[:, -1] = [player.speed / SPEED_SCALE for player in players]
+
+        commands = np.empty((len(players), 2))
+        populations = {}
+        for i, player in enumerate(players):
+            populations.setdefault(id(player.population), (player.population, []))[1].append(i)
+        for population, rows in populations.values():
+            indices = np.array([players[i].index for i in rows])
+            commands[rows] = population.forward(indices, inputs[rows])
+        return commands
+
+    def get_parameters(self):
+        """
+        :return: layers and weights of the network of this player. None for subclasses that do not override
+            get_parameters, as they may drive differently with the same network
+        """
+        if 'get_parameters' not in type(self).__dict__:
+            return None
+        return self.population.layers, self.population.genomes[self.index].tobytes()
+
+
+def select_tournament(fitness, count, rng, size=3):
+    """
+    Tournament selection: pick the fittest of `size` random genomes, `count` times.
+
+    :param fitness: numpy array of fitness per genome, higher is better
+    :param count: number of genomes to select
+    :param rng: numpy.random.Generator
+    :param size: number of genomes per tournament
+    :return: numpy array of selected genome indices
+    """
+    contestants = rng.integers(0, len(fitness), (count, size))
+    winners = np.argmax(fitness[contestants], axis=1)
+    return contestants[np.arange(count), winners]
+
+
+def crossover(parents_a, parents_b, rng):
+    """
+    Uniform crossover: every gene comes from either parent with equal probability.
+
+    :param parents_a: numpy array of genomes, one per row
+    :param parents_b: numpy array of genomes of the same shape
+    :param rng: numpy.random.Generator
+    :return: numpy array of child genomes
+    """
+    return np.where(rng.random(parents_a.shape) < 0.5, parents_a, parents_b)
+
+
+def mutate(genomes, rng, rate=0.1, scale=0.3):
+    """
+    Gaussian mutation of a fraction of the genes.
+
+    :param genomes: numpy array of genomes, one per row
+    :param rng: numpy.random.Generator
+    :param rate: probability that a gene mutates
+    :param scale: standard deviation of a mutation
+    :return: new numpy array of mutated genomes
+    """
+    mutations = rng.normal(0, scale, genomes.shape) * (rng.random(genomes.shape) < rate)
+    return genomes + mutations
+
+
+def get_fitness(players, max_ticks):
+    """
+    Fitness of raced players: the closer to the finish the better, players that finished rank by how fast they did.
+
+    :param players: list of players after a race
+    :param max_ticks: tick budget of the race
+    :return: numpy array of fitness per player, higher is better
+    """
+    fitness = np.empty(len(players))
+    for i, player in enumerate(players):
+        fitness[i] = -player.score
+        if player.score == 1:
+            fitness[i] += (max_ticks - (player.ending_tick - player.starting_tick)) / max_ticks
+    return fitness
+
+
+class Evolution(object):
+    """
+    Generation loop: race the population headless in a vectorized engine, keep the elite, breed the rest with
+    tournament selection, crossover and mutation, and checkpoint the best genomes.
+    """
+    def __init__(self, track, population_size=100, layers=LAYERS, elite_fraction=0.1, mutation_rate=0.1,
+                 mutation_scale=0.3, max_ticks=2000, no_progress_ticks=150, seed=42, checkpoint_path=None):
+        """
+        :param track: game.Environment to race on
+        :param population_size: number of genomes per generation
+        :param layers: number of units per layer of the networks, the first must be len(SENSOR_ANGLES) + 1 and the
+            last 2
+        :param elite_fraction: fraction of the best genomes that go to the next generation unchanged
+        :param mutation_rate: probability that a gene of a child mutates
+        :param mutation_scale: standard deviation of a mutation
+        :param max_ticks: maximum number of turns per race
+        :param no_progress_ticks: stop players that did not get closer to the finish for this many turns, None to
+            never stop them
+        :param seed: seed of the evolution and of the races
+        :param checkpoint_path: optional .npz file to save the best genomes to after every generation
+        """
+        self.track = track
+        self.elite_count = max(1, int(round(elite_fraction * population_size)))
+        self.mutation_rate = mutation_rate
+        self.mutation_scale = mutation_scale
+        self.max_ticks = max_ticks
+        self.no_progress_ticks = no_progress_ticks
+        self.seed = seed
+        self.checkpoint_path = checkpoint_path
+
+        self.rng = np.random.default_rng(seed)
+        self.population = Population.random(population_size, self.rng, layers)
+        self.generation = 0
+        self.history = []  # (best fitness, mean fitness) per generation
+
+    def train(self, generations):
+        """
+        Run a number of generations.
+
+        :param generations: number of generations
+        :return: genome of the best network of the last generation
+        """
+        fitness = None
+        for _ in range(generations):
+            fitness = self.run_generation()
+        return None if fitness is None else self.population.genomes[np.argmax(fitness)].copy()
+
+    def run_generation(self):
+        """
+        Race the current population, checkpoint its best genomes and replace it by the next generation.
+
+        :return: numpy array of the fitness of the raced population
+        """
+        fitness = self.evaluate(self.population)
+        self.history.append((fitness.max(), fitness.mean()))
+        logger.info(f"Generation {self.generation}: best fitness {fitness.max():.1f}, mean {fitness.mean():.1f}")
+
+        if self.checkpoint_path is not None:
+            self.save_checkpoint(self.checkpoint_path, fitness)
+
+        self.population = self.breed(self.population, fitness)
+        self.generation += 1
+        return fitness
+
+    def evaluate(self, population):
+        """
+        Race all genomes of a population at once, headless and vectorized.
+
+        :param population: Population
+        :return: numpy array of fitness per genome
+        """
+        players = [NeuralPlayer(population, i) for i in range(len(population))]
+        termination_policies = [MaxTicks(self.max_ticks)]
+        if self.no_progress_ticks is not None:
+            termination_policies.append(NoProgress(self.no_progress_ticks))
+
+        engine = Engine(self.track, players, headless=True, vectorized=True,
+                        termination_policies=termination_policies, seed=self.seed)
+        engine.play()
+        return get_fitness(players, self.max_ticks)
+
+    def breed(self, population, fitness):
+        """
+        Make the next generation: the elite unchanged, the rest children of tournament selected parents.
+
+        :param population: Population
+        :param fitness: numpy array of fitness per genome
+        :return: new Population of the same size
+        """
+        elite = np.argsort(-fitness, kind='stable')[:self.elite_count]
+        child_count = len(population) - self.elite_count
+        parents_a = population.genomes[select_tournament(fitness, child_count, self.rng)]
+        parents_b = population.genomes[select_tournament(fitness, child_count, self.rng)]
+        children = mutate(crossover(parents_a, parents_b, self.rng), self.rng, self.mutation_rate, self.mutation_scale)
+
+        genomes = np.concatenate([population.genomes[elite], children])
+        return Population(genomes, population.layers)
+
+    def save_checkpoint(self, path, fitness):
+        """
+        Save the elite genomes of a raced population, best first.
+
+        :param path: .npz file
+        :param fitness: numpy array of fitness per genome of self.population
+        :return: Nothing
+        """
+        elite = np.argsort(-fitness, kind='stable')[:self.elite_count]
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        np.savez(
+            path,
+            genomes=self.population.genomes[elite],
+            fitness=fitness[elite],
+            layers=np.array(self.population.layers),
+            generation=np.array(self.generation)
+        )
+
+
+def load_players(path, count=1):
+    """
+    Create players from the best genomes in a checkpoint.
+
+    :param path: .npz file written by Evolution.save_checkpoint
+    :param count: number of players, best first
+    :return: list of NeuralPlayers
+    """
+    with np.load(path) as checkpoint:
+        population = Population(checkpoint['genomes'][:count], tuple(checkpoint['layers'].tolist()))
+    return [NeuralPlayer(population, i) for i in range(len(population))]
@@ -0,0 +1,67 @@
+"""
+:author: Laurens Koppenol
+
+Run fingerprints: a hash of the state of all players after every turn. Two runs with the same fingerprint went through
+exactly the same states, bit for bit. Use them to check that a parallel or distributed evaluation gives the same
+result as a serial one, or that a cached result belongs to the same run.
+
+> fingerprint = game_engine.fingerprint()
+> game_engine.play()
+> fingerprint.hexdigest()
+'3f1c...'
+
+The engine owns the random number generators that make runs reproducible: engine.random and a stream per player,
+player.random, both seeded from the seed of the engine. Players that use the global random module are not reproducible.
+
+"""
+import hashlib
+
+import numpy as np
+
+STATE_DTYPES = dict(
+    id=np.int64,
+    x=np.float64,
+    y=np.float64,
+    rotation=np.float64,
+    speed=np.float64,
+    score=np.float64,
+    alive=np.bool_
+)
+
+
+class RunFingerprint(object):
+    """
+    Tick listener that hashes the tick and the state of all players after every turn, see Engine.fingerprint().
+    States are hashed with fixed dtypes, so scalar and vectorized engines give the same fingerprint for the same run.
+    """
+    def __init__(self, per_tick=False):
+        """
+        :param per_tick: whether to keep the fingerprint after every turn in self.tick_digests, to find the first turn
+            where two runs differ
+        """
+        self.per_tick = per_tick
+        self.tick_digests = []
+        self._hash = hashlib.sha256()
+
+    def on_tick(self, engine):
+        """
+        Add the state after this turn to the fingerprint.
+
+        :param engine: game.Engine
+        :return: Nothing
+        """
+        state_arrays = engine.get_state_arrays()
+        self._hash.update(np.int64(engine.tick).tobytes())
+        for name, dtype in STATE_DTYPES.items():
+            self._hash.update(np.ascontiguousarray(state_arrays[name], dtype=dtype).tobytes())
+        if self.per_tick:
+            self.tick_digests.append(self._hash.hexdigest())
+
+    def hexdigest(self):
+        """
+        :return: fingerprint of all turns so far as a hex string
+        """
+        return self._hash.hexdigest()
+
+    def close(self):
+        pass
@@ -8,8 +8,11 @@ Custom track can be built in paint, please see :doc:`getting-started` for more i
 """
 
 import time
+import collections
 import functools
+import hashlib
 import math
+import os
 import random
 
 from PIL import Image
@@ -18,7 +21,10 @@ from loguru import logger
 import pygame
 from pygame import freetype
 
-from src import bresenham
+from src import bresenham, track_bundle, track_cache
+from src.controller import ControlledPlayer
+from src.mask import PackedMask
+from src.player import Player, PlayerStates
 
 
 class Engine(object):
@@ -32,32 +38,57 @@ class Engine(object):
     SCALE = 1/0.3  # Changing might ruin gaming experience
     ACCELERATION = 5
     ROTATION_SPEED = 180
+    FRAME_TIME_WINDOW = 60  # Number of frames to average the frame time over
 
-    def __init__(self, environment, players, headless=False):
+    def __init__(self, environment, players, headless=False, vectorized=False, termination_policies=(),
+                 profiler=None, planner=None, seed=42, scheduler=None):
         """
         :param environment: instance of game.Environment
         :param players: iterable of subclasses of player.Player
+        :param headless: whether to run without drawing and without frame rate limiter
+        :param vectorized: whether to keep the player states in a player.PlayerStates structure of arrays and update all
+            players with single array operations per turn. Recommended for large populations.
+        :param termination_policies: iterable of termination.TerminationPolicy objects that can stop players after
+            every turn, for example to end headless runs of players that never finish
+        :param profiler: optional profiling.Profiler that measures the time spent per phase of every turn
+        :param planner: optional planning.DeadlinePlanner that runs the plan of every player in a pool with a deadline
+            per turn, so slow players cannot slow down the game
+        :param seed: seed of the random number generators of the engine (self.random) and of the players
+            (player.random), None for a different run every time
+        :param scheduler: optional scheduling.FixedTimestep that runs the turns and draws the frames at their own rates
+            in play(), by default a frame is drawn after every turn
         """
-        pygame.init()
         self.tick = 0
+        self.seed = seed
+        self.random = random.Random(seed)
 
         self.game_status = Engine.RUNNING
         self.track = environment
 
+        self.vectorized = vectorized
+        self.states = PlayerStates() if vectorized else None
+        self.termination_policies = list(termination_policies)
+        self.tick_listeners = []
+        self.profiler = profiler
+        self.planner = planner
+        self.scheduler = scheduler
+        self.controllers = []  # controller.PopulationController of every ControlledPlayer, in order of appearance
         self.players = []
         self._setup_players(players)
 
         self.keys = self._setup_keys()
-        self.screen = self._setup_graphics()
+        self.screen = None
+        self.frame_times = collections.deque(maxlen=Engine.FRAME_TIME_WINDOW)
+        self._rotated_trains = {}
+        self._dirty_rects = []
+        self._drawn_background = None
         self.game_settings = self._setup_game_settings()
         self.key_bindings = self._setup_key_bindings()
 
         if headless:
             self.stop_drawing()
         else:
-            self.headless = False
-
-        random.seed(42)
+            self.start_drawing()
 
     def play(self, stop_on_death=True):
         """
@@ -66,6 +97,9 @@ class Engine(object):
         :param stop_on_death: Wether to stop if all players are ded irl
         :return: self
         """
+        if self.scheduler is not None:
+            return self.scheduler.run(self, stop_on_death)
+
         while self.is_running():
             self._turn()
 
@@ -79,14 +113,143 @@ class Engine(object):
             self.tick += 1
         return self
 
+    def reset(self, seed=None):
+        """
+        Put all players back at the start and reset the turn counter, for driving the game step by step with step().
+
+        :param seed: optional new seed for the random number generators of the engine and the players, by default
+            they continue where they were
+        :return: list of observations, the percepts of every player
+        """
+        if seed is not None:
+            self.seed = seed
+            self.random.seed(seed)
+            for player in self.players:
+                self._seed_player(player)
+
+        self.tick = 0
+        self.game_status = Engine.RUNNING
+        for policy in self.termination_policies:
+            policy.reset()
+        if self.planner is not None:
+            self.planner.reset()
+        for player in self.players:
+            player.set_position(self.track.start)
+            player.speed = 0
+            player.rotation = 90
+            player.acceleration_command = 0
+            player.rotation_command = 0
+            player.alive = True
+            player.starting_tick = self.tick
+            player.ending_tick = None
+            player.death_reason = None
+            score = self.track.get_distance(player)
+            player.score = score if score > 0 else 0
+
+        observations = self._sense(self.players)
+        return observations
+
+    def step(self, actions=None):
+        """
+        Perform a single turn for all players without handling pygame events, drawing or limiting the frame rate. Meant
+        for external learners, call reset() first.
+
+        The reward of a player is the decrease of its score (distance to the finish) in this turn. Dead players get an
+        observation of None and a reward of 0. Players that died in this turn get their last percepts in their info
+        under 'final_observation'.
+
+        :param actions: list with an (acceleration_command, rotation_command) per player, in the order of
+            self.players. None lets every player plan its own action from its percepts.
+        :return: observations, rewards, dones, infos. Lists with a value per player, infos are dicts with the score,
+            the tick and whether the player finished.
+        """
+        alive = [player.alive for player in self.players]
+        old_scores = [player.score for player in self.players]
+        live_indices = [i for i, is_alive in enumerate(alive) if is_alive]
+
+        if actions is None:
+            live_players = [self.players[i] for i in live_indices]
+            percepts = self._sense(live_players)
+            live_actions = self._plan(live_players, percepts)
+        else:
+            live_actions = [actions[i] for i in live_indices]
+
+        if self.vectorized:
+            if len(live_indices) > 0:
+                slots = np.array([self.players[i]._slot for i in live_indices])
+                commands = np.array(live_actions, dtype=float).reshape(-1, 2)
+                destinations = self._act_batch(slots, commands[:, 0], commands[:, 1], self.SECONDS_PER_FRAME)
+                self._resolve_batch(slots, *destinations)
+        else:
+            for i, (acceleration_command, rotation_command) in zip(live_indices, live_actions):
+                player = self.players[i]
+                movement = self._act(player, acceleration_command, rotation_command, self.SECONDS_PER_FRAME)
+                self._resolve(player, movement)
+        self._end_turn()
+
+        observations = [None] * len(self.players)
+        final_observations = {}
+        for i, percepts in zip(live_indices, self._sense([self.players[i] for i in live_indices])):
+            if self.players[i].alive:
+                observations[i] = percepts
+            else:
+                final_observations[i] = percepts
+
+        rewards = []
+        dones = []
+        infos = []
+        for i, (player, was_alive, old_score) in enumerate(zip(self.players, alive, old_scores)):
+            reward = old_score - player.score if was_alive and old_score > 0 else 0
+            rewards.append(float(reward))
+            dones.append(not player.alive)
+            info = dict(tick=self.tick, score=float(player.score), finished=bool(player.score == 1))
+            if i in final_observations:
+                info['final_observation'] = final_observations[i]
+            infos.append(info)
+
+        self.tick += 1
+        return observations, rewards, dones, infos
+
     def stop_drawing(self):
+        """
+        Stop drawing and limiting the frame rate. The game window stays open if it was opened.
+
+        :return: Nothing
+        """
         self.headless = True
         self.game_settings['fps_limiter'] = False
 
     def start_drawing(self):
+        """
+        Start drawing and limiting the frame rate. Pygame, the game window and all graphics are set up the first time
+        this is called, an engine that is only run headless never touches the display.
+
+        :return: Nothing
+        """
+        if self.screen is None:
+            pygame.init()
+            self.screen = self._setup_graphics()
+        self._drawn_background = None  # Redraw the whole window in the next frame
         self.headless = False
         self.game_settings['fps_limiter'] = True
 
+    def close(self):
+        """
+        End the game if it did not end yet: closes the tick listeners (e.g. a replay recorder), the planner and the
+        game window. Needed for games driven with reset() and step(), play() closes the game when it ends. The engine
+        can also be used as a context manager.
+
+        :return: Nothing
+        """
+        if self.game_status != Engine.FINISHED:
+            self._end_game()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
     def is_running(self):
         """
         Check if all players are ded irl
@@ -103,8 +266,91 @@ class Engine(object):
         player_id = len(self.players)
         player = self._init_player(player, player_id)
         self.players.append(player)
+        if self.vectorized:
+            self.states.add(player)
+        if isinstance(player, ControlledPlayer) and player.controller not in self.controllers:
+            self.controllers.append(player.controller)
         return self
 
+    def add_tick_listener(self, listener):
+        """
+        Add an object that is notified after every turn through listener.on_tick(engine) and closed through
+        listener.close() when the game ends. See replay.ReplayRecorder for an example.
+
+        :param listener: object with on_tick(engine) and close() methods
+        :return: listener
+        """
+        self.tick_listeners.append(listener)
+        return listener
+
+    def fingerprint(self, per_tick=False):
+        """
+        Hash the state of all players after every turn, to verify that two runs are identical.
+
+        :param per_tick: whether to keep the fingerprint after every turn
+        :return: fingerprint.RunFingerprint, call hexdigest() when the game ended
+        """
+        from src.fingerprint import RunFingerprint
+        return self.add_tick_listener(RunFingerprint(per_tick=per_tick))
+
+    def record(self, path, compress=False):
+        """
+        Record the game to a replay that can be watched with replay.ReplayViewer.
+
+        :param path: folder to write the replay to
+        :param compress: whether to compress the replay when the game ends
+        :return: replay.ReplayRecorder
+        """
+        from src.replay import ReplayRecorder
+        return self.add_tick_listener(ReplayRecorder(path, self.track, compress=compress))
+
+    def telemetry(self, path, every=1, file_format=None):
+        """
+        Stream the state and action of all players to a file while the game runs, see telemetry.TelemetrySink.
+
+        :param path: .jsonl, .csv or .arrow file to write to
+        :param every: write the players every this many turns
+        :param file_format: optional format, by default derived from the extension of path
+        :return: telemetry.TelemetrySink
+        """
+        from src.telemetry import TelemetrySink
+        return self.add_tick_listener(TelemetrySink(path, file_format=file_format, every=every))
+
+    def get_state_arrays(self):
+        """
+        Get the state of all players as arrays, in the order of self.players.
+
+        :return: dict of numpy arrays: id, x, y, rotation, speed, score, alive and the last acceleration_command and
+            rotation_command
+        """
+        if self.vectorized:
+            states = self.states
+            state_arrays = dict(
+                id=np.fromiter((player.id for player in states.players), dtype=np.int64, count=states.size),
+                x=states.x.copy(),
+                y=states.y.copy(),
+                rotation=states.rotation.copy(),
+                speed=states.speed.copy(),
+                score=states.score.copy(),
+                alive=states.alive.copy(),
+                acceleration_command=states.acceleration_command.copy(),
+                rotation_command=states.rotation_command.copy()
+            )
+        else:
+            positions = np.array([player.position for player in self.players], dtype=float).reshape(-1, 2)
+            state_arrays = dict(
+                id=np.array([player.id for player in self.players], dtype=np.int64),
+                x=positions[:, 0],
+                y=positions[:, 1],
+                rotation=np.array([player.rotation for player in self.players], dtype=float),
+                speed=np.array([player.speed for player in self.players], dtype=float),
+                score=np.array([player.score for player in self.players], dtype=float),
+                alive=np.array([player.alive for player in self.players], dtype=bool),
+                acceleration_command=np.array([player.acceleration_command for player in self.players], dtype=float),
+                rotation_command=np.array([player.rotation_command for player in self.players], dtype=float)
+            )
+        return state_arrays
+
     def bind_action(self, key, action):
         """
         Bind an action to a pygame key. Example usage:
@@ -169,11 +415,20 @@ class Engine(object):
         :return: self
         """
         self.players = keep
+        self.controllers = []
+        for player in keep:
+            if isinstance(player, ControlledPlayer) and player.controller not in self.controllers:
+                self.controllers.append(player.controller)
+        if self.vectorized:
+            self.states.release()
+            self.states = PlayerStates()
+            for player in keep:
+                self.states.add(player)
         return self
 
     def _init_player(self, player, player_id):
         """
-        Set position, color and id for a player
+        Set position, color, id and random number generator for a player
 
         :param player: player.Player
         :param player_id: id to give to player
@@ -182,13 +437,27 @@ class Engine(object):
         player.set_position(self.track.start)
         player.id = player_id
         player.color = (
-            random.randint(100, 255),
-            random.randint(100, 255),
-            random.randint(100, 255)
+            self.random.randint(100, 255),
+            self.random.randint(100, 255),
+            self.random.randint(100, 255)
         )
+        self._seed_player(player)
         player.starting_tick = self.tick
         return player
 
+    def _seed_player(self, player):
+        """
+        Give a player its own random number generator. With a seeded engine the stream of a player only depends on
+        the seed and the player id, not on other players.
+
+        :param player: player.Player
+        :return: Nothing
+        """
+        if self.seed is None:
+            player.random = random.Random(self.random.getrandbits(64))
+        else:
+            player.random = random.Random(f'{self.seed}-{player.id}')
+
     def _setup_players(self, players):
         """
         initialise all starting players
@@ -236,7 +505,8 @@ class Engine(object):
             pygame.K_1: self._toggle_draw_train,
             pygame.K_2: self._toggle_draw_sensors,
             pygame.K_3: self._toggle_draw_background,
-            pygame.K_4: self._toggle_fps_limiter
+            pygame.K_4: self._toggle_fps_limiter,
+            pygame.K_5: self._toggle_draw_profiler
         }
         return key_bindings
 
@@ -266,7 +536,8 @@ class Engine(object):
             train=0,
             sensors=False,
             background=0,
-            fps_limiter=True
+            fps_limiter=True,
+            profiler=True
         )
         return toggle_options
 
@@ -276,14 +547,72 @@ class Engine(object):
 
         :return: Nothing
         """
-        self._handle_pygame_events()
-
+        self._process_events()
         if self.is_running():
+            self._simulate()
+            if not self.headless:
+                self._render()
+
+    def _process_events(self):
+        """
+        Handle the pygame events if the game window is open, measured by self.profiler if there is one.
+
+        :return: Nothing
+        """
+        if self.screen is None:
+            return
+        if self.profiler is None:
+            self._handle_pygame_events()
+        else:
+            start = time.perf_counter()
+            self._handle_pygame_events()
+            self.profiler.add('events', start)
+
+    def _simulate(self):
+        """
+        Let all players play a single turn and end it, without drawing. If the engine has a profiler every phase is
+        measured: sense, plan, act and resolve per player, or for all players at once where the vectorized mode does
+        them at once.
+
+        :return: Nothing
+        """
+        profiler = self.profiler
+        if profiler is None:
+            if self.vectorized:
+                self._batch_turn()
+            elif self.planner is not None or self.controllers:
+                self._planned_turn()
+            else:
+                for player in self.players:
+                    self._player_turn(player)
+            self._end_turn()
+            return
+
+        if self.vectorized:
+            self._profiled_batch_turn(profiler)
+        elif self.planner is not None or self.controllers:
+            self._planned_turn(profiler)
+        else:
             for player in self.players:
-                self._player_turn(player)
+                self._profiled_player_turn(player, profiler)
+        start = time.perf_counter()
+        self._end_turn()
+        profiler.add('end_turn', start)
 
-            if not self.headless:
-                self._draw()
+    def _render(self, poses=None, players=None):
+        """
+        Draw a frame, measured by self.profiler if there is one.
+
+        :param poses: optional poses to draw the players at, see _draw
+        :param players: optional copies of the players to draw, see _draw
+        :return: Nothing
+        """
+        if self.profiler is None:
+            self._draw(poses, players)
+        else:
+            start = time.perf_counter()
+            self._draw(poses, players)
+            self.profiler.add('draw', start)
 
     def _player_turn(self, player):
         """
@@ -298,12 +627,265 @@ class Engine(object):
             movement = self._act(player, acceleration_command, rotation_command, self.SECONDS_PER_FRAME)
             self._resolve(player, movement)
 
+    def _profiled_player_turn(self, player, profiler):
+        """
+        Same as _player_turn, but measures every phase.
+
+        :param player: player.Player object
+        :param profiler: profiling.Profiler
+        :return: Nothing
+        """
+        if player.alive:
+            start = time.perf_counter()
+            percepts = player.sense(self.track, self.keys)
+            sensed = time.perf_counter()
+            acceleration_command, rotation_command = player.plan(percepts)
+            planned = time.perf_counter()
+            movement = self._act(player, acceleration_command, rotation_command, self.SECONDS_PER_FRAME)
+            acted = time.perf_counter()
+            self._resolve(player, movement)
+            resolved = time.perf_counter()
+
+            profiler.add('sense', start, sensed, player.id)
+            profiler.add('plan', sensed, planned, player.id)
+            profiler.add('act', planned, acted, player.id)
+            profiler.add('resolve', acted, resolved, player.id)
+
+    def _profiled_batch_turn(self, profiler):
+        """
+        Same as _batch_turn, but measures every phase for all players at once. Without a planner or population
+        controllers plan is measured per player class, and per player for classes that plan one player at a time.
+
+        :param profiler: profiling.Profiler
+        :return: Nothing
+        """
+        slots = np.flatnonzero(self.states.alive)
+        if len(slots) == 0:
+            return
+
+        start = time.perf_counter()
+        players = [self.states.players[slot] for slot in slots]
+        percepts = self._sense_batch(players)
+        profiler.add('sense', start)
+
+        if self.planner is None and not self.controllers:
+            commands = self._plan_batch(players, percepts, profiler)
+        else:
+            start = time.perf_counter()
+            commands = self._plan(players, percepts)
+            profiler.add('plan', start)
+
+        start = time.perf_counter()
+        destinations = self._act_batch(slots, commands[:, 0], commands[:, 1], self.SECONDS_PER_FRAME)
+        acted = time.perf_counter()
+        self._resolve_batch(slots, *destinations)
+        profiler.add('act', start, acted)
+        profiler.add('resolve', acted)
+
+    def _batch_turn(self):
+        """
+        Vectorized version of the sense-plan-act-resolve loop. Sense is done per player class (see
+        Player.sense_batch), plan per player and act and resolve for all live players at once on the arrays in
+        self.states.
+
+        :return: Nothing
+        """
+        slots = np.flatnonzero(self.states.alive)
+        if len(slots) == 0:
+            return
+
+        players = [self.states.players[slot] for slot in slots]
+        percepts = self._sense_batch(players)
+
+        commands = self._plan(players, percepts)
+        destinations = self._act_batch(slots, commands[:, 0], commands[:, 1], self.SECONDS_PER_FRAME)
+        self._resolve_batch(slots, *destinations)
+
+    def _planned_turn(self, profiler=None):
+        """
+        Version of the sense-plan-act-resolve loop for engines with a planner or population controllers: all live
+        players sense, then plan at once (see _plan), then act and resolve one by one.
+
+        :param profiler: optional profiling.Profiler, measures every phase for all players at once
+        :return: Nothing
+        """
+        players = [player for player in self.players if player.alive]
+        if len(players) == 0:
+            return
+
+        start = time.perf_counter()
+        percepts = self._sense(players)
+        sensed = time.perf_counter()
+        actions = self._plan(players, percepts)
+        planned = time.perf_counter()
+        movements = [
+            self._act(player, acceleration_command, rotation_command, self.SECONDS_PER_FRAME)
+            for player, (acceleration_command, rotation_command) in zip(players, actions)
+        ]
+        acted = time.perf_counter()
+        for player, movement in zip(players, movements):
+            self._resolve(player, movement)
+
+        if profiler is not None:
+            profiler.add('sense', start, sensed)
+            profiler.add('plan', sensed, planned)
+            profiler.add('act', planned, acted)
+            profiler.add('resolve', acted)
+
+    def _plan(self, players, percepts):
+        """
+        Let players plan, once per population controller for ControlledPlayers, through self.planner if the engine has
+        one and batched per player class in vectorized mode.
+
+        :param players: list of player.Player objects
+        :param percepts: list of percepts in the same order as players
+        :return: list of (acceleration_command, rotation_command) in the same order as players, a numpy array of shape
+            (len(players), 2) in vectorized mode
+        """
+        if self.controllers:
+            return self._plan_controlled(players, percepts)
+        return self._plan_players(players, percepts)
+
+    def _plan_controlled(self, players, percepts):
+        """
+        Let every population controller choose the commands of all its live members with a single call, and the
+        other players plan as usual.
+
+        :param players: list of player.Player objects
+        :param percepts: list of percepts in the same order as players
+        :return: same as _plan
+        """
+        controllers = {}
+        others = []
+        for i, player in enumerate(players):
+            if isinstance(player, ControlledPlayer):
+                controllers.setdefault(id(player.controller), (player.controller, []))[1].append(i)
+            else:
+                others.append(i)
+
+        commands = np.empty((len(players), 2))
+        for controller, indices in controllers.values():
+            states = self._get_member_states([players[i] for i in indices])
+            acceleration_commands, rotation_commands = controller.control(self.track, states)
+            commands[indices, 0] = acceleration_commands
+            commands[indices, 1] = rotation_commands
+        if len(others) > 0:
+            commands[others] = np.array(
+                self._plan_players([players[i] for i in others], [percepts[i] for i in others]), dtype=float
+            ).reshape(-1, 2)
+
+        if self.vectorized:
+            return commands
+        return [tuple(command) for command in commands.tolist()]
+
+    def _get_member_states(self, players):
+        """
+        :param players: list of player.Player objects
+        :return: dict of numpy arrays with the id, x, y, speed, rotation and score of every player
+        """
+        if self.vectorized:
+            slots = np.array([player._slot for player in players], dtype=np.intp)
+            states = {name: getattr(self.states, name)[slots] for name in ('x', 'y', 'speed', 'rotation', 'score')}
+        else:
+            positions = np.array([player.position for player in players], dtype=float).reshape(-1, 2)
+            states = dict(
+                x=positions[:, 0],
+                y=positions[:, 1],
+                speed=np.array([player.speed for player in players], dtype=float),
+                rotation=np.array([player.rotation for player in players], dtype=float),
+                score=np.array([player.score for player in players], dtype=float)
+            )
+        states['id'] = np.array([player.id for player in players])
+        return states
+
+    def _plan_players(self, players, percepts):
+        """
+        Let players plan by themselves, see _plan.
+
+        :param players: list of player.Player objects
+        :param percepts: list of percepts in the same order as players
+        :return: same as _plan
+        """
+        if self.planner is not None:
+            actions = self.planner.plan(players, percepts)
+        elif self.vectorized:
+            return self._plan_batch(players, percepts)
+        else:
+            actions = [player.plan(player_percepts) for player, player_percepts in zip(players, percepts)]
+
+        if self.vectorized:
+            return np.array(actions, dtype=float).reshape(-1, 2)
+        return actions
+
+    def _plan_batch(self, players, percepts, profiler=None):
+        """
+        Let every player class plan for all its players at once, see Player.plan_batch.
+
+        :param players: list of player.Player objects
+        :param percepts: list of percepts in the same order as players
+        :param profiler: optional profiling.Profiler, measures plan per player class, or per player for classes that
+            do not override Player.plan_batch
+        :return: numpy array of shape (len(players), 2) with the acceleration and rotation commands
+        """
+        classes = {}
+        for i, player in enumerate(players):
+            classes.setdefault(type(player), []).append(i)
+
+        commands = np.empty((len(players), 2))
+        for player_class, indices in classes.items():
+            class_players = [players[i] for i in indices]
+            class_percepts = [percepts[i] for i in indices]
+            if profiler is None:
+                commands[indices] = player_class.plan_batch(class_players, class_percepts)
+            elif player_class.plan_batch.__func__ is Player.plan_batch.__func__:
+                for i, player, player_percepts in zip(indices, class_players, class_percepts):
+                    start = time.perf_counter()
+                    commands[i] = player.plan(player_percepts)
+                    profiler.add('plan', start, player_id=player.id)
+            else:
+                start = time.perf_counter()
+                commands[indices] = player_class.plan_batch(class_players, class_percepts)
+                profiler.add('plan', start)
+        return commands
+
+    def _sense(self, players):
+        """
+        Let players sense, batched per player class in vectorized mode.
+
+        :param players: list of player.Player objects
+        :return: list of percepts in the same order as players
+        """
+        if self.vectorized:
+            return self._sense_batch(players)
+        return [player.sense(self.track, self.keys) for player in players]
+
+    def _sense_batch(self, players):
+        """
+        Let every player class sense for all its players at once, see Player.sense_batch.
+
+        :param players: list of player.Player objects
+        :return: list of percepts in the same order as players
+        """
+        classes = {}
+        for i, player in enumerate(players):
+            classes.setdefault(type(player), []).append(i)
+
+        percepts = [None] * len(players)
+        for player_class, indices in classes.items():
+            class_percepts = player_class.sense_batch([players[i] for i in indices], self.track, self.keys)
+            for i, player_percepts in zip(indices, class_percepts):
+                percepts[i] = player_percepts
+        return percepts
+
     def _is_game_over(self):
         """
         Check if there is a player that is alive
 
         :return: True if any player is alive
         """
+        if self.vectorized:
+            return not self.states.alive.any()
+
         for player in self.players:
             if player.alive:
                 return False
@@ -316,30 +898,75 @@ class Engine(object):
 
         :return: self
         """
-        pygame.quit()
+        for listener in self.tick_listeners:
+            listener.close()
+        if self.planner is not None:
+            self.planner.close()
+        if self.screen is not None:
+            pygame.quit()
         self.game_status = Engine.FINISHED
         return self
 
-    def _draw(self):
+    def _draw(self, poses=None, players=None):
         """
         Called for every frame.
         Can draws the background, player (including sensors) and score.
         Drawing is done by placing drawables on the canvas (self.screen) and calling pygame.display.update()
 
+        Only the parts of the window that were drawn on in this or the previous frame (dirty rectangles) are redrawn and
+        updated. The whole window is redrawn when the background option changes.
+
+        :param poses: optional list with an (x, y, rotation) per player in self.players to draw the players at instead
+            of their own position and rotation, for example interpolated between turns (see scheduling)
+        :param players: optional objects to draw instead of self.players, with the id, color, score, position,
+            rotation and sensors of each player, for example copies taken while no turn was played (see scheduling)
         :return: Nothing
         """
-        self._draw_background()
+        start = time.perf_counter()
+        if players is None:
+            players = self.players
+
+        full_redraw = self._drawn_background != self.game_settings['background']
+        if full_redraw:
+            self._draw_background()
+            self._drawn_background = self.game_settings['background']
+        else:
+            for rect in self._dirty_rects:
+                self._draw_background(rect)
 
         # Draw players
-        for player in self.players:
-            self._draw_train(player)
+        rects = []
+        if poses is None or len(poses) != len(players):
+            poses = [None] * len(players)
+        for player, pose in zip(players, poses):
+            rects.append(self._draw_train(player, pose))
             if self.game_settings['sensors']:
                 for sensor in player.sensors:
-                    self._draw_sensor(player, sensor)
+                    rects.append(self._draw_sensor(player, sensor, pose))
+
+        rects += self._draw_score(players)
+        if self.profiler is not None and self.game_settings['profiler']:
+            rects += self._draw_profiler()
+        rects = [rect for rect in rects if rect is not None]
+
+        if full_redraw:
+            pygame.display.update()
+        else:
+            pygame.display.update(self._dirty_rects + rects)
+        self._dirty_rects = rects
+
+        self.frame_times.append(time.perf_counter() - start)
 
-        self._draw_score()
+    def get_frame_time(self):
+        """
+        Average time it took to draw a frame, over the last Engine.FRAME_TIME_WINDOW frames. Shown at the bottom of the
+        score panel.
 
-        pygame.display.update()
+        :return: seconds, None if no frame was drawn yet
+        """
+        if len(self.frame_times) == 0:
+            return None
+        return sum(self.frame_times) / len(self.frame_times)
 
     def _act(self, player, acceleration_command, rotation_command, delta_time):
         """
@@ -353,12 +980,14 @@ class Engine(object):
         """
         acceleration_command = max(-1, acceleration_command)  # prevent cheating
         acceleration_command = min(1, acceleration_command)  # prevent cheating
+        player.acceleration_command = float(acceleration_command)
         new_speed = player.speed + acceleration_command * self.ACCELERATION * delta_time
         player.speed = max(new_speed, 0)
 
         # forces rotation to be in range [0, 360]
         rotation_command = max(-1, rotation_command)  # prevent cheating
         rotation_command = min(1, rotation_command)  # prevent cheating
+        player.rotation_command = float(rotation_command)
         new_rotation = player.rotation + rotation_command * self.ROTATION_SPEED * delta_time
         player.rotation = (new_rotation + 360) % 360
 
@@ -367,24 +996,110 @@ class Engine(object):
 
     def _resolve(self, player, destination):
         """
-        Alter the position of the player and check if this causes a finish or collission
+        Move the player towards the destination and check if this causes a finish or collission. The whole path is
+        checked (see Environment.sweep), a fast player stops at the first wall or finish pixel on its way instead of
+        jumping over it.
 
         :param player: a child class of Player
         :param destination: target location of the player (x, y)
         :return: nothing
         """
-        player.set_position(destination)
+        position, collision = self.track.sweep(player.position, destination)
+        player.set_position(position)
 
         score = self.track.get_distance(player)
         if score > 0:
             player.score = score
 
-        collision = self.track.check_collision(player)
         if collision or player.score == 1:
-            player.alive = False
-            player.ending_tick = self.tick
-            life_span = player.ending_tick - player.starting_tick
-            logger.info(f"Player {player.id} died with score {player.score:.0f} in {life_span} turns")
+            self._kill(player, 'finished' if player.score == 1 else 'collision')
+
+    def _kill(self, player, reason):
+        """
+        End the race of a player.
+
+        :param player: a child class of Player
+        :param reason: death reason, e.g. 'collision', 'finished' or the reason of a termination policy
+        :return: nothing
+        """
+        player.alive = False
+        player.ending_tick = self.tick
+        player.death_reason = reason
+        life_span = player.ending_tick - player.starting_tick
+        logger.info(f"Player {player.id} died ({reason}) with score {player.score:.0f} in {life_span} turns")
+
+    def _end_turn(self):
+        """
+        Called after all players have played a turn: applies the termination policies and notifies the tick listeners.
+
+        :return: nothing
+        """
+        self._apply_termination_policies()
+        for listener in self.tick_listeners:
+            listener.on_tick(self)
+
+    def _apply_termination_policies(self):
+        """
+        Stop the live players that any of the termination policies wants to stop.
+
+        :return: nothing
+        """
+        if not self.termination_policies:
+            return
+
+        live_players = [player for player in self.players if player.alive]
+        for policy in self.termination_policies:
+            for player in policy.check(self, live_players):
+                if player.alive:
+                    self._kill(player, policy.reason)
+
+    def _act_batch(self, slots, acceleration_commands, rotation_commands, delta_time):
+        """
+        Vectorized version of _act. Alters the speed and rotation of the players in the given slots.
+
+        :param slots: numpy array of slots in self.states
+        :param acceleration_commands: numpy array, between -1 (breaking) and 1 (accelerating)
+        :param rotation_commands: numpy array, between -1 (left) and 1 (right)
+        :param delta_time: time since last turn in seconds
+        :return: target locations of the players (xs, ys) as numpy arrays
+        """
+        states = self.states
+        acceleration_commands = np.clip(acceleration_commands, -1, 1)  # prevent cheating
+        new_speed = states.speed[slots] + acceleration_commands * self.ACCELERATION * delta_time
+        speed = np.maximum(new_speed, 0)
+
+        rotation_commands = np.clip(rotation_commands, -1, 1)  # prevent cheating
+        new_rotation = states.rotation[slots] + rotation_commands * self.ROTATION_SPEED * delta_time
+        rotation = (new_rotation + 360) % 360
+
+        states.speed[slots] = speed
+        states.rotation[slots] = rotation
+        states.acceleration_command[slots] = acceleration_commands
+        states.rotation_command[slots] = rotation_commands
+        return self.track.translate_batch(states.x[slots], states.y[slots], speed, rotation)
+
+    def _resolve_batch(self, slots, destinations_x, destinations_y):
+        """
+        Vectorized version of _resolve. Moves the players in the given slots, updates their score and kills players
+        that collided or finished.
+
+        :param slots: numpy array of slots in self.states
+        :param destinations_x: numpy array of target horizontal coordinates, see _act_batch
+        :param destinations_y: numpy array of target vertical coordinates
+        :return: Nothing
+        """
+        states = self.states
+        xs, ys, collision = self.track.sweep_batch(states.x[slots], states.y[slots], destinations_x, destinations_y)
+        states.x[slots] = xs
+        states.y[slots] = ys
+        pixels_x, pixels_y = self.track.locations_to_pixels(xs, ys)
+
+        score = self.track.distance_matrix[pixels_x, pixels_y]
+        states.score[slots] = np.where(score > 0, score, states.score[slots])
+
+        for slot in slots[collision | (states.score[slots] == 1)]:
+            player = states.players[slot]
+            self._kill(player, 'finished' if player.score == 1 else 'collision')
 
     def _handle_pygame_events(self):
         """
@@ -447,13 +1162,23 @@ class Engine(object):
         self.game_settings['fps_limiter'] = not self.game_settings['fps_limiter']
         logger.debug(f"FPS limiter toggled, status now {self.game_settings['fps_limiter']}")
 
-    def _draw_score(self):
+    def _toggle_draw_profiler(self):
         """
-        Draw a vertical bar with scores per player
+        Toggle whether to draw the timings of the profiler, if the engine has one.
 
         :return:
         """
-        pygame.draw.rect(
+        self.game_settings['profiler'] = not self.game_settings['profiler']
+        logger.debug(f"Drawing profiler toggled, status now {self.game_settings['profiler']}")
+
+    def _draw_score(self, players):
+        """
+        Draw a vertical bar with scores per player and the average frame time at the bottom
+
+        :param players: players to show the score of, see _draw
+        :return: list of pygame.Rect that were drawn on
+        """
+        panel = pygame.draw.rect(
             self.screen,
             (0, 0, 0),
             pygame.Rect(
@@ -463,55 +1188,100 @@ class Engine(object):
                 self.screen.get_height()
             )
         )
+        rects = [panel]
 
-        for i, player in enumerate(self.players):
+        for i, player in enumerate(players):
             score_text = f"{player.id:03} - {player.score:03.0f}"
             y = i * 3 * Engine.SCALE
-            self.roboto_font.render_to(
+            rects.append(self.roboto_font.render_to(
                 self.screen,
                 (0, y),
                 score_text,
                 fgcolor=player.color
-            )
+            ))
+
+        if len(self.frame_times) > 0:
+            frame_time_text = f"{1000 * self.get_frame_time():.1f} ms"
+            y = self.screen.get_height() - 3 * Engine.SCALE
+            rects.append(self.roboto_font.render_to(
+                self.screen,
+                (0, y),
+                frame_time_text,
+                fgcolor=(255, 255, 255)
+            ))
+        return rects
+
+    def _draw_profiler(self):
+        """
+        Draw the rolling percentiles per phase of the profiler in the top right corner
+
+        :return: list of pygame.Rect that were drawn on
+        """
+        rects = []
+        for i, line in enumerate(self.profiler.get_lines()):
+            text_rect = self.roboto_font.get_rect(line)
+            x = self.screen.get_width() - text_rect.width - Engine.SCALE
+            y = i * 3 * Engine.SCALE
+            rects.append(self.screen.fill((0, 0, 0), pygame.Rect(x, y, text_rect.width, 3 * Engine.SCALE)))
+            rects.append(self.roboto_font.render_to(
+                self.screen,
+                (x, y),
+                line,
+                fgcolor=(255, 255, 255)
+            ))
+        return rects
 
-    def _draw_background(self):
+    def _draw_background(self, rect=None):
         """
         Draw the background based on given option
 
+        :param rect: optional pygame.Rect to only redraw that part of the background
         :return:
         """
         if self.game_settings['background'] == 0:
-            self.screen.blit(self.track.drawables['background'], (0, 0))
+            background = self.track.get_drawable('background')
         elif self.game_settings['background'] == 1:
-            self.screen.blit(self.track.drawables['raw'], (0, 0))
+            background = self.track.get_drawable('raw')
         elif self.game_settings['background'] == 2:
-            self.screen.blit(self.track.drawables['distance_matrix'], (0, 0))
-        elif self.game_settings['background'] == 3:
-            self.screen.fill((0, 0, 0))
+            background = self.track.get_drawable('distance_matrix')
+        else:
+            self.screen.fill((0, 0, 0), rect)
+            return
+
+        if rect is None:
+            self.screen.blit(background, (0, 0))
+        else:
+            self.screen.blit(background, rect, area=rect)
 
-    def _draw_train(self, player):
+    def _draw_train(self, player, pose=None):
         """
         Draw the train for a given player. Scales the position to game window pixel coordinates.
 
         :param player: child class of Player
-        :return: nothing
+        :param pose: optional (x, y, rotation) to draw the train at, by default the position and rotation of the player
+        :return: pygame.Rect that was drawn on, None if nothing was drawn
         """
-        scaled_x, scaled_y = player.get_position(scale=self.SCALE)
+        if pose is None:
+            position, rotation = player.position, player.rotation
+        else:
+            position, rotation = pose[:2], pose[2]
+
+        scaled_x, scaled_y = position[0] * self.SCALE, position[1] * self.SCALE
         if self.game_settings['train'] == 0:
-            sprite = pygame.transform.rotate(self.train, -player.rotation + 90)
-            self._draw_sprite(sprite, scaled_x, scaled_y)
+            sprite = self._get_rotated_train(rotation)
+            return self._draw_sprite(sprite, scaled_x, scaled_y)
         elif self.game_settings['train'] == 1:
             # Set target
             target = self.track.translate(
-                player.position,
+                position,
                 3,
-                player.rotation
+                rotation
             )
 
             # Scale and draw
-            scaled_origin = player.get_position(scale=self.SCALE)
+            scaled_origin = (scaled_x, scaled_y)
             scaled_target = [p * self.SCALE for p in target]
-            pygame.draw.line(
+            return pygame.draw.line(
                 self.screen,
                 player.color,
                 scaled_origin,
@@ -519,18 +1289,40 @@ class Engine(object):
                 5
             )
         elif self.game_settings['train'] == 2:
-            pass
+            return None
+
+    def _get_rotated_train(self, rotation):
+        """
+        Get the train sprite for a rotation, rounded to whole degrees. Rotated sprites are created the first time they
+        are needed and cached.
+
+        :param rotation: rotation of the player in degrees
+        :return: pygame sprite
+        """
+        angle = int(round(-rotation + 90)) % 360
+        sprite = self._rotated_trains.get(angle)
+        if sprite is None:
+            sprite = pygame.transform.rotate(self.train, angle)
+            self._rotated_trains[angle] = sprite
+        return sprite
 
-    def _draw_sensor(self, player, sensor):
+    def _draw_sensor(self, player, sensor, pose=None):
         """
         Draw given sensor for given player. Scales the target and destination of sensor to given location. Currently
         only supports line-like sensors that have the following attributes: percept, depth, get_absolute_angle()
 
         :param player: subclass of Player
         :param sensor: Sensor object, see DistanceSensor for example
-        :return: nothing
+        :param pose: optional (x, y, rotation) to draw the sensor from, by default the position and rotation of the
+            player
+        :return: pygame.Rect that was drawn on, None if nothing was drawn
         """
-        if sensor.is_drawable:
+        if sensor.is_drawable and sensor.percept is not None:  # Sensors perceive for the first time in the first turn
+            if pose is None:
+                position, angle = player.position, sensor.get_absolute_angle()
+            else:
+                position, angle = pose[:2], sensor.get_absolute_angle() + pose[2] - player.rotation
+
             # Determine color and length based on percept value.
             if sensor.percept is sensor.depth:
                 color = (0, 255, 0)
@@ -539,15 +1331,15 @@ class Engine(object):
 
             # Set target
             target = self.track.translate(
-                player.position,
+                position,
                 sensor.percept,
-                sensor.get_absolute_angle()
+                angle
             )
 
             # Scale and draw
-            scaled_origin = player.get_position(scale=self.SCALE)
+            scaled_origin = [p * self.SCALE for p in position]
             scaled_target = [p * self.SCALE for p in target]
-            pygame.draw.line(
+            return pygame.draw.line(
                 self.screen,
                 color,
                 scaled_origin,
@@ -561,7 +1353,7 @@ class Engine(object):
         :param sprite: pygame sprite
         :param x: horizontal scaled gui coordinate
         :param y: vertical scaled gui coordinate
-        :return: nothing
+        :return: pygame.Rect that was drawn on
         """
         width = sprite.get_width()
         height = sprite.get_height()
@@ -569,7 +1361,7 @@ class Engine(object):
         corner_x = x - 0.5 * width
         corner_y = y - 0.5 * height
 
-        self.screen.blit(sprite, (corner_x, corner_y))
+        return self.screen.blit(sprite, (corner_x, corner_y))
 
 
 class Environment(object):
@@ -580,26 +1372,360 @@ class Environment(object):
     Starting position is the first pixel with green-channel >= 128
     Finish are all pixels with blue-channel >= 128
 
-    To determine score all pixels that are reachable from the finish are given their manhattan distance to the nearest
-    finish point.
+    To determine score all pixels that are reachable from the finish are given their distance in steps to the nearest
+    finish point. Which pixels can be reached in a single step is defined by the neighbourhood:
+
+    - diagonal: only the four diagonal neighbours (default, the original scoring map)
+    - 4-connected: the four horizontal and vertical neighbours
+    - 8-connected: all eight surrounding pixels
 
     This class also contains environment related helper functions.
     """
-    def __init__(self, track):
+    NEIGHBOURHOODS = {
+        'diagonal': ((-1, -1), (-1, 1), (1, -1), (1, 1)),
+        '4-connected': ((-1, 0), (1, 0), (0, -1), (0, 1)),
+        '8-connected': ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)),
+    }
+
+    CACHED_ARRAYS = ('boundaries', 'finish', 'start', 'distance_matrix')
+    DRAWABLES = ('background', 'raw', 'distance_matrix')
+    BRUSHES = dict(wall=(255, 0, 0), track=(0, 0, 0), finish=(0, 0, 255))  # Colors of edited pixels on drawables
+
+    def __init__(self, track, neighbourhood='diagonal', cache=True, arrays=None, bundle=True, compact=False,
+                 max_drawables=None):
         """
 
         :param track: must correspond to the name of a folder in tracks/foldername
-        """
+        :param neighbourhood: key of Environment.NEIGHBOURHOODS used to build the distance matrix
+        :param cache: whether to load and store the parsed track in tracks/foldername/.cache, see track_cache
+        :param arrays: optional dict with an array per name in Environment.CACHED_ARRAYS of an already loaded track,
+            for example in shared memory. The track png is then not read.
+        :param bundle: whether to load the compiled track in tracks/foldername/track.bundle.npz if there is one, see
+            track_bundle
+        :param compact: whether to store the track arrays in as little memory as possible, see compact()
+        :param max_drawables: maximum number of drawables to keep, the least recently used is evicted first. None
+            keeps all drawables that were used.
+        """
+        self.name = track
+        self.neighbourhood = neighbourhood
         track_path = f'tracks/{track}/track.png'
         background_path = f'tracks/{track}/track_bg.png'
+        self.track_path = track_path
+        self.cache = cache
+
+        self.wall_distance_table = None
+        self.wall_distance_depth = None
+        self._wall_distance_extent = None
+
+        self._track_hash = None
+        self._bundle = None
+        self.edited = False
+        self._finish_mask = None
+        if arrays is None and bundle:
+            self._bundle = track_bundle.load(track, neighbourhood)
+            if self._bundle is not None:
+                arrays = {name: self._bundle[name] for name in Environment.CACHED_ARRAYS}
+
+        if arrays is None and cache:
+            cache_dir = track_cache.get_cache_dir(track_path)
+            cache_key = track_cache.get_key(track_path, neighbourhood)
+            arrays = track_cache.load(cache_dir, cache_key, Environment.CACHED_ARRAYS)
+
+        if arrays is None:
+            track_img = Image.open(track_path)
+            self.boundaries, self.finish, self.start = self.parse_track(track_img)
+            self.distance_matrix = self.get_distance_matrix()
+            if cache:
+                track_cache.store(cache_dir, cache_key, {name: getattr(self, name) for name in self.CACHED_ARRAYS})
+        else:
+            for name, array in arrays.items():
+                setattr(self, name, array)
+        self.width, self.height = self.boundaries.shape
+
+        self.background_path = background_path
+        self.max_drawables = max_drawables
+        self._drawables = collections.OrderedDict()
+
+        if compact:
+            self.compact()
+
+    @property
+    def drawables(self):
+        """
+        All scaled pygame surfaces of the track. Builds the ones that are not loaded yet, use get_drawable to get a
+        single one.
+
+        :return: dict(background, raw, distance_matrix)
+        """
+        return {name: self.get_drawable(name) for name in Environment.DRAWABLES}
+
+    def get_drawable(self, name):
+        """
+        Get a scaled pygame surface of the track. It is built the first time it is used and kept until it is evicted,
+        see max_drawables and evict_drawables.
+
+        :param name: one of Environment.DRAWABLES
+        :return: pygame surface
+        """
+        drawable = self._drawables.get(name)
+        if drawable is None:
+            drawable = self._setup_drawable(name)
+            self._drawables[name] = drawable
+            if self.max_drawables is not None:
+                while len(self._drawables) > self.max_drawables:
+                    self._drawables.popitem(last=False)
+        else:
+            self._drawables.move_to_end(name)
+        return drawable
+
+    def evict_drawables(self, keep=()):
+        """
+        Release the loaded drawables, they are built again when they are used.
+
+        :param keep: names of drawables to keep
+        :return: self
+        """
+        for name in list(self._drawables):
+            if name not in keep:
+                del self._drawables[name]
+        return self
+
+    def compact(self):
+        """
+        Reduce the memory of the track arrays, for large tracks or many processes: the distance matrix gets the smallest
+        unsigned integer dtype that fits the distances (instead of float64) and the boundaries are bit-packed into a
+        mask.PackedMask (1 bit instead of 1 byte per pixel). Scores read from the track are still floats. The
+        boundaries are unpacked temporarily when the wall distance table is built.
+
+        :return: self
+        """
+        distance_dtype = np.min_scalar_type(int(self.distance_matrix.max()))
+        self.distance_matrix = self.distance_matrix.astype(distance_dtype, copy=False)
+        if not isinstance(self.boundaries, PackedMask):
+            self.boundaries = PackedMask.pack(self.boundaries)
+        return self
 
-        track_img = Image.open(track_path)
-        self.width = track_img.width
-        self.height = track_img.height
-        self.boundaries, self.finish, self.start = self.parse_track(track_img)
-        self.distance_matrix = self.get_distance_matrix()
+    def get_track_hash(self):
+        """
+        :return: sha1 hex digest of the track png, or of the png the track was compiled from if there is no png. For
+            an edited track a digest of its boundaries, finish and start.
+        """
+        if self._track_hash is None:
+            if self.edited:
+                track_hash = hashlib.sha1(np.packbits(self.boundaries).tobytes())
+                track_hash.update(np.packbits(self._finish_mask).tobytes())
+                track_hash.update(np.asarray(self.start, dtype=np.int64).tobytes())
+                self._track_hash = track_hash.hexdigest()
+            elif not os.path.exists(self.track_path) and self._bundle is not None:
+                self._track_hash = str(self._bundle['png_hash'])
+            else:
+                self._track_hash = track_cache.get_png_hash(self.track_path)
+        return self._track_hash
 
-        self.drawables = self._setup_drawables(track_path, background_path)
+    def get_memory_usage(self):
+        """
+        :return: dict {name: bytes} of the track arrays, the wall distance table and the drawables that are loaded
+        """
+        usage = dict(
+            boundaries=self.boundaries.nbytes,
+            distance_matrix=self.distance_matrix.nbytes
+        )
+        if self.wall_distance_table is not None:
+            usage['wall_distance_table'] = self.wall_distance_table.nbytes
+        for name, surface in self._drawables.items():
+            usage[f'drawable_{name}'] = surface.get_bytesize() * surface.get_width() * surface.get_height()
+        return usage
+
+    def paint(self, position, radius, brush):
+        """
+        Edit the track: paint a disc of wall, track or finish pixels. The distance matrix is only flooded again beyond
+        the pixels whose distance cannot have changed (see _update_distance_matrix) and the loaded drawables are only
+        refreshed where the track changed, so tracks can be edited at interactive frame rates.
+
+        :param position: center (x, y) in track pixels
+        :param radius: radius of the disc in pixels, 0 paints a single pixel
+        :param brush: key of Environment.BRUSHES
+        :return: pygame.Rect in track pixels that contains all changes to the track and its distance matrix, None if
+            nothing changed
+        """
+        if brush not in Environment.BRUSHES:
+            raise ValueError(f"Unknown brush {brush}, choose from {', '.join(Environment.BRUSHES)}")
+
+        center_x, center_y = self.location_to_pixel(position)
+        x_min, x_max = max(center_x - radius, 0), min(center_x + radius + 1, self.width)
+        y_min, y_max = max(center_y - radius, 0), min(center_y + radius + 1, self.height)
+        if x_min >= x_max or y_min >= y_max:
+            return None
+
+        self._make_editable()
+        window = np.s_[x_min:x_max, y_min:y_max]
+        xs, ys = np.ogrid[x_min:x_max, y_min:y_max]
+        disc = (xs - center_x) ** 2 + (ys - center_y) ** 2 <= radius ** 2
+
+        walls = self.boundaries[window].copy()
+        finish = self._finish_mask[window].copy()
+        walls[disc] = brush == 'wall'
+        finish[disc] = brush == 'finish'
+        edited = (walls != self.boundaries[window]) | (finish != self._finish_mask[window])
+        if not edited.any():
+            return None
+
+        finish_changed = (finish != self._finish_mask[window]).any()
+        self.boundaries[window] = walls
+        self._finish_mask[window] = finish
+        if finish_changed:
+            self.finish = np.transpose(np.nonzero(self._finish_mask))
+        self._track_hash = None
+
+        rect = pygame.Rect(x_min, y_min, x_max - x_min, y_max - y_min)
+        distance_rect, rescaled = self._update_distance_matrix(rect, finish_changed)
+        self._refresh_drawables(rect, edited, brush, distance_rect, rescaled)
+        return rect if distance_rect is None else rect.union(distance_rect)
+
+    def move_start(self, position):
+        """
+        Move the starting position of the track. Players that are added afterwards start there, see Engine.reset.
+
+        :param position: (x, y) in track pixels
+        :return: self
+        """
+        self._make_editable()
+        self.start = np.array(self.location_to_pixel(position))
+        if self.boundaries[self.start[0], self.start[1]]:
+            logger.warning(f"Start {tuple(self.start)} of track {self.name} is on a wall")
+        self._track_hash = None
+        return self
+
+    def save_track(self, path):
+        """
+        Save the (edited) track as a png that can be loaded like any other track: walls red, finish blue and the start
+        a single green pixel.
+
+        :param path: png file, e.g. tracks/my_track/track.png. Its folder is created if needed.
+        :return: self
+        """
+        boundaries = np.asarray(self.boundaries)
+        image = np.zeros((self.width, self.height, 3), dtype=np.uint8)
+        image[boundaries, 0] = 255
+        image[self.finish[:, 0], self.finish[:, 1], 2] = 255
+        image[self.start[0], self.start[1], 1] = 255
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        Image.fromarray(np.transpose(image, (1, 0, 2))).save(path)
+        return self
+
+    def _make_editable(self):
+        """
+        Prepare the track for editing: the arrays become private writable copies (a compact or shared track is not
+        compact or shared anymore), the wall distance table is disabled (enabling it again builds it for the edited
+        track, the cache and bundle are not used anymore) and all drawables are loaded and never evicted, as they
+        cannot be built again from the png files.
+
+        :return: Nothing
+        """
+        if self.edited:
+            return
+
+        # Load all drawables before the arrays change, with at least 24 bits per pixel to edit their pixels
+        self.max_drawables = None
+        for name, drawable in self.drawables.items():
+            if drawable.get_bitsize() < 24:
+                self._drawables[name] = pygame.Surface(drawable.get_size(), depth=24)
+                self._drawables[name].blit(drawable, (0, 0))
+        self.boundaries = np.array(self.boundaries, dtype=bool)
+        self.distance_matrix = np.array(self.distance_matrix, dtype=float)
+        self.finish = np.array(self.finish)
+        self.start = np.array(self.start)
+        self._finish_mask = np.zeros((self.width, self.height), dtype=bool)
+        self._finish_mask[self.finish[:, 0], self.finish[:, 1]] = True
+
+        if self.wall_distance_table is not None:
+            logger.info(f"Wall distance table of track {self.name} disabled for editing")
+            self.disable_wall_distance_table()
+        self._bundle = None
+        self.edited = True
+
+    def _update_distance_matrix(self, rect, finish_changed):
+        """
+        Update the distance matrix after the pixels in rect were edited. Let d0 be the smallest distance in rect grown
+        by one pixel. A pixel with a distance below d0 has a shortest path that never comes near the edit, and no path
+        through the edit can be shorter, so these distances are kept. All other distances are cleared and flooded again
+        from the pixels at distance d0 - 1. Edits far from the finish only flood the part of the track behind them.
+
+        :param rect: pygame.Rect of the edited pixels
+        :param finish_changed: whether finish pixels were added or removed, then the whole matrix is flooded
+        :return: pygame.Rect of the changed distances or None, and whether the maximum distance changed
+        """
+        distance_matrix = self.distance_matrix
+        grown = rect.inflate(2, 2).clip(pygame.Rect(0, 0, self.width, self.height))
+        around = distance_matrix[grown.left:grown.right, grown.top:grown.bottom]
+        reached = around[around > 0]
+        old_distance_matrix = distance_matrix.copy()
+
+        if finish_changed or (len(reached) > 0 and reached.min() <= 1):
+            self.distance_matrix = self.get_distance_matrix()
+        elif len(reached) > 0:
+            level = reached.min() - 1
+            distance_matrix[distance_matrix > level] = 0
+            frontier = distance_matrix == level
+            self._flood(distance_matrix, frontier, level, Environment.NEIGHBOURHOODS[self.neighbourhood])
+        # Without reached pixels around the edit, it is not connected to the finish and no distance changes
+
+        xs, ys = np.nonzero(old_distance_matrix != self.distance_matrix)
+        if len(xs) == 0:
+            return None, False
+        distance_rect = pygame.Rect(xs.min(), ys.min(), xs.max() - xs.min() + 1, ys.max() - ys.min() + 1)
+        return distance_rect, old_distance_matrix.max() != self.distance_matrix.max()
+
+    def _refresh_drawables(self, rect, edited, brush, distance_rect, rescaled):
+        """
+        Redraw the loaded drawables only where the track changed: the edited pixels get the color of the brush on the
+        background and raw drawables, and the score map is redrawn inside distance_rect. The score map is rebuilt if
+        its maximum distance changed, as all its gray values change.
+
+        :param rect: pygame.Rect of the edited pixels
+        :param edited: boolean numpy array of the size of rect, marking the pixels that changed
+        :param brush: key of Environment.BRUSHES
+        :param distance_rect: pygame.Rect of the changed distances, or None
+        :param rescaled: whether the maximum distance changed
+        :return: Nothing
+        """
+        for name in ('background', 'raw'):
+            if name in self._drawables:
+                pixels, track_xs, track_ys = self._get_drawable_pixels(name, rect)
+                mask = edited[track_xs - rect.left][:, track_ys - rect.top]
+                pixels[mask] = Environment.BRUSHES[brush]
+                del pixels  # Unlocks the surface
+
+        if 'distance_matrix' not in self._drawables or distance_rect is None:
+            return
+        if rescaled:
+            self._drawables['distance_matrix'] = self._distance_matrix_to_drawable()
+            return
+        pixels, track_xs, track_ys = self._get_drawable_pixels('distance_matrix', distance_rect)
+        gray = self.distance_matrix[track_xs][:, track_ys] * (255 / self.distance_matrix.max())
+        pixels[...] = gray.astype(np.uint8)[:, :, None]
+        del pixels
+
+    def _get_drawable_pixels(self, name, rect):
+        """
+        :param name: name of a loaded drawable
+        :param rect: pygame.Rect in track pixels
+        :return: writable numpy view of the drawable pixels that cover rect, and the track pixel coordinates of its
+            columns and rows
+        """
+        drawable = self._drawables[name]
+        scale_x = drawable.get_width() / self.width
+        scale_y = drawable.get_height() / self.height
+        x_min, x_max = math.ceil(rect.left * scale_x), min(math.ceil(rect.right * scale_x), drawable.get_width())
+        y_min, y_max = math.ceil(rect.top * scale_y), min(math.ceil(rect.bottom * scale_y), drawable.get_height())
+        track_xs = np.clip((np.arange(x_min, x_max) / scale_x).astype(np.intp), rect.left, rect.right - 1)
+        track_ys = np.clip((np.arange(y_min, y_max) / scale_y).astype(np.intp), rect.top, rect.bottom - 1)
+
+        pixels = pygame.surfarray.pixels3d(drawable)[x_min:x_max, y_min:y_max]
+        return pixels, track_xs, track_ys
 
     @staticmethod
     def parse_track(track_img):
@@ -645,22 +1771,123 @@ class Environment(object):
         Check how many pixels (manhattan distance) a player is located from the finish
 
         :param player: subclass of Player
-        :return: integer, 0 for wall, 1 for finish, > 1 for anything else
+        :return: whole number as float, 0 for wall, 1 for finish, > 1 for anything else
         """
         pixel_x, pixel_y = player.get_position(pixel=True)
-        distance = self.distance_matrix[pixel_x, pixel_y]
+        distance = float(self.distance_matrix[pixel_x, pixel_y])
         return distance
 
+    def sweep(self, origin, destination):
+        """
+        Follow the path from origin to destination in steps of at most one pixel and stop at the first wall or finish
+        pixel, so fast players cannot jump over thin walls. A diagonal step between two wall pixels that touch at a
+        corner also counts as a collision. A player that does not move collides if it stands on a wall.
+
+        :param origin: current location (x, y)
+        :param destination: target location (x, y)
+        :return: (location, collision), the location where the path stops and whether it stopped at a wall
+        """
+        x, y = origin
+        d_x = destination[0] - x
+        d_y = destination[1] - y
+        steps = math.ceil(max(abs(d_x), abs(d_y)))
+        if steps == 0:
+            pixel_x, pixel_y = self.location_to_pixel(destination)
+            return destination, bool(self.boundaries[pixel_x, pixel_y])
+
+        previous_x, previous_y = self.location_to_pixel(origin)
+        for step in range(1, steps + 1):
+            if step == steps:
+                location = destination
+            else:
+                location = (x + d_x * step / steps, y + d_y * step / steps)
+            pixel_x, pixel_y = self.location_to_pixel(location)
+
+            collision = self.boundaries[pixel_x, pixel_y] or (
+                pixel_x != previous_x and pixel_y != previous_y and
+                self.boundaries[previous_x, pixel_y] and self.boundaries[pixel_x, previous_y]
+            )
+            if collision or self.distance_matrix[pixel_x, pixel_y] == 1:
+                return location, bool(collision)
+            previous_x, previous_y = pixel_x, pixel_y
+
+        return destination, False
+
+    def sweep_batch(self, xs, ys, destinations_x, destinations_y):
+        """
+        Vectorized version of sweep. All paths are marched at once, in as many steps as the longest path needs.
+
+        :param xs: numpy array of current horizontal coordinates
+        :param ys: numpy array of current vertical coordinates
+        :param destinations_x: numpy array of target horizontal coordinates
+        :param destinations_y: numpy array of target vertical coordinates
+        :return: (xs, ys, collisions), numpy arrays with the locations where the paths stop and whether they stopped
+            at a wall
+        """
+        d_xs = destinations_x - xs
+        d_ys = destinations_y - ys
+        steps = np.ceil(np.maximum(np.abs(d_xs), np.abs(d_ys))).astype(np.intp)
+
+        stop_xs = np.array(destinations_x, dtype=float)
+        stop_ys = np.array(destinations_y, dtype=float)
+        collisions = np.zeros(len(stop_xs), dtype=bool)
+        standing = np.flatnonzero(steps == 0)
+        if len(standing) > 0:
+            pixels_x, pixels_y = self.locations_to_pixels(stop_xs[standing], stop_ys[standing])
+            collisions[standing] = self.boundaries[
+                np.clip(pixels_x, 0, self.width - 1), np.clip(pixels_y, 0, self.height - 1)
+            ]
+        moving = np.flatnonzero(steps > 0)
+        if len(moving) == 0:
+            return stop_xs, stop_ys, collisions
+
+        # One row per moving player, one column per step
+        step = np.arange(1, steps[moving].max() + 1)
+        last = steps[moving, None]
+        path_xs = np.where(
+            step >= last, stop_xs[moving, None], xs[moving, None] + d_xs[moving, None] * step / last
+        )
+        path_ys = np.where(
+            step >= last, stop_ys[moving, None], ys[moving, None] + d_ys[moving, None] * step / last
+        )
+        pixels_x, pixels_y = self.locations_to_pixels(path_xs, path_ys)
+        # Steps after the border of the track are never reached, but are looked up
+        np.clip(pixels_x, 0, self.width - 1, out=pixels_x)
+        np.clip(pixels_y, 0, self.height - 1, out=pixels_y)
+        origins_x, origins_y = self.locations_to_pixels(xs[moving, None], ys[moving, None])
+        previous_x = np.concatenate([origins_x, pixels_x[:, :-1]], axis=1)
+        previous_y = np.concatenate([origins_y, pixels_y[:, :-1]], axis=1)
+
+        wall = self.boundaries[pixels_x, pixels_y] | (
+            (pixels_x != previous_x) & (pixels_y != previous_y) &
+            self.boundaries[previous_x, pixels_y] & self.boundaries[pixels_x, previous_y]
+        )
+        stop = (wall | (self.distance_matrix[pixels_x, pixels_y] == 1)) & (step <= last)
+
+        stopped = stop.any(axis=1)
+        rows = np.flatnonzero(stopped)
+        columns = stop[stopped].argmax(axis=1)
+        stop_xs[moving[rows]] = path_xs[rows, columns]
+        stop_ys[moving[rows]] = path_ys[rows, columns]
+        collisions[moving[rows]] = wall[rows, columns]
+        return stop_xs, stop_ys, collisions
+
     def ray_trace_to_wall(self, position, angle, distance):
         """
         Use the bresenham algorithm to find the nearest wall over a angle and distance, returns None if no wall found.
         See the bresenham module for more information about the algorithm.
 
+        If a wall distance table is enabled (see enable_wall_distance_table) and covers the distance, the approximate
+        table lookup is used instead.
+
         :param position: origin (x, y)
         :param angle: angle in degrees
         :param distance: int or float
         :return: distance to nearest wall or None
         """
+        if self.wall_distance_table is not None and distance <= self.wall_distance_depth:
+            return self.lookup_wall_distance(position, angle, distance)
+
         origin = self.location_to_pixel(position)
         target = self.translate(position, distance, angle, pixel=True)
 
@@ -674,19 +1901,216 @@ class Environment(object):
         else:
             return None
 
-    def get_distance_matrix(self):
+    def ray_trace_batch(self, positions, angles, depths):
         """
-        Generate the distance map with manhattan distances to the finish by calling the private recursive_distance
-        function.
+        Vectorized version of ray_trace_to_wall: marches the bresenham lines of many rays at once and stops each ray
+        at its first wall. Gives the same result as calling ray_trace_to_wall for every ray, including the use of the
+        wall distance table when it is enabled and covers all depths.
 
-        :return: numpy ndarray with distances
+        :param positions: numpy array of origins, shape (n, 2)
+        :param angles: numpy array of angles in degrees, shape (n,)
+        :param depths: numpy array of distances, shape (n,), or a single distance for all rays
+        :return: integer numpy array with the distance to the nearest wall per ray, -1 if no wall was found
         """
-        finish_points = [(i[0], i[1]) for i in self.finish]
-        distance_matrix = self._recursive_distance(
-            distance_matrix=np.zeros(self.boundaries.shape),
-            points=finish_points,
-            distance=1
+        positions = np.asarray(positions, dtype=float).reshape(-1, 2)
+        angles = np.asarray(angles, dtype=float)
+        depths = np.broadcast_to(np.asarray(depths, dtype=float), angles.shape)
+
+        if self.wall_distance_table is None:
+            return self._ray_trace_batch_exact(positions, angles, depths)
+
+        wall_distances = np.empty(len(angles), dtype=np.intp)
+        covered = depths <= self.wall_distance_depth
+        wall_distances[covered] = self._lookup_wall_distance_batch(
+            positions[covered], angles[covered], depths[covered]
+        )
+        wall_distances[~covered] = self._ray_trace_batch_exact(
+            positions[~covered], angles[~covered], depths[~covered]
         )
+        return wall_distances
+
+    def _ray_trace_batch_exact(self, positions, angles, depths):
+        """
+        Bresenham part of ray_trace_batch.
+
+        :param positions: numpy array of origins, shape (n, 2)
+        :param angles: numpy array of angles in degrees, shape (n,)
+        :param depths: numpy array of distances, shape (n,)
+        :return: integer numpy array with the distance to the nearest wall per ray, -1 if no wall was found
+        """
+        x1, y1 = self.locations_to_pixels(positions[:, 0], positions[:, 1])
+        x2, y2 = self.locations_to_pixels(*self.translate_batch(positions[:, 0], positions[:, 1], depths, angles))
+
+        # Same setup as bresenham.get_line, a is the major axis and b the minor axis of every line
+        is_steep = np.abs(y2 - y1) > np.abs(x2 - x1)
+        a1, b1 = np.where(is_steep, y1, x1), np.where(is_steep, x1, y1)
+        a2, b2 = np.where(is_steep, y2, x2), np.where(is_steep, x2, y2)
+        swapped = a1 > a2
+        a1, a2 = np.where(swapped, a2, a1), np.where(swapped, a1, a2)
+        b1, b2 = np.where(swapped, b2, b1), np.where(swapped, b1, b2)
+
+        d_a = a2 - a1
+        d_b = np.abs(b2 - b1)
+        b_step = np.where(b1 < b2, 1, -1)
+        error = d_a // 2
+        safe_d_a = np.maximum(d_a, 1)
+
+        wall_distances = np.full(len(angles), -1, dtype=np.intp)
+        rays = np.arange(len(angles))  # Rays that are still marching
+        i = 0
+        while len(rays) > 0:
+            # Closed form of the bresenham loop: the minor axis has stepped once every time the error dropped below 0
+            k = np.where(swapped[rays], d_a[rays] - i, i)
+            b_steps = np.where(d_a[rays] > 0, (k * d_b[rays] - error[rays] + d_a[rays] - 1) // safe_d_a[rays], 0)
+            a = a1[rays] + k
+            b = b1[rays] + b_step[rays] * b_steps
+            steep = is_steep[rays]
+            hit = self.boundaries[np.where(steep, b, a), np.where(steep, a, b)]
+
+            wall_distances[rays[hit]] = i
+            i += 1
+            rays = rays[~hit & (i <= d_a[rays])]
+        return wall_distances
+
+    def _lookup_wall_distance_batch(self, positions, angles, depths):
+        """
+        Vectorized version of lookup_wall_distance.
+
+        :param positions: numpy array of origins, shape (n, 2)
+        :param angles: numpy array of angles in degrees, shape (n,)
+        :param depths: numpy array of distances, shape (n,)
+        :return: integer numpy array with the distance to the nearest wall per ray, -1 if no wall was found
+        """
+        bins = self.wall_distance_table.shape[2]
+        headings = np.rint(angles % 360 * bins / 360).astype(np.intp) % bins
+        pixels_x, pixels_y = self.locations_to_pixels(positions[:, 0], positions[:, 1])
+
+        wall_distances = self.wall_distance_table[pixels_x, pixels_y, headings].astype(np.intp)
+        extent = np.asarray(self._wall_distance_extent)[headings]
+        wall_distances[wall_distances > depths * extent] = -1
+        return wall_distances
+
+    def enable_wall_distance_table(self, bins=360, depth=100):
+        """
+        Precompute the distance to the nearest wall for every pixel and for every heading, quantized to a number of
+        bins. Once enabled, ray_trace_to_wall is answered by lookup_wall_distance for distances up to depth.
+
+        The table is an approximation of the exact bresenham ray trace: the heading is rounded to the nearest bin, the
+        position to the nearest pixel and the line of sight is that of a ray of full depth. Compared with the exact
+        trace of a 60 pixel sensor on the included tracks and 360 bins, about 90% of the percepts are identical, 97% are
+        within 1 pixel and 98.5% within 2 pixels (see benchmarks/wall_distance.py). Rays that graze a wall can differ
+        up to the full depth. Use the exact trace for competitions.
+
+        The table takes width * height * bins bytes and is cached on disk like the other track arrays. The table of an
+        edited track (see paint) is always built again, the cache and bundle belong to the original png.
+
+        :param bins: number of heading bins over 360 degrees
+        :param depth: maximum distance in pixels that is covered by the table, at most 254
+        :return: self
+        """
+        if not 0 < depth < 255:
+            raise ValueError(f"Wall distance table depth must be in range [1, 254], got {depth}")
+
+        table = None
+        if self._bundle is not None and 'wall_distance_table' in self._bundle:
+            bundled_table = self._bundle['wall_distance_table']
+            if bundled_table.shape[2] == bins and int(self._bundle['wall_distance_depth']) == depth:
+                table = bundled_table
+
+        cache = self.cache and not self.edited
+        if table is None and cache:
+            cache_dir = track_cache.get_cache_dir(self.track_path)
+            cache_key = track_cache.get_key(self.track_path, 'wall_distance_table', bins, depth)
+            arrays = track_cache.load(cache_dir, cache_key, ['wall_distance_table'])
+            if arrays is not None:
+                table = arrays['wall_distance_table']
+
+        if table is None:
+            table = self._get_wall_distance_table(bins, depth)
+            if cache:
+                track_cache.store(cache_dir, cache_key, dict(wall_distance_table=table))
+
+        headings = np.radians(np.arange(bins) * 360 / bins - 90)
+        self._wall_distance_extent = np.maximum(np.abs(np.cos(headings)), np.abs(np.sin(headings))).tolist()
+        self.wall_distance_depth = depth
+        self.wall_distance_table = table
+        return self
+
+    def disable_wall_distance_table(self):
+        """
+        Go back to exact ray tracing and release the wall distance table.
+
+        :return: self
+        """
+        self.wall_distance_table = None
+        self.wall_distance_depth = None
+        self._wall_distance_extent = None
+        return self
+
+    def lookup_wall_distance(self, position, angle, distance):
+        """
+        Approximate ray_trace_to_wall with a single lookup in the wall distance table. The table must be enabled, see
+        enable_wall_distance_table.
+
+        :param position: origin (x, y)
+        :param angle: angle in degrees
+        :param distance: int or float, at most the depth of the table
+        :return: distance to nearest wall or None
+        """
+        bins = self.wall_distance_table.shape[2]
+        heading = int(round(angle % 360 * bins / 360)) % bins
+        pixel_x, pixel_y = self.location_to_pixel(position)
+
+        wall_distance = int(self.wall_distance_table[pixel_x, pixel_y, heading])
+        # Bresenham indices count steps along the major axis of the line
+        if wall_distance > distance * self._wall_distance_extent[heading]:
+            return None
+        return wall_distance
+
+    def _get_wall_distance_table(self, bins, depth):
+        """
+        Build the wall distance table. For a fixed heading the bresenham line from any pixel is the same list of
+        offsets, so the boundaries are shifted over every offset of the line, nearest last, and each pixel gets the
+        index of the nearest offset that hits a wall. Pixels outside the track count as wall.
+
+        :param bins: number of heading bins over 360 degrees
+        :param depth: length of the rays in pixels
+        :return: numpy ndarray of shape (width, height, bins) with dtype uint8, 255 where no wall is found
+        """
+        width, height = self.boundaries.shape
+        padded = np.pad(np.asarray(self.boundaries), depth + 1, constant_values=True)
+        table = np.empty((width, height, bins), dtype=np.uint8)
+
+        for heading in range(bins):
+            target = self.translate((0, 0), depth, heading * 360 / bins, pixel=True)
+            line_of_sight = bresenham.get_line((0, 0), target)
+
+            wall_distance = np.full((width, height), 255, dtype=np.uint8)
+            for i in reversed(range(len(line_of_sight))):
+                offset_x, offset_y = line_of_sight[i]
+                x, y = depth + 1 + offset_x, depth + 1 + offset_y
+                np.copyto(wall_distance, i, where=padded[x:x + width, y:y + height])
+            table[:, :, heading] = wall_distance
+        return table
+
+    def get_distance_matrix(self, neighbourhood=None):
+        """
+        Generate the distance map with distances (in steps) to the finish. The map is flooded outward from the finish,
+        one ring of neighbouring pixels at a time, see _flood.
+
+        :param neighbourhood: key of Environment.NEIGHBOURHOODS, defaults to the neighbourhood of this environment
+        :return: numpy ndarray with distances
+        """
+        if neighbourhood is None:
+            neighbourhood = self.neighbourhood
+        offsets = Environment.NEIGHBOURHOODS[neighbourhood]
+
+        distance_matrix = np.zeros(self.boundaries.shape)
+        frontier = np.zeros(self.boundaries.shape, dtype=bool)
+        frontier[self.finish[:, 0], self.finish[:, 1]] = True
+        distance_matrix[frontier] = 1
+
+        self._flood(distance_matrix, frontier, 1, offsets)
         return distance_matrix
 
     def _distance_matrix_to_drawable(self):
@@ -704,71 +2128,83 @@ class Environment(object):
         drawable = pygame.transform.scale(surface, size)
         return drawable
 
-    def _recursive_distance(self, distance_matrix, points, distance):
+    def _flood(self, distance_matrix, frontier, distance, offsets):
         """
-        Find all neighboring pixels and give them value distance + 1
+        Iterative breadth-first flood fill. Every iteration the frontier (a boolean mask of the pixels that were given
+        the current distance) is dilated by shifting it over each neighbour offset. All pixels it grows into that are
+        not a wall and have no distance yet are given value distance + 1 and form the next frontier.
+
+        Only the bounding box of the frontier, plus a margin of one pixel, is processed per iteration, so the cost of a
+        ring is proportional to its size rather than to the size of the track.
 
-        :param distance_matrix: Numpy ndarray with current distances
-        :param points: List of coorindates
-        :param distance: current distance
+        :param distance_matrix: Numpy ndarray with current distances, updated in place
+        :param frontier: boolean Numpy ndarray of the same shape, marking the pixels with value distance
+        :param distance: distance of the pixels in the frontier
+        :param offsets: iterable of neighbour offsets (dx, dy)
         :return: numpy ndarray with distances
         """
-        # Set distance values
-        for point in points:
-            distance_matrix[point] = distance
-
-        # Determine neighbor points
-        valid_next_points = set()
-        for point in points:
-            for dx in [-1, 1]:
-                for dy in [-1, 1]:
-                    one_further = (
-                        point[0] + dx,
-                        point[1] + dy
-                    )
-                    try:
-                        if (not self.boundaries[one_further]) and distance_matrix[one_further] == 0:
-                            valid_next_points.add(one_further)
-                    except IndexError:
-                        pass
-
-        # Next iteration
-        if len(valid_next_points) > 0:
-            distance_matrix = self._recursive_distance(
-                distance_matrix,
-                valid_next_points,
-                distance + 1
-            )
-        return distance_matrix
+        width, height = distance_matrix.shape
+        passable = ~np.asarray(self.boundaries)
+
+        xs, ys = np.nonzero(frontier)
+        if len(xs) == 0:
+            return distance_matrix
+        # Bounding box of the frontier, [x_min, x_max) and [y_min, y_max)
+        x_min, x_max, y_min, y_max = xs.min(), xs.max() + 1, ys.min(), ys.max() + 1
+        frontier = frontier[x_min:x_max, y_min:y_max]
+
+        while True:
+            # Window of the frontier grown by one pixel in every direction, clipped to the track
+            wx_min, wx_max = max(x_min - 1, 0), min(x_max + 1, width)
+            wy_min, wy_max = max(y_min - 1, 0), min(y_max + 1, height)
+            window = np.s_[wx_min:wx_max, wy_min:wy_max]
+
+            padded = np.zeros((wx_max - wx_min, wy_max - wy_min), dtype=bool)
+            padded[x_min - wx_min:x_max - wx_min, y_min - wy_min:y_max - wy_min] = frontier
+
+            grown = np.zeros_like(padded)
+            w, h = padded.shape
+            for dx, dy in offsets:
+                grown[max(dx, 0):w + min(dx, 0), max(dy, 0):h + min(dy, 0)] |= \
+                    padded[max(-dx, 0):w + min(-dx, 0), max(-dy, 0):h + min(-dy, 0)]
 
-    def _setup_drawables(self, track_path, background_path):
+            next_frontier = grown & passable[window] & (distance_matrix[window] == 0)
+            xs, ys = np.nonzero(next_frontier)
+            if len(xs) == 0:
+                return distance_matrix
+
+            distance += 1
+            distance_matrix[window][next_frontier] = distance
+
+            x_min, x_max = wx_min + xs.min(), wx_min + xs.max() + 1
+            y_min, y_max = wy_min + ys.min(), wy_min + ys.max() + 1
+            frontier = next_frontier[x_min - wx_min:x_max - wx_min, y_min - wy_min:y_max - wy_min]
+
+    def _setup_drawable(self, name):
         """
-        Use the track sprites to create fitting images for the game
+        Build a scaled pygame surface of the track: the fancy background, the raw track or the score map. Taken from
+        the compiled track if it has them.
 
-        :param track_path: path to the raw track
-        :param background_path: path to the fancy background for the track
-        :return: dict(background, raw)
+        :param name: one of Environment.DRAWABLES
+        :return: pygame surface
         """
+        if self._bundle is not None and f'drawable_{name}' in self._bundle:
+            return pygame.surfarray.make_surface(self._bundle[f'drawable_{name}'])
+
+        if name == 'distance_matrix':
+            return self._distance_matrix_to_drawable()
+
         size = (
             int(self.width * Engine.SCALE),
             int(self.height * Engine.SCALE)
         )
-
-        background = pygame.image.load(background_path)
-        scaled_background = pygame.transform.scale(background, size)
-
-        track = pygame.image.load(track_path)
-        scaled_track = pygame.transform.scale(track, size)
-
-        distance_matrix_drawable = self._distance_matrix_to_drawable()
-
-        drawables = dict(
-            background=scaled_background,
-            raw=scaled_track,
-            distance_matrix=distance_matrix_drawable
-        )
-
-        return drawables
+        if name == 'background':
+            image = pygame.image.load(self.background_path)
+        elif name == 'raw':
+            image = pygame.image.load(self.track_path)
+        else:
+            raise ValueError(f"Unknown drawable {name}, choose from {', '.join(Environment.DRAWABLES)}")
+        return pygame.transform.scale(image, size)
 
     @staticmethod
     def translate(position, distance, rotation, pixel=False):
@@ -792,6 +2228,31 @@ class Environment(object):
             x, y = Environment.location_to_pixel((x, y))
         return x, y
 
+    @staticmethod
+    def translate_batch(xs, ys, distances, rotations):
+        """
+        Vectorized version of translate.
+
+        :param xs: numpy array of horizontal coordinates
+        :param ys: numpy array of vertical coordinates
+        :param distances: numpy array or scalar
+        :param rotations: numpy array or scalar of angles in degrees
+        :return: new coordinates (xs, ys) as numpy arrays
+        """
+        rotations_rad = np.radians(rotations - 90)
+        return xs + np.cos(rotations_rad) * distances, ys + np.sin(rotations_rad) * distances
+
+    @staticmethod
+    def locations_to_pixels(xs, ys):
+        """
+        Vectorized version of location_to_pixel, rounds half to even like python's round.
+
+        :param xs: numpy array of horizontal coordinates
+        :param ys: numpy array of vertical coordinates
+        :return: (pixels_x, pixels_y) as integer numpy arrays
+        """
+        return np.rint(xs).astype(np.intp), np.rint(ys).astype(np.intp)
+
     @staticmethod
     def location_to_pixel(coordinate):
         """
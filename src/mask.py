@@ -0,0 +1,61 @@
+"""
+:author: Laurens Koppenol
+
+Bit-packed boolean masks, storing 8 pixels per byte instead of 1. Used for the walls of tracks in compact mode, see
+Environment.compact().
+
+> mask = PackedMask.pack(boundaries)
+> mask[10, 20]
+True
+> mask[xs, ys]  # numpy arrays of pixel coordinates
+array([ True, False, ...])
+
+"""
+import numpy as np
+
+
+class PackedMask(object):
+    """
+    Read-only 2d boolean mask packed along the second axis. Supports indexing with a pair of integers or integer arrays
+    like a numpy array; np.asarray(mask) unpacks it.
+    """
+    dtype = np.dtype(bool)
+
+    def __init__(self, bits, shape):
+        """
+        :param bits: uint8 numpy array as returned by np.packbits(mask, axis=1)
+        :param shape: shape of the unpacked mask
+        """
+        self.bits = bits
+        self.shape = tuple(shape)
+
+    @classmethod
+    def pack(cls, mask):
+        """
+        :param mask: 2d boolean numpy array
+        :return: PackedMask
+        """
+        mask = np.asarray(mask, dtype=bool)
+        return cls(np.packbits(mask, axis=1), mask.shape)
+
+    @property
+    def nbytes(self):
+        return self.bits.nbytes
+
+    def __getitem__(self, index):
+        x, y = index
+        width = self.shape[1]
+        if np.any((np.asarray(y) < -width) | (np.asarray(y) >= width)):
+            raise IndexError(f"index {y} is out of bounds for axis 1 with size {width}")
+        y = y % width  # Negative indices count from the end like in numpy, the padding bits are never read
+        return ((self.bits[x, y >> 3] >> (7 - (y & 7))) & 1).astype(bool)
+
+    def __array__(self, dtype=None, copy=None):
+        mask = self.unpack()
+        return mask if dtype is None else mask.astype(dtype)
+
+    def unpack(self):
+        """
+        :return: 2d boolean numpy array
+        """
+        return np.unpackbits(self.bits, axis=1, count=self.shape[1]).astype(bool)
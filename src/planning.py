@@ -0,0 +1,199 @@
+"""
+:author: Laurens Koppenol
+
+Run the plan() of the players in a thread or process pool with a deadline per turn, so a single slow AI cannot freeze
+the game for everybody. Pass a planner to the engine:
+
+> game_engine = Engine(track, players, planner=DeadlinePlanner(deadline=0.01))
+> game_engine.play()
+> game_engine.planner.get_stats()
+{0: {'plans': 812, 'misses': 3, 'miss_rate': 0.0037}, ...}
+
+Every turn the planner hands the percepts of all live players to the pool and waits at most the deadline. A player
+whose plan is not done in time keeps its previous action (or coasts, see fallback) and gets no new percepts until its
+plan is done; the late action is used in the turn it comes in.
+
+Threads cannot be stopped: a plan() that never returns keeps its thread busy for the rest of the program. The default
+pool runs plans on daemon threads, so such a plan does not keep the program from exiting. Executors of
+concurrent.futures wait for their running tasks when the program exits, a custom executor hangs on a plan that never
+returns.
+
+"""
+import collections
+import concurrent.futures
+import os
+import queue
+import threading
+
+from loguru import logger
+
+COAST = (0, 0)  # No acceleration and no rotation
+FALLBACKS = ('previous', 'coast')
+
+
+class DeadlinePlanner(object):
+    """
+    Lets players plan concurrently with a deadline per turn and keeps deadline statistics per player. The planner is
+    closed when the game ends, use a new planner per engine.
+    """
+    def __init__(self, deadline=1/60, executor=None, fallback='previous', workers=None):
+        """
+        :param deadline: seconds to wait for the plans of all players every turn
+        :param executor: optional concurrent.futures.Executor, defaults to a DaemonThreadPool owned by the planner
+        :param fallback: action of a player that missed the deadline: 'previous' repeats its last action, 'coast'
+            does not accelerate or rotate
+        :param workers: number of threads of the default thread pool, see DaemonThreadPool
+        """
+        if fallback not in FALLBACKS:
+            raise ValueError(f"Unknown fallback {fallback}, choose from {', '.join(FALLBACKS)}")
+
+        self.deadline = deadline
+        self.fallback = fallback
+        self._owns_executor = executor is None
+        if executor is None:
+            executor = DaemonThreadPool(workers=workers, name='plan')
+        self.executor = executor
+
+        self._pending = {}  # {player: future of a plan that is not used yet}
+        self._actions = {}  # {player: last action}
+        self.stats = collections.defaultdict(lambda: dict(plans=0, misses=0))  # {player id: counts}
+
+    def plan(self, players, percepts):
+        """
+        Plan the next action of the players, waiting at most self.deadline.
+
+        :param players: list of player.Player objects
+        :param percepts: list of the percepts of every player
+        :return: list of (acceleration_command, rotation_command) per player
+        """
+        futures = []
+        for player, player_percepts in zip(players, percepts):
+            future = self._pending.get(player)
+            if future is None:
+                future = self.executor.submit(player.plan, player_percepts)
+                self._pending[player] = future
+            futures.append(future)
+
+        concurrent.futures.wait(futures, timeout=self.deadline)
+
+        actions = []
+        for player, future in zip(players, futures):
+            stats = self.stats[player.id]
+            if future.done():
+                del self._pending[player]
+                action = future.result()
+                self._actions[player] = action
+                stats['plans'] += 1
+            else:
+                stats['misses'] += 1
+                if self.fallback == 'previous':
+                    action = self._actions.get(player, COAST)
+                else:
+                    action = COAST
+            actions.append(action)
+        return actions
+
+    def get_stats(self):
+        """
+        :return: dict {player_id: dict(plans, misses, miss_rate)}, plans counts the plans that were used
+        """
+        return {
+            player_id: dict(stats, miss_rate=stats['misses'] / (stats['plans'] + stats['misses']))
+            for player_id, stats in self.stats.items()
+        }
+
+    def reset(self):
+        """
+        Forget the last actions and the plans that are still running, called by Engine.reset(). Statistics are kept.
+
+        :return: Nothing
+        """
+        for future in self._pending.values():
+            future.cancel()
+        self._pending = {}
+        self._actions = {}
+
+    def close(self):
+        """
+        Log the players that missed deadlines and shut down the thread pool if the planner created it. Called when
+        the game ends.
+
+        :return: Nothing
+        """
+        for player_id, stats in self.get_stats().items():
+            if stats['misses'] > 0:
+                logger.info(f"Player {player_id} missed {stats['misses']} deadlines ({stats['miss_rate']:.1%})")
+
+        self.reset()
+        if self._owns_executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class DaemonThreadPool(object):
+    """
+    Minimal executor that runs tasks on daemon threads. concurrent.futures.ThreadPoolExecutor joins its threads when
+    the program exits, so a single task that never returns would keep the program from exiting.
+    """
+    def __init__(self, workers=None, name='pool'):
+        """
+        :param workers: maximum number of threads, defaults to the number of cpus + 4 like ThreadPoolExecutor
+        :param name: prefix of the thread names
+        """
+        self.workers = workers or min(32, (os.cpu_count() or 1) + 4)
+        self.name = name
+        self._tasks = queue.SimpleQueue()
+        self._threads = []
+        self._shutdown = False
+
+    def submit(self, function, *args, **kwargs):
+        """
+        :param function: callable to run on a pool thread
+        :return: concurrent.futures.Future of its result
+        """
+        if self._shutdown:
+            raise RuntimeError("Cannot submit to a pool that was shut down")
+        future = concurrent.futures.Future()
+        self._tasks.put((future, function, args, kwargs))
+        if len(self._threads) < self.workers:
+            thread = threading.Thread(target=self._work, name=f'{self.name}_{len(self._threads)}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return future
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        """
+        Stop the threads once they are done with their current task.
+
+        :param wait: whether to wait for all threads to finish, never returns if a task never returns
+        :param cancel_futures: whether to cancel the tasks that did not start yet
+        :return: Nothing
+        """
+        self._shutdown = True
+        if cancel_futures:
+            while True:
+                try:
+                    task = self._tasks.get_nowait()
+                except queue.Empty:
+                    break
+                if task is not None:
+                    task[0].cancel()
+        for _ in self._threads:
+            self._tasks.put(None)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+    def _work(self):
+        while True:
+            task = self._tasks.get()
+            if task is None:
+                return
+            future, function, args, kwargs = task
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = function(*args, **kwargs)
+            except BaseException as error:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
@@ -5,13 +5,54 @@ Module to handle players. See :doc:`ai-players` on how to create new players
 
 """
 from abc import abstractmethod, ABC
+import random
+
+import numpy as np
 import pygame
 
 
+class StateAttribute(object):
+    """
+    Descriptor for the player attributes that the engine updates every turn. A player that is bound to a PlayerStates
+    object reads and writes these attributes in its slot of the arrays, otherwise they are plain instance attributes.
+    """
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, player, owner=None):
+        if player is None:
+            return self
+        if player._states is None:
+            try:
+                return player.__dict__[self.name]
+            except KeyError:
+                raise AttributeError(f"'{type(player).__name__}' object has no attribute '{self.name}'") from None
+        return player._states.get(self.name, player._slot)
+
+    def __set__(self, player, value):
+        if player._states is None:
+            player.__dict__[self.name] = value
+        else:
+            player._states.set(self.name, player._slot, value)
+
+
 class Player(ABC):
     """
     Abstract class. Subclass this if you want to make a new player. See readthedocs for more info.
     """
+    position = StateAttribute()
+    speed = StateAttribute()
+    rotation = StateAttribute()
+    score = StateAttribute()
+    alive = StateAttribute()
+    starting_tick = StateAttribute()
+    ending_tick = StateAttribute()
+    acceleration_command = StateAttribute()
+    rotation_command = StateAttribute()
+
+    _states = None
+    _slot = None
+
     def __init__(self):
         """
         Set initial values for player
@@ -22,6 +63,17 @@ class Player(ABC):
 
         self.score = 0
         self.alive = True
+        self.starting_tick = None
+        self.ending_tick = None
+        self.death_reason = None
+
+        # Last action of the player after clamping, set by the engine every turn
+        self.acceleration_command = 0
+        self.rotation_command = 0
+
+        # Random number generator of the player, seeded by the engine. Use it instead of the random module to make
+        # runs reproducible.
+        self.random = random.Random()
 
         self.sensors = []
 
@@ -46,6 +98,42 @@ class Player(ABC):
         """
         pass
 
+    @classmethod
+    def sense_batch(cls, players, track, keys):
+        """
+        Sense for many players of this class at once. The engine calls this once per player class per turn in
+        vectorized mode. Override it to share work between players, by default sense() is called per player.
+
+        :param players: list of players of this class
+        :param track: Environment object
+        :param keys: dictionary of keys
+        :return: list of percepts, one per player
+        """
+        return [player.sense(track, keys) for player in players]
+
+    @classmethod
+    def plan_batch(cls, players, percepts):
+        """
+        Plan for many players of this class at once. The engine calls this once per player class per turn in
+        vectorized mode. Override it to plan for all players with array operations, by default plan() is called per
+        player.
+
+        :param players: list of players of this class
+        :param percepts: list of percepts, one per player
+        :return: list or numpy array with an (acceleration_command, rotation_command) per player
+        """
+        return [player.plan(player_percepts) for player, player_percepts in zip(players, percepts)]
+
+    def get_parameters(self):
+        """
+        Everything that determines how the player drives, for example the weights of a neural network. Two players of
+        the same class with equal parameters must drive exactly the same, then results can be cached (see
+        evaluation_cache). Subclasses that add parameters must override this.
+
+        :return: picklable object, or None if the player cannot be cached (default)
+        """
+        return None
+
     def set_position(self, coordinate):
         """
         Set new player position
@@ -137,6 +225,39 @@ class NaiveAi(Player):
         percepts = [s.perceive(track) for s in self.sensors]
         return percepts
 
+    def get_parameters(self):
+        """
+        :return: angles and depths of the sensors, the only parameters of this AI. None for subclasses that do not
+            override get_parameters, as they may drive differently with the same sensors
+        """
+        if 'get_parameters' not in type(self).__dict__:
+            return None
+        return [(sensor.angle, sensor.depth) for sensor in self.sensors]
+
+    @classmethod
+    def sense_batch(cls, players, track, keys):
+        """
+        Ray trace the sensors of all players in a single batch, see DistanceSensor.perceive_batch. Falls back to
+        sense() per player for subclasses that override sense().
+
+        :param players: list of players of this class
+        :param track: Environment object
+        :param keys: Not used
+        :return: list of percepts, one per player
+        """
+        if cls.sense is not NaiveAi.sense:
+            return super().sense_batch(players, track, keys)
+
+        sensors = [sensor for player in players for sensor in player.sensors]
+        percepts = DistanceSensor.perceive_batch(sensors, track)
+
+        batched_percepts = []
+        i = 0
+        for player in players:
+            batched_percepts.append(percepts[i:i + len(player.sensors)])
+            i += len(player.sensors)
+        return batched_percepts
+
     def plan(self, percepts):
         """
         Use the percepts to choose actions. This naive AI will match a certain speed and rotate away from the nearest
@@ -190,6 +311,30 @@ class DistanceSensor(object):
         self.percept = percept
         return percept
 
+    @staticmethod
+    def perceive_batch(sensors, track):
+        """
+        Update the values of many sensors with a single call to Environment.ray_trace_batch. Sets and returns the same
+        values as calling perceive() on each sensor.
+
+        :param sensors: list of DistanceSensor objects
+        :param track: Environment object
+        :return: list of distance values
+        """
+        if len(sensors) == 0:
+            return []
+
+        positions = [sensor.player.position for sensor in sensors]
+        angles = [sensor.get_absolute_angle() for sensor in sensors]
+        depths = [sensor.depth for sensor in sensors]
+        wall_distances = track.ray_trace_batch(positions, angles, depths).tolist()
+
+        percepts = []
+        for sensor, wall_distance in zip(sensors, wall_distances):
+            sensor.percept = sensor.depth if wall_distance == -1 else wall_distance
+            percepts.append(sensor.percept)
+        return percepts
+
     def get_absolute_angle(self):
         """
         Use the player's angle and the sensor's offset to return the absolute angle of the sensor.
@@ -198,3 +343,112 @@ class DistanceSensor(object):
         """
         absolute_angle = self.player.rotation + self.angle
         return absolute_angle
+
+
+class PlayerStates(object):
+    """
+    Structure of arrays that holds the state of many players, so the engine can update all of them with single array
+    operations. Players that are added become views: their position, speed, rotation, score, alive, starting_tick,
+    ending_tick, acceleration_command and rotation_command attributes read from and write to their slot in the
+    arrays.
+    """
+    ARRAYS = dict(
+        x=np.float64,
+        y=np.float64,
+        speed=np.float64,
+        rotation=np.float64,
+        score=np.float64,
+        alive=np.bool_,
+        starting_tick=np.int64,
+        ending_tick=np.int64,
+        acceleration_command=np.float64,
+        rotation_command=np.float64
+    )
+    ATTRIBUTES = (
+        'position', 'speed', 'rotation', 'score', 'alive', 'starting_tick', 'ending_tick', 'acceleration_command',
+        'rotation_command'
+    )
+    NO_TICK = -1  # Stored for a starting_tick or ending_tick of None
+
+    def __init__(self, capacity=16):
+        """
+        :param capacity: initial number of slots, grows when needed
+        """
+        self.players = []
+        self.size = 0
+        self.arrays = {name: np.zeros(capacity, dtype=dtype) for name, dtype in PlayerStates.ARRAYS.items()}
+
+    def __getattr__(self, name):
+        """
+        Access the used part of an array as attribute, e.g. states.speed
+
+        :param name: name of the array
+        :return: numpy ndarray view of length size
+        """
+        try:
+            return self.__dict__['arrays'][name][:self.size]
+        except KeyError:
+            raise AttributeError(name)
+
+    def add(self, player):
+        """
+        Copy the state of a player into a new slot and bind the player to it.
+
+        :param player: player.Player object
+        :return: slot of the player
+        """
+        if self.size == len(self.arrays['x']):
+            self.arrays = {name: np.resize(array, 2 * len(array)) for name, array in self.arrays.items()}
+
+        values = {name: getattr(player, name) for name in PlayerStates.ATTRIBUTES}
+        slot = self.size
+        self.size += 1
+        self.players.append(player)
+        player._states = self
+        player._slot = slot
+        for name, value in values.items():
+            self.set(name, slot, value)
+        return slot
+
+    def release(self):
+        """
+        Copy the state of every player back into the player and unbind it. The players remain usable on their own.
+
+        :return: self
+        """
+        for player in self.players:
+            values = {name: getattr(player, name) for name in PlayerStates.ATTRIBUTES}
+            player._states = None
+            player._slot = None
+            for name, value in values.items():
+                setattr(player, name, value)
+        self.players = []
+        self.size = 0
+        return self
+
+    def get(self, name, slot):
+        """
+        :param name: name of a StateAttribute of Player
+        :param slot: slot of the player
+        :return: value as python type
+        """
+        if name == 'position':
+            return self.arrays['x'][slot].item(), self.arrays['y'][slot].item()
+        value = self.arrays[name][slot].item()
+        if name in ('starting_tick', 'ending_tick') and value == PlayerStates.NO_TICK:
+            return None
+        return value
+
+    def set(self, name, slot, value):
+        """
+        :param name: name of a StateAttribute of Player
+        :param slot: slot of the player
+        :param value: new value
+        :return: Nothing
+        """
+        if name == 'position':
+            self.arrays['x'][slot], self.arrays['y'][slot] = value
+        elif value is None:
+            self.arrays[name][slot] = PlayerStates.NO_TICK
+        else:
+            self.arrays[name][slot] = value
@@ -0,0 +1,154 @@
+"""
+:author: Laurens Koppenol
+
+Opt-in instrumentation of the game loop. Shows whether time goes to the AI code of the players (sense and plan) or to
+the engine (act, resolve, event handling and drawing).
+
+> profiler = Profiler()
+> game_engine = Engine(track, players, profiler=profiler)
+> game_engine.play()
+> profiler.summary()['plan']
+{'count': 4410, 'total': 0.0123, 'p50': 2.1e-06, 'p90': 3.0e-06, 'p99': 8.9e-06}
+> profiler.to_chrome_trace('trace.json')  # open in chrome://tracing or https://ui.perfetto.dev
+
+The engine only checks for a profiler once per turn, without a profiler the game loop is the same as before.
+
+"""
+import collections
+import json
+import time
+
+import numpy as np
+
+PERCENTILES = (50, 90, 99)
+
+
+class Profiler(object):
+    """
+    Collects durations per phase and per player in rolling windows, and optionally a trace of all measurements. The
+    summaries can be read from another thread while measurements are added, for example by a drawing thread (see
+    scheduling).
+    """
+    def __init__(self, window=300, player_window=60, trace=False, max_trace_events=1000000):
+        """
+        :param window: number of recent measurements per phase to compute percentiles over
+        :param player_window: number of recent measurements per phase per player
+        :param trace: whether to keep every measurement for to_chrome_trace()
+        :param max_trace_events: maximum number of measurements kept for the trace, later ones are dropped
+        """
+        self.window = window
+        self.player_window = player_window
+        self.trace = trace
+        self.max_trace_events = max_trace_events
+
+        self.origin = time.perf_counter()
+        self.durations = collections.defaultdict(lambda: collections.deque(maxlen=self.window))
+        self.player_durations = collections.defaultdict(lambda: collections.deque(maxlen=self.player_window))
+        self.counts = collections.Counter()
+        self.totals = collections.Counter()
+        self.events = []
+
+    def add(self, phase, start, end=None, player_id=None):
+        """
+        Add a measurement.
+
+        :param phase: name of the phase, e.g. 'sense'
+        :param start: time.perf_counter() at the start of the phase
+        :param end: time.perf_counter() at the end of the phase, defaults to now
+        :param player_id: id of the player the phase was for, None for engine wide phases
+        :return: Nothing
+        """
+        if end is None:
+            end = time.perf_counter()
+        duration = end - start
+
+        self.durations[phase].append(duration)
+        self.counts[phase] += 1
+        self.totals[phase] += duration
+        if player_id is not None:
+            self.player_durations[phase, player_id].append(duration)
+
+        if self.trace and len(self.events) < self.max_trace_events:
+            self.events.append((phase, start, duration, player_id))
+
+    def get_percentiles(self, phase, player_id=None):
+        """
+        :param phase: name of the phase
+        :param player_id: optional id of a player
+        :return: dict {'p50': seconds, ...} over the rolling window, None if there are no measurements
+        """
+        if player_id is None:
+            durations = self.durations.get(phase)
+        else:
+            durations = self.player_durations.get((phase, player_id))
+        if not durations:
+            return None
+
+        values = np.percentile(np.array(list(durations), dtype=float), PERCENTILES)
+        return {f'p{p}': value for p, value in zip(PERCENTILES, values.tolist())}
+
+    def summary(self):
+        """
+        :return: dict per phase with the count and total time of all measurements and the rolling percentiles
+        """
+        summary = {}
+        for phase in list(self.durations):
+            summary[phase] = dict(count=self.counts[phase], total=self.totals[phase], **self.get_percentiles(phase))
+        return summary
+
+    def player_summary(self):
+        """
+        :return: dict per player id with per phase the rolling percentiles
+        """
+        summary = collections.defaultdict(dict)
+        for phase, player_id in list(self.player_durations):
+            summary[player_id][phase] = self.get_percentiles(phase, player_id)
+        return dict(summary)
+
+    def to_json(self, path):
+        """
+        Write the summaries to a JSON file.
+
+        :param path: file to write to
+        :return: Nothing
+        """
+        report = dict(
+            phases=self.summary(),
+            players={str(player_id): phases for player_id, phases in self.player_summary().items()}
+        )
+        with open(path, 'w') as json_file:
+            json.dump(report, json_file, indent=2)
+
+    def to_chrome_trace(self, path):
+        """
+        Write all traced measurements in the Chrome trace event format. Engine wide phases are on the first row,
+        player phases on a row per player. Requires trace=True.
+
+        :param path: file to write to
+        :return: Nothing
+        """
+        if not self.trace:
+            raise ValueError("The profiler did not keep a trace, create it with Profiler(trace=True)")
+        trace_events = [
+            dict(
+                name=phase,
+                ph='X',
+                ts=(start - self.origin) * 1e6,
+                dur=duration * 1e6,
+                pid=0,
+                tid=0 if player_id is None else player_id + 1
+            )
+            for phase, start, duration, player_id in self.events
+        ]
+        with open(path, 'w') as json_file:
+            json.dump(dict(traceEvents=trace_events, displayTimeUnit='ms'), json_file)
+
+    def get_lines(self):
+        """
+        :return: list of strings with the rolling percentiles per phase in milliseconds, for drawing on screen
+        """
+        lines = []
+        for phase, stats in self.summary().items():
+            percentiles = ' '.join(f"{name} {1000 * stats[name]:.3f}" for name in (f'p{p}' for p in PERCENTILES))
+            lines.append(f"{phase:<8} {percentiles} ms")
+        return lines
@@ -0,0 +1,269 @@
+"""
+:author: Laurens Koppenol
+
+Record games to disk and watch them later, for example the best runs of a headless training session.
+
+A replay is a folder with a binary file per column (id, x, y, rotation, speed, score and alive) to which the rows of all
+players are appended every turn, plus a file with the end row of every turn and a meta.json. The files are written
+while the game runs and can be memory-mapped, so a viewer can jump to any turn without reading the whole replay.
+Optionally the columns are compressed into a single replay.npz when recording ends.
+
+> game_engine = Engine(track, players, headless=True)
+> game_engine.record('replays/run_1')
+> game_engine.play()
+>
+> ReplayViewer('replays/run_1').play(speed=4)
+
+The recorder is closed when the game ends. Games that are driven with Engine.step() must be closed with
+Engine.close() (or used as a context manager) to finish the replay.
+
+"""
+import json
+import os
+import time
+
+import numpy as np
+import pygame
+from loguru import logger
+
+from src.game import Engine, Environment
+from src.player import Player
+
+REPLAY_VERSION = 1
+COLUMNS = dict(
+    id=np.int32,
+    x=np.float32,
+    y=np.float32,
+    rotation=np.float32,
+    speed=np.float32,
+    score=np.float32,
+    alive=np.uint8
+)
+INDEX_COLUMNS = dict(
+    tick=np.int64,  # Engine tick of every recorded turn
+    end=np.int64  # Row after the last row of every recorded turn
+)
+
+
+class ReplayRecorder(object):
+    """
+    Tick listener that streams the state of all players to a replay folder, see Engine.record().
+    """
+    def __init__(self, path, environment, compress=False):
+        """
+        :param path: folder to write the replay to, is created if needed
+        :param environment: game.Environment the game is played on
+        :param compress: whether to compress the columns into replay.npz on close
+        """
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.compress = compress
+        self.meta = dict(
+            version=REPLAY_VERSION,
+            track=environment.name,
+            neighbourhood=environment.neighbourhood,
+            columns={name: np.dtype(dtype).str for name, dtype in {**COLUMNS, **INDEX_COLUMNS}.items()},
+            colors={},
+            ticks=0,
+            rows=0,
+            compressed=False
+        )
+        self._files = {
+            name: open(os.path.join(path, f'{name}.bin'), 'wb') for name in {**COLUMNS, **INDEX_COLUMNS}
+        }
+        self._write_meta()
+
+    def on_tick(self, engine):
+        """
+        Append the state of all players.
+
+        :param engine: game.Engine
+        :return: Nothing
+        """
+        if self._files is None:
+            return
+
+        state_arrays = engine.get_state_arrays()
+        for name, dtype in COLUMNS.items():
+            self._files[name].write(state_arrays[name].astype(dtype).tobytes())
+
+        self.meta['rows'] += len(state_arrays['id'])
+        self.meta['ticks'] += 1
+        self._files['tick'].write(np.int64(engine.tick).tobytes())
+        self._files['end'].write(np.int64(self.meta['rows']).tobytes())
+
+        if len(self.meta['colors']) < len(engine.players):
+            for player in engine.players:
+                self.meta['colors'].setdefault(str(player.id), list(player.color))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """
+        Flush and close the column files and optionally compress them. Closing twice does nothing.
+
+        :return: Nothing
+        """
+        if self._files is None:
+            return
+        for column_file in self._files.values():
+            column_file.close()
+        self._files = None
+
+        if self.compress:
+            columns = _memory_map_columns(self.path, self.meta)
+            np.savez_compressed(os.path.join(self.path, 'replay.npz'), **columns)
+            del columns
+            for name in {**COLUMNS, **INDEX_COLUMNS}:
+                os.remove(os.path.join(self.path, f'{name}.bin'))
+            self.meta['compressed'] = True
+        self._write_meta()
+
+    def _write_meta(self):
+        with open(os.path.join(self.path, 'meta.json'), 'w') as meta_file:
+            json.dump(self.meta, meta_file)
+
+
+class ReplayViewer(object):
+    """
+    Watch a recorded replay. Turns are read from memory-mapped columns, no Player.plan code is run.
+
+    During play() the following keys can be used:
+
+    - space: pause
+    - '.' and ',': double or halve the playback speed
+    - home and end: jump to the first or last turn
+    """
+    def __init__(self, path):
+        """
+        :param path: folder of a replay, see ReplayRecorder
+        """
+        with open(os.path.join(path, 'meta.json')) as meta_file:
+            self.meta = json.load(meta_file)
+        if self.meta['compressed']:
+            self.columns = dict(np.load(os.path.join(path, 'replay.npz')))
+        else:
+            self.columns = _memory_map_columns(path, self.meta)
+
+        self.ticks = len(self.columns['end'])
+        self.position = 0
+        self.speed = 1
+        self.paused = False
+
+    def get_turn(self, index):
+        """
+        Get the state of all players in a recorded turn.
+
+        :param index: index of the turn in the replay, from 0 to self.ticks - 1
+        :return: dict of numpy arrays per column, plus the engine tick
+        """
+        if not 0 <= index < self.ticks:
+            raise IndexError(f"Turn {index} is not in the replay, which has {self.ticks} turns")
+        end = self.columns['end'][index]
+        start = self.columns['end'][index - 1] if index > 0 else 0
+        turn = {name: self.columns[name][start:end] for name in COLUMNS}
+        turn['tick'] = int(self.columns['tick'][index])
+        return turn
+
+    def seek(self, index):
+        """
+        Jump to a turn.
+
+        :param index: index of the turn, is clipped to the replay
+        :return: self
+        """
+        self.position = max(min(index, self.ticks - 1), 0)
+        return self
+
+    def play(self, speed=1):
+        """
+        Open a game window and play the replay until the window is closed.
+
+        :param speed: number of recorded turns per frame, can be a fraction
+        :return: self
+        """
+        if self.ticks == 0:
+            logger.warning("Replay has no turns, nothing to play")
+            return self
+
+        self.speed = speed
+        environment = Environment(self.meta['track'], neighbourhood=self.meta['neighbourhood'])
+        engine = Engine(environment, [])
+        engine.bind_action(pygame.K_SPACE, self._toggle_pause)
+        engine.bind_action(pygame.K_PERIOD, lambda: setattr(self, 'speed', self.speed * 2))
+        engine.bind_action(pygame.K_COMMA, lambda: setattr(self, 'speed', self.speed / 2))
+        engine.bind_action(pygame.K_HOME, lambda: self.seek(0))
+        engine.bind_action(pygame.K_END, lambda: self.seek(self.ticks - 1))
+
+        ghosts = {}
+        while engine.is_running():
+            engine._handle_pygame_events()
+            if not engine.is_running():
+                break
+
+            turn = self.get_turn(int(self.position))
+            engine.players = [
+                self._update_ghost(ghosts, *values) for values in zip(*[turn[name].tolist() for name in COLUMNS])
+            ]
+            engine.tick = turn['tick']
+            engine._draw()
+
+            if not self.paused:
+                self.seek(self.position + self.speed)
+
+            time_to_next_frame = Engine.SECONDS_PER_FRAME - time.time() % Engine.SECONDS_PER_FRAME
+            time.sleep(time_to_next_frame)
+        return self
+
+    def _toggle_pause(self):
+        self.paused = not self.paused
+
+    def _update_ghost(self, ghosts, player_id, x, y, rotation, speed, score, alive):
+        """
+        Get the ghost of a recorded player and set its state.
+
+        :return: ReplayGhost
+        """
+        ghost = ghosts.get(player_id)
+        if ghost is None:
+            ghost = ReplayGhost()
+            ghost.id = player_id
+            ghost.color = tuple(self.meta['colors'].get(str(player_id), (255, 255, 255)))
+            ghosts[player_id] = ghost
+        ghost.position = (x, y)
+        ghost.rotation = rotation
+        ghost.speed = speed
+        ghost.score = score
+        ghost.alive = bool(alive)
+        return ghost
+
+
+class ReplayGhost(Player):
+    """
+    Stand-in for a recorded player, only used for drawing. Has no sensors and never plans.
+    """
+    def sense(self, track, keys):
+        return None
+
+    def plan(self, percepts):
+        return 0, 0
+
+
+def _memory_map_columns(path, meta):
+    """
+    :param path: folder of a replay
+    :param meta: meta data of the replay
+    :return: dict of read-only memory-mapped numpy arrays per column
+    """
+    columns = {}
+    for name, dtype in meta['columns'].items():
+        column_path = os.path.join(path, f'{name}.bin')
+        if os.path.getsize(column_path) == 0:
+            columns[name] = np.zeros(0, dtype=dtype)
+        else:
+            columns[name] = np.memmap(column_path, dtype=dtype, mode='r')
+    return columns
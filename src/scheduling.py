@@ -0,0 +1,298 @@
+"""
+:author: Laurens Koppenol
+
+Fixed timestep scheduling: run the simulation at its own rate and draw at another, instead of drawing once per turn.
+Every turn still moves the players by Engine.SECONDS_PER_FRAME, only the wall clock time between turns changes, so
+runs give the same result at any rate.
+
+> game_engine = Engine(track, players, scheduler=FixedTimestep(tick_rate=None, render_rate=30))
+> game_engine.play()  # Simulates as fast as possible and shows it 30 times per second
+
+An accumulator collects the elapsed wall clock time and as many turns as fit in it are played, up to
+max_ticks_per_frame, after which the simulation slows down instead of falling further behind. Frames are drawn at
+render_rate, every render_every turns or from a separate thread. Train positions are interpolated between the last two
+turns, so drawing faster than simulating is smooth.
+
+Pressing 4 (fps limiter) in the game window switches between tick_rate and as fast as possible.
+
+"""
+import threading
+import time
+
+import numpy as np
+
+
+class FixedTimestep(object):
+    """
+    Accumulator based scheduler, pass it to the engine with Engine(scheduler=...).
+    """
+    def __init__(self, tick_rate=30, render_rate=60, render_every=None, threaded=False, interpolate=True,
+                 max_ticks_per_frame=5):
+        """
+        :param tick_rate: turns per second, None to simulate as fast as possible. 30 is real time, see
+            Engine.SECONDS_PER_FRAME
+        :param render_rate: frames per second, None to draw after every turn (continuously in threaded mode)
+        :param render_every: draw every this many turns instead of at render_rate
+        :param threaded: whether to draw from a separate thread, so turns are played while the previous frame is
+            drawn. Events are still handled by the thread that calls play(). Not supported by pygame on every platform.
+            Frames are drawn from copies of the players, see _run_threaded.
+        :param interpolate: whether to draw the trains between their positions of the last two turns when the
+            simulation is slower than the drawing
+        :param max_ticks_per_frame: maximum number of turns played to catch up with the wall clock before drawing
+        """
+        self.tick_rate = tick_rate
+        self.render_rate = render_rate
+        self.render_every = render_every
+        self.threaded = threaded
+        self.interpolate = interpolate
+        self.max_ticks_per_frame = max_ticks_per_frame
+
+        self.frames = 0  # Number of frames drawn
+        self._lock = threading.Lock()  # Held while playing a turn, copying the players or handling events
+        self._display_lock = threading.Lock()  # Held while drawing, handling events or closing the window
+        self._poses = None  # (previous poses, current poses, end time of the last turn, seconds per turn)
+        self._render_due = threading.Event()
+        self._stopped = threading.Event()
+
+    def run(self, engine, stop_on_death=True):
+        """
+        Play the game until it is finished, see Engine.play.
+
+        :param engine: game.Engine
+        :param stop_on_death: whether to stop when all players are dead
+        :return: engine
+        """
+        if self.threaded and not engine.headless:
+            return self._run_threaded(engine, stop_on_death)
+
+        previous = current = None
+        accumulator = 0
+        last_time = next_frame = time.perf_counter()
+        while engine.is_running():
+            engine._process_events()
+            if not engine.is_running():
+                break
+
+            tick_time = self._get_tick_time(engine)
+            now = time.perf_counter()
+            accumulator += now - last_time
+            last_time = now
+
+            tracking = tick_time is not None and self.interpolate and not engine.headless
+            ticks = 1 if tick_time is None else min(int(accumulator // tick_time), self.max_ticks_per_frame)
+            render_due = False
+            for _ in range(ticks):
+                if tracking:
+                    previous = current if current is not None else self._get_poses(engine)
+                self._tick(engine, stop_on_death)
+                if tracking:
+                    current = self._get_poses(engine)
+                if self.render_every is not None and engine.tick % self.render_every == 0:
+                    render_due = True
+                if not engine.is_running():
+                    break
+
+            if tick_time is not None:
+                accumulator = min(accumulator - ticks * tick_time, tick_time)
+
+            if self.render_every is None:
+                render_due = self.render_rate is None or now >= next_frame
+            if render_due and not engine.headless and engine.is_running():
+                if tracking:
+                    poses = self._interpolate(engine, previous, current, accumulator / tick_time)
+                else:
+                    poses = None
+                engine._render(poses)
+                self.frames += 1
+                if self.render_rate is not None:
+                    next_frame = self._get_next_frame(next_frame, now)
+
+            if tick_time is not None:
+                wake_up = last_time + tick_time - accumulator
+                if self.render_every is None and self.render_rate is not None:
+                    wake_up = min(wake_up, next_frame)
+                time.sleep(max(wake_up - time.perf_counter(), 0))
+        return engine
+
+    def _run_threaded(self, engine, stop_on_death):
+        """
+        Version of run that simulates in the calling thread and draws in a separate thread.
+
+        The calling thread plays every turn while holding self._lock. The drawing thread only holds it to copy the
+        players (id, color, score, position, rotation and sensor percepts, see PlayerSnapshot) and self._poses, and
+        then draws from the copies, so drawing never delays a turn and a frame never shows a half played turn. While
+        drawing it also reads the track, the game settings and the profiler, which are safe to read during a turn.
+        The window itself is only used while holding self._display_lock: by the drawing thread to draw, and by the
+        calling thread to handle events and to close it when the game ends.
+        """
+        self._stopped.clear()
+        renderer = threading.Thread(target=self._render_loop, args=(engine,), name='render', daemon=True)
+        renderer.start()
+
+        current = None
+        accumulator = 0
+        last_time = next_events = time.perf_counter()
+        try:
+            while engine.is_running():
+                now = time.perf_counter()
+                if now >= next_events and self._display_lock.acquire(blocking=False):
+                    try:
+                        with self._lock:
+                            engine._process_events()
+                    finally:
+                        self._display_lock.release()
+                    next_events = now + 1 / (self.render_rate or 60)
+                    if not engine.is_running():
+                        break
+
+                tick_time = self._get_tick_time(engine)
+                accumulator += now - last_time
+                last_time = now
+                if tick_time is not None and accumulator < tick_time:
+                    time.sleep(tick_time - accumulator)
+                    continue
+
+                tracking = tick_time is not None and self.interpolate
+                if tracking and current is None:
+                    current = self._get_poses(engine)
+                previous = current
+                with self._lock:
+                    engine._simulate()
+                    if tracking:
+                        current = self._get_poses(engine)
+                        self._poses = (previous, current, time.perf_counter(), tick_time)
+                    else:
+                        current = self._poses = None
+                if stop_on_death and engine._is_game_over():
+                    with self._display_lock:
+                        engine._end_game()
+                engine.tick += 1
+                if self.render_every is not None and engine.tick % self.render_every == 0:
+                    self._render_due.set()
+                if tick_time is not None:
+                    accumulator = min(accumulator - tick_time, tick_time)
+        finally:
+            self._stopped.set()
+            self._render_due.set()
+            renderer.join()
+        return engine
+
+    def _render_loop(self, engine):
+        """
+        Drawing thread: draws a frame at render_rate or when render_every turns were played, until the game ends.
+        """
+        next_frame = time.perf_counter()
+        while not self._stopped.is_set():
+            if self.render_every is not None:
+                self._render_due.wait()
+                self._render_due.clear()
+            elif self.render_rate is not None:
+                next_frame = self._get_next_frame(next_frame, time.perf_counter())
+                self._stopped.wait(max(next_frame - time.perf_counter(), 0))
+            if self._stopped.is_set():
+                break
+
+            with self._lock:
+                players = [PlayerSnapshot(player) for player in engine.players]
+                poses = None
+                if self._poses is not None:
+                    previous, current, tick_end, tick_time = self._poses
+                    alpha = min((time.perf_counter() - tick_end) / tick_time, 1)
+                    poses = self._interpolate(engine, previous, current, alpha)
+
+            with self._display_lock:
+                if not engine.is_running() or engine.headless:
+                    continue
+                engine._render(poses, players)
+                self.frames += 1
+
+    @staticmethod
+    def _tick(engine, stop_on_death):
+        """
+        Play a single turn, like an iteration of the loop in Engine.play without drawing.
+
+        :param engine: game.Engine
+        :param stop_on_death: whether to end the game when all players are dead
+        :return: Nothing
+        """
+        engine._simulate()
+        if stop_on_death and engine._is_game_over():
+            engine._end_game()
+        engine.tick += 1
+
+    def _get_next_frame(self, next_frame, now):
+        """
+        :param next_frame: time the last frame was due
+        :param now: current time
+        :return: time the next frame is due, frames that were missed are skipped
+        """
+        next_frame += 1 / self.render_rate
+        if next_frame < now:
+            next_frame = now + 1 / self.render_rate
+        return next_frame
+
+    def _get_tick_time(self, engine):
+        """
+        :return: seconds per turn, None to simulate as fast as possible
+        """
+        if self.tick_rate is None or not engine.game_settings['fps_limiter']:
+            return None
+        return 1 / self.tick_rate
+
+    @staticmethod
+    def _get_poses(engine):
+        """
+        :param engine: game.Engine
+        :return: numpy array with a row (x, y, rotation) per player in engine.players
+        """
+        if engine.vectorized:
+            states = engine.states
+            return np.stack([states.x, states.y, states.rotation], axis=1)
+        return np.array(
+            [(player.position[0], player.position[1], player.rotation) for player in engine.players], dtype=float
+        ).reshape(-1, 3)
+
+    @staticmethod
+    def _interpolate(engine, previous, current, alpha):
+        """
+        Poses between two turns, rotating the short way around.
+
+        :param engine: game.Engine
+        :param previous: poses after the second to last turn, see _get_poses
+        :param current: poses after the last turn
+        :param alpha: fraction of the way from previous to current, in range [0, 1]
+        :return: list with an (x, y, rotation) per player, None if players were added or removed in between
+        """
+        if previous is None or current is None or not len(previous) == len(current) == len(engine.players):
+            return None
+        alpha = min(max(alpha, 0), 1)
+        delta = current - previous
+        delta[:, 2] = (delta[:, 2] + 180) % 360 - 180
+        return (previous + alpha * delta).tolist()
+
+
+class PlayerSnapshot(object):
+    """
+    Copy of what is drawn of a player, see Engine._draw.
+    """
+    def __init__(self, player):
+        self.id = player.id
+        self.color = player.color
+        self.score = player.score
+        self.position = tuple(player.position)
+        self.rotation = player.rotation
+        self.sensors = [SensorSnapshot(sensor) for sensor in player.sensors]
+
+
+class SensorSnapshot(object):
+    """
+    Copy of what is drawn of a sensor, see Engine._draw_sensor.
+    """
+    def __init__(self, sensor):
+        self.is_drawable = sensor.is_drawable
+        self.percept = sensor.percept
+        self.depth = sensor.depth if self.is_drawable else None
+        self.absolute_angle = sensor.get_absolute_angle() if self.is_drawable else None
+
+    def get_absolute_angle(self):
+        return self.absolute_angle
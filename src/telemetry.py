@@ -0,0 +1,193 @@
+"""
+:author: Laurens Koppenol
+
+Stream the state of all players to a file while the game runs, for offline analysis of large runs. Every record is the
+state of one player after a turn: tick, id, x, y, speed, rotation, score, alive and the action it took
+(acceleration_command and rotation_command, after clamping).
+
+> game_engine = Engine(track, players, headless=True)
+> game_engine.telemetry('runs/run_1.jsonl', every=10)
+> game_engine.play()
+
+Supported formats are JSON lines (.jsonl), CSV (.csv) and Arrow IPC (.arrow, requires pyarrow). Turns are handed to a
+background thread through a bounded queue, so the game never waits for the disk. When the disk cannot keep up the queue
+fills and turns are dropped, see TelemetrySink.dropped, unless the sink is created with block=True.
+
+"""
+import csv
+import json
+import os
+import queue
+import threading
+
+import numpy as np
+from loguru import logger
+
+FIELDS = dict(
+    tick=np.int64,
+    id=np.int64,
+    x=np.float64,
+    y=np.float64,
+    speed=np.float64,
+    rotation=np.float64,
+    score=np.float64,
+    alive=np.bool_,
+    acceleration_command=np.float64,
+    rotation_command=np.float64
+)
+FORMATS = {'.jsonl': 'jsonl', '.csv': 'csv', '.arrow': 'arrow'}
+
+
+class TelemetrySink(object):
+    """
+    Tick listener that writes the state of all players every few turns to a file from a background thread, see
+    Engine.telemetry().
+    """
+    def __init__(self, path, file_format=None, every=1, max_queue=64, block=False):
+        """
+        :param path: file to write to, its folder is created if needed
+        :param file_format: 'jsonl', 'csv' or 'arrow', by default derived from the extension of path
+        :param every: write the players every this many turns
+        :param max_queue: maximum number of turns waiting to be written
+        :param block: whether the game waits when the queue is full, by default the turn is dropped
+        """
+        if file_format is None:
+            file_format = FORMATS.get(os.path.splitext(path)[1].lower())
+        if file_format not in WRITERS:
+            raise ValueError(f"Unknown telemetry format for {path}, choose from {', '.join(WRITERS)}")
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.every = every
+        self.block = block
+        self.written = 0  # Number of turns written
+        self.dropped = 0  # Number of turns dropped because the queue was full
+        self._writer = WRITERS[file_format](path)
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, name='telemetry', daemon=True)
+        self._thread.start()
+
+    def on_tick(self, engine):
+        """
+        Queue the state of all players, every self.every turns.
+
+        :param engine: game.Engine
+        :return: Nothing
+        """
+        if self._thread is None or engine.tick % self.every != 0:
+            return
+
+        columns = engine.get_state_arrays()
+        columns['tick'] = np.full(len(columns['id']), engine.tick, dtype=np.int64)
+        try:
+            self._queue.put(columns, block=self.block)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self):
+        """
+        Write the queued turns and close the file.
+
+        :return: Nothing
+        """
+        if self._thread is None:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+        if self.dropped > 0:
+            logger.warning(f"Telemetry dropped {self.dropped} turns, the disk could not keep up with {self.path}")
+
+    def _run(self):
+        """
+        Writer thread: writes queued turns until close() queues None. After an error the remaining turns are
+        discarded, so the game never blocks on a broken sink.
+        """
+        failed = False
+        while True:
+            columns = self._queue.get()
+            if columns is None:
+                break
+            if failed:
+                continue
+            try:
+                self._writer.write({name: np.asarray(columns[name], dtype=dtype) for name, dtype in FIELDS.items()})
+                self.written += 1
+            except Exception as error:
+                logger.error(f"Could not write telemetry to {self.path}: {error}")
+                failed = True
+        self._writer.close()
+
+
+class JsonLinesWriter(object):
+    """
+    Writes a JSON object per record.
+    """
+    def __init__(self, path):
+        self._file = open(path, 'w')
+
+    def write(self, columns):
+        """
+        :param columns: dict of numpy arrays per field, see FIELDS
+        :return: Nothing
+        """
+        values = [columns[name].tolist() for name in FIELDS]
+        self._file.writelines(json.dumps(dict(zip(FIELDS, row))) + '\n' for row in zip(*values))
+
+    def close(self):
+        self._file.close()
+
+
+class CsvWriter(object):
+    """
+    Writes a header and a row per record.
+    """
+    def __init__(self, path):
+        self._file = open(path, 'w', newline='')
+        self._csv = csv.writer(self._file)
+        self._csv.writerow(FIELDS)
+
+    def write(self, columns):
+        """
+        :param columns: dict of numpy arrays per field, see FIELDS
+        :return: Nothing
+        """
+        self._csv.writerows(zip(*[columns[name].tolist() for name in FIELDS]))
+
+    def close(self):
+        self._file.close()
+
+
+class ArrowWriter(object):
+    """
+    Writes a record batch per turn to an Arrow IPC file, which can be read with pyarrow, pandas or polars.
+    """
+    def __init__(self, path):
+        try:
+            import pyarrow
+        except ImportError:
+            raise ImportError("Writing telemetry to Arrow requires pyarrow, pip install pyarrow") from None
+
+        self._pyarrow = pyarrow
+        self._schema = pyarrow.schema([(name, pyarrow.from_numpy_dtype(dtype)) for name, dtype in FIELDS.items()])
+        self._file = pyarrow.OSFile(path, 'wb')
+        self._ipc = pyarrow.ipc.new_file(self._file, self._schema)
+
+    def write(self, columns):
+        """
+        :param columns: dict of numpy arrays per field, see FIELDS
+        :return: Nothing
+        """
+        batch = self._pyarrow.record_batch([columns[name] for name in FIELDS], schema=self._schema)
+        self._ipc.write_batch(batch)
+
+    def close(self):
+        self._ipc.close()
+        self._file.close()
+
+
+WRITERS = dict(jsonl=JsonLinesWriter, csv=CsvWriter, arrow=ArrowWriter)
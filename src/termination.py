@@ -0,0 +1,116 @@
+"""
+:author: Laurens Koppenol
+
+Termination policies end the race of players that will never finish, so headless runs do not hang on a single player
+that is driving in circles or standing still. Pass them to the engine:
+
+> game_engine = Engine(track, players, headless=True, termination_policies=[MaxTicks(3000), NoProgress(300)])
+
+After every turn the engine asks each policy which live players to stop. Stopped players die like players that crash;
+their death_reason attribute is set to the reason of the policy. Players that die in the race get the reason
+'collision' or 'finished'.
+
+"""
+from abc import abstractmethod, ABC
+
+
+class TerminationPolicy(ABC):
+    """
+    Base class of termination policies. Subclasses implement check(). Policies may keep state per player; use a new
+    policy object per engine.
+    """
+    reason = None
+
+    @abstractmethod
+    def check(self, engine, players):
+        """
+        :param engine: game.Engine object, engine.tick is the turn that was just played
+        :param players: list of the live players
+        :return: list of players to stop
+        """
+        pass
+
+    def reset(self):
+        """
+        Forget all per player state, called by Engine.reset()
+
+        :return: Nothing
+        """
+        pass
+
+
+class MaxTicks(TerminationPolicy):
+    """
+    Stop all players once the game has lasted a number of turns.
+    """
+    reason = 'max_ticks'
+
+    def __init__(self, max_ticks):
+        """
+        :param max_ticks: number of turns after which the game is over
+        """
+        self.max_ticks = max_ticks
+
+    def check(self, engine, players):
+        if engine.tick >= self.max_ticks - 1:
+            return players
+        return []
+
+
+class NoProgress(TerminationPolicy):
+    """
+    Stop players whose score (distance to the finish) has not improved for a number of turns.
+    """
+    reason = 'no_progress'
+
+    def __init__(self, ticks):
+        """
+        :param ticks: number of turns a player gets to improve its best score
+        """
+        self.ticks = ticks
+        self._best = {}  # {player: (best score, tick of best score)}
+
+    def check(self, engine, players):
+        stopped = []
+        for player in players:
+            score = player.score
+            best_score, best_tick = self._best.setdefault(player, (0, engine.tick))
+            if score > 0 and (best_score == 0 or score < best_score):
+                self._best[player] = (score, engine.tick)
+            elif engine.tick - best_tick >= self.ticks:
+                stopped.append(player)
+        return stopped
+
+    def reset(self):
+        self._best = {}
+
+
+class Stall(TerminationPolicy):
+    """
+    Stop players that have been driving slower than a minimum speed for a number of consecutive turns.
+    """
+    reason = 'stall'
+
+    def __init__(self, ticks, min_speed=0.05):
+        """
+        :param ticks: number of consecutive slow turns after which a player is stopped
+        :param min_speed: speed in pixels per turn below which a player counts as stalled
+        """
+        self.ticks = ticks
+        self.min_speed = min_speed
+        self._slow_ticks = {}  # {player: number of consecutive slow turns}
+
+    def check(self, engine, players):
+        stopped = []
+        for player in players:
+            if player.speed < self.min_speed:
+                slow_ticks = self._slow_ticks.get(player, 0) + 1
+                if slow_ticks >= self.ticks:
+                    stopped.append(player)
+                self._slow_ticks[player] = slow_ticks
+            else:
+                self._slow_ticks[player] = 0
+        return stopped
+
+    def reset(self):
+        self._slow_ticks = {}
@@ -0,0 +1,226 @@
+"""
+:author: Laurens Koppenol
+
+Evaluate many players on many tracks in parallel, for example to rank the teams of the workshop challenge or to score
+a generation of a genetic algorithm.
+
+Every player is raced alone, headless, on every track, in a pool of worker processes. The read-only arrays of the
+tracks are put in shared memory once, so workers do not load or unpickle them. Each evaluation starts from a fresh copy
+of the player, which makes the results independent of the number of workers and of the order of evaluation.
+
+> results = evaluate_population([NaiveAi(), MyAi()], ['assen', 'monaco'], max_ticks=2000, workers=4)
+> results[1]['monaco']
+{'score': 1.0, 'life_span': 812, 'finish_tick': 812, 'death_reason': 'finished'}
+
+"""
+import copy
+import multiprocessing
+import os
+import pickle
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from src import evaluation_cache
+from src.game import Engine, Environment
+from src.mask import PackedMask
+from src.termination import MaxTicks
+
+SEED = 42  # Seed of every race
+
+_environments = {}  # Environments of the worker process, by track name
+_shared_memory = []  # Keeps the shared memory of the worker process attached
+
+
+class Tournament(object):
+    """
+    Pool of worker processes with a set of tracks in shared memory. Keep a tournament open to evaluate many
+    populations on the same tracks without setting up the pool again, and close it when done:
+
+    > with Tournament(['assen'], max_ticks=2000) as tournament:
+    >     for generation in range(100):
+    >         results = tournament.evaluate(players)
+    """
+    def __init__(self, tracks, max_ticks, workers=None, compact=False, fingerprint=False, cache=None):
+        """
+        :param tracks: list of track names, see Environment
+        :param max_ticks: maximum number of turns per evaluation
+        :param workers: number of worker processes, defaults to the number of cpus. 0 evaluates in this process.
+        :param compact: whether to share the tracks in compact form, see Environment.compact()
+        :param fingerprint: whether to add the fingerprint of every race to the results, see fingerprint
+        :param cache: optional evaluation_cache.EvaluationCache, players that were raced before are not raced again
+        """
+        self.tracks = list(tracks)
+        self.max_ticks = max_ticks
+        self.fingerprint = fingerprint
+        self.cache = cache
+        self.workers = os.cpu_count() if workers is None else workers
+
+        self.environments = {track: Environment(track, compact=compact) for track in self.tracks}
+        self._shared_memory = []
+        self._pool = None
+
+        if self.workers > 0:
+            shared_tracks = {
+                track: self._share_arrays(environment) for track, environment in self.environments.items()
+            }
+            self._pool = multiprocessing.Pool(
+                self.workers,
+                initializer=_init_worker,
+                initargs=(shared_tracks,)
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def evaluate(self, players):
+        """
+        Race every player on every track.
+
+        :param players: list of player.Player objects, must be picklable. The objects themselves are not changed.
+        :return: list with per player a dict {track: dict(score, life_span, finish_tick, death_reason)}. finish_tick
+            is None if the player did not finish. With fingerprint=True the dicts also contain the fingerprint.
+        """
+        evaluations = [(i, track) for i in range(len(players)) for track in self.tracks]
+        results = [{} for _ in players]
+
+        keys = {}
+        if self.cache is not None:
+            uncached = []
+            for i, track in evaluations:
+                key = evaluation_cache.get_key(
+                    self.environments[track], players[i], self.max_ticks, SEED, self.fingerprint
+                )
+                outcome = None if key is None else self.cache.get(key)
+                if outcome is None:
+                    uncached.append((i, track))
+                    keys[i, track] = key
+                else:
+                    results[i][track] = outcome
+            evaluations = uncached
+
+        if self._pool is None:
+            outcomes = [
+                _evaluate(copy.deepcopy(players[i]), self.environments[track], self.max_ticks, self.fingerprint)
+                for i, track in evaluations
+            ]
+        else:
+            # Pickle every player by itself, so each job unpickles a fresh copy even if jobs share a chunk
+            pickled_players = [pickle.dumps(player) for player in players]
+            jobs = [(pickled_players[i], track, self.max_ticks, self.fingerprint) for i, track in evaluations]
+            outcomes = self._pool.map(_evaluate_job, jobs)
+
+        for (i, track), outcome in zip(evaluations, outcomes):
+            results[i][track] = outcome
+            if keys.get((i, track)) is not None:
+                self.cache.put(keys[i, track], outcome)
+        return results
+
+    def close(self):
+        """
+        Stop the worker processes and free the shared memory.
+
+        :return: Nothing
+        """
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+        for block in self._shared_memory:
+            block.close()
+            block.unlink()
+        self._shared_memory = []
+
+    def _share_arrays(self, environment):
+        """
+        Copy the arrays of an environment into new blocks of shared memory.
+
+        :param environment: Environment object
+        :return: dict {name: (shared memory name, shape, dtype, packed shape)}, packed shape is the shape of the
+            unpacked mask for a mask.PackedMask and None for arrays
+        """
+        shared_arrays = {}
+        for name in Environment.CACHED_ARRAYS:
+            array = getattr(environment, name)
+            packed_shape = None
+            if isinstance(array, PackedMask):
+                array, packed_shape = array.bits, array.shape
+            array = np.ascontiguousarray(array)
+            block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+            np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+            self._shared_memory.append(block)
+            shared_arrays[name] = (block.name, array.shape, array.dtype.str, packed_shape)
+        return shared_arrays
+
+
+def evaluate_population(players, tracks, max_ticks, workers=None, compact=False, fingerprint=False, cache=None):
+    """
+    Race every player on every track in a pool of worker processes, see Tournament.
+
+    :param players: list of player.Player objects, must be picklable
+    :param tracks: list of track names
+    :param max_ticks: maximum number of turns per evaluation
+    :param workers: number of worker processes, defaults to the number of cpus. 0 evaluates in this process.
+    :param compact: whether to share the tracks in compact form, see Environment.compact()
+    :param fingerprint: whether to add the fingerprint of every race to the results, see fingerprint
+    :param cache: optional evaluation_cache.EvaluationCache
+    :return: list with per player a dict {track: dict(score, life_span, finish_tick, death_reason)}
+    """
+    with Tournament(tracks, max_ticks, workers, compact, fingerprint, cache) as tournament:
+        return tournament.evaluate(players)
+
+
+def _init_worker(shared_tracks):
+    """
+    Attach to the shared memory of the tracks and create an Environment per track.
+
+    :param shared_tracks: dict {track: output of Tournament._share_arrays}
+    :return: Nothing
+    """
+    for track, shared_arrays in shared_tracks.items():
+        arrays = {}
+        for name, (block_name, shape, dtype, packed_shape) in shared_arrays.items():
+            block = shared_memory.SharedMemory(name=block_name)
+            _shared_memory.append(block)
+            arrays[name] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+            arrays[name].flags.writeable = False
+            if packed_shape is not None:
+                arrays[name] = PackedMask(arrays[name], packed_shape)
+        _environments[track] = Environment(track, cache=False, arrays=arrays)
+
+
+def _evaluate_job(job):
+    """
+    :param job: (pickled player, track, max_ticks, fingerprint)
+    :return: see _evaluate
+    """
+    pickled_player, track, max_ticks, fingerprint = job
+    return _evaluate(pickle.loads(pickled_player), _environments[track], max_ticks, fingerprint)
+
+
+def _evaluate(player, environment, max_ticks, fingerprint=False):
+    """
+    Race a single player headless until it dies or is stopped after max_ticks turns.
+
+    :param player: player.Player object, is changed by the race
+    :param environment: Environment object
+    :param max_ticks: maximum number of turns
+    :param fingerprint: whether to add the fingerprint of the race to the outcome
+    :return: dict(score, life_span, finish_tick, death_reason) and optionally fingerprint
+    """
+    engine = Engine(environment, [player], headless=True, termination_policies=[MaxTicks(max_ticks)], seed=SEED)
+    run_fingerprint = engine.fingerprint() if fingerprint else None
+    engine.play()
+
+    outcome = dict(
+        score=float(player.score),
+        life_span=player.ending_tick - player.starting_tick,
+        finish_tick=player.ending_tick if player.score == 1 else None,
+        death_reason=player.death_reason
+    )
+    if run_fingerprint is not None:
+        outcome['fingerprint'] = run_fingerprint.hexdigest()
+    return outcome
@@ -0,0 +1,168 @@
+"""
+:author: Laurens Koppenol
+
+Compiled tracks. Compiling validates a track and stores everything the game derives from the track png in a single
+file, tracks/foldername/track.bundle.npz: the walls, start, finish, the distance matrix, the wall distance table and
+the scaled drawables. When the bundle exists and matches the png, Environment loads it instead of decoding images.
+
+> python -m src.cli compile-track tracks/assen
+
+The bundle stores the sha1 hash of the png it was compiled from. When the png changes the bundle is ignored with a
+warning until the track is compiled again. A bundle without a png next to it is always used.
+
+"""
+import os
+
+import numpy as np
+from loguru import logger
+from PIL import Image
+
+from src import track_cache
+
+BUNDLE_VERSION = 1  # Increase when the content of the bundle changes
+BUNDLE_FILE = 'track.bundle.npz'
+
+
+def get_bundle_path(track):
+    """
+    :param track: name of a folder in tracks/
+    :return: path to the bundle of the track
+    """
+    return os.path.join('tracks', track, BUNDLE_FILE)
+
+
+def validate(track, neighbourhood='diagonal'):
+    """
+    Check that a track can be raced: there is a finish, a single start and the finish can be reached from the start.
+
+    :param track: name of a folder in tracks/
+    :param neighbourhood: key of Environment.NEIGHBOURHOODS the finish must be reachable with
+    :return: list of problems, empty if the track is valid
+    """
+    return _validate(track, neighbourhood)[0]
+
+
+def _validate(track, neighbourhood):
+    """
+    See validate.
+
+    :return: (problems, environment), the parsed and flooded game.Environment or None if it was not loaded
+    """
+    from src.game import Environment
+
+    track_path = f'tracks/{track}/track.png'
+    problems = []
+    if not os.path.exists(track_path):
+        return [f"{track_path} does not exist"], None
+
+    rgb_data = np.transpose(np.asarray(Image.open(track_path).convert('RGB')), (1, 0, 2))
+    if not (rgb_data[:, :, 2] > 0).any():
+        problems.append("no finish, draw the finish in blue")
+
+    starts = _count_groups(rgb_data[:, :, 1] >= 128)
+    if starts == 0:
+        problems.append("no start, draw a single green pixel")
+    elif starts > 1:
+        problems.append(f"{starts} separate starts, draw a single green pixel")
+
+    environment = None
+    if not problems:
+        environment = Environment(track, neighbourhood=neighbourhood, cache=False, bundle=False)
+        start = tuple(int(value) for value in environment.start)
+        if rgb_data[start][1] < 128:
+            logger.warning(f"Start is taken from pixel {start} with a green value of {rgb_data[start][1]}, "
+                           f"the first pixel with any green")
+        if environment.boundaries[start]:
+            problems.append(f"start {start} is on a wall")
+        elif environment.distance_matrix[start] == 0:
+            problems.append(f"finish cannot be reached from start {start}")
+    return problems, environment
+
+
+def compile_track(track, neighbourhood='diagonal', wall_distance_bins=360, wall_distance_depth=100,
+                  drawables=True):
+    """
+    Validate a track with the neighbourhood it is compiled for and write its bundle.
+
+    :param track: name of a folder in tracks/
+    :param neighbourhood: key of Environment.NEIGHBOURHOODS used to build the distance matrix
+    :param wall_distance_bins: number of heading bins of the wall distance table, see
+        Environment.enable_wall_distance_table
+    :param wall_distance_depth: depth of the wall distance table, None to leave the table out
+    :param drawables: whether to include the scaled drawables, needed to draw the game without decoding images
+    :return: path to the bundle
+    """
+    from src.game import Environment
+
+    problems, environment = _validate(track, neighbourhood)
+    if problems:
+        raise ValueError(f"Track {track} is not valid: {'; '.join(problems)}")
+
+    bundle = {name: getattr(environment, name) for name in Environment.CACHED_ARRAYS}
+    bundle['version'] = np.array(BUNDLE_VERSION)
+    bundle['png_hash'] = np.array(track_cache.get_png_hash(environment.track_path))
+    bundle['neighbourhood'] = np.array(neighbourhood)
+
+    if wall_distance_depth is not None:
+        logger.info(f"Building wall distance table of {track} with {wall_distance_bins} bins")
+        bundle['wall_distance_table'] = environment._get_wall_distance_table(wall_distance_bins, wall_distance_depth)
+        bundle['wall_distance_depth'] = np.array(wall_distance_depth)
+
+    if drawables:
+        import pygame
+        for name, surface in environment.drawables.items():
+            bundle[f'drawable_{name}'] = pygame.surfarray.array3d(surface)
+
+    bundle_path = get_bundle_path(track)
+    tmp_path = f'{bundle_path}.tmp.npz'
+    np.savez_compressed(tmp_path, **bundle)
+    os.replace(tmp_path, bundle_path)
+    logger.info(f"Compiled {track} to {bundle_path} ({os.path.getsize(bundle_path) / 1e6:.1f} MB)")
+    return bundle_path
+
+
+def load(track, neighbourhood):
+    """
+    Load the bundle of a track if it exists and matches the track png and the neighbourhood.
+
+    :param track: name of a folder in tracks/
+    :param neighbourhood: key of Environment.NEIGHBOURHOODS
+    :return: numpy NpzFile, which reads an array from the bundle every time it is indexed by name, or None
+    """
+    bundle_path = get_bundle_path(track)
+    if not os.path.exists(bundle_path):
+        return None
+
+    bundle = np.load(bundle_path)
+    track_path = f'tracks/{track}/track.png'
+    if int(bundle['version']) != BUNDLE_VERSION:
+        logger.warning(f"Ignoring {bundle_path}, it was compiled by another version. Compile the track again.")
+    elif str(bundle['neighbourhood']) != neighbourhood:
+        pass
+    elif os.path.exists(track_path) and track_cache.get_png_hash(track_path) != str(bundle['png_hash']):
+        logger.warning(f"Ignoring {bundle_path}, the track png changed. Compile the track again.")
+    else:
+        return bundle
+    bundle.close()
+    return None
+
+
+def _count_groups(mask):
+    """
+    Count the groups of touching pixels (including diagonally) in a mask. Meant for masks with few pixels.
+
+    :param mask: 2d boolean numpy array
+    :return: number of groups
+    """
+    remaining = set(map(tuple, np.transpose(np.nonzero(mask)).tolist()))
+    groups = 0
+    while remaining:
+        groups += 1
+        stack = [remaining.pop()]
+        while stack:
+            x, y = stack.pop()
+            for neighbour in [(x + dx, y + dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)]:
+                if neighbour in remaining:
+                    remaining.remove(neighbour)
+                    stack.append(neighbour)
+    return groups
@@ -0,0 +1,122 @@
+"""
+:author: Laurens Koppenol
+
+On-disk cache for the parsed arrays of a track, so that a track is only parsed and flooded once per version of its
+png. Entries are stored in tracks/foldername/.cache/ as a folder of .npy files per key, which can be memory-mapped by
+every process that loads the track.
+
+The key is a hash of the content of the track png, combined with the parameters the arrays depend on. When the png
+changes the key changes, so stale entries are never loaded. They are removed when a new entry is stored.
+
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+
+import numpy as np
+from loguru import logger
+
+CACHE_VERSION = 1  # Increase when the parsing or flooding of tracks changes
+CACHE_FOLDER = '.cache'
+MEMORY_MAPPED = {'boundaries', 'distance_matrix'}  # Small arrays are read into memory
+
+
+def get_cache_dir(track_path):
+    """
+    :param track_path: path to the track png
+    :return: path to the cache folder of the track
+    """
+    return os.path.join(os.path.dirname(track_path), CACHE_FOLDER)
+
+
+def get_key(track_path, *parameters):
+    """
+    Hash the content of the track png into a cache key.
+
+    :param track_path: path to the track png
+    :param parameters: other values that the cached arrays depend on, must have a stable str()
+    :return: string key, the hash of the png followed by the hash of the parameters
+    """
+    png_hash = get_png_hash(track_path)
+    parameter_hash = hashlib.sha1(repr((CACHE_VERSION,) + parameters).encode()).hexdigest()
+    return f'{png_hash[:16]}-{parameter_hash[:8]}'
+
+
+def get_png_hash(track_path):
+    """
+    :param track_path: path to the track png
+    :return: sha1 hex digest of the content of the png
+    """
+    with open(track_path, 'rb') as track_file:
+        return hashlib.sha1(track_file.read()).hexdigest()
+
+
+def load(cache_dir, key, names):
+    """
+    Load the arrays of a cache entry. Large arrays are memory-mapped read-only.
+
+    :param cache_dir: path to the cache folder
+    :param key: cache key, see get_key
+    :param names: names of the arrays to load
+    :return: dict {name: numpy ndarray} or None if the entry does not exist
+    """
+    entry_dir = os.path.join(cache_dir, key)
+    try:
+        arrays = {
+            name: np.load(
+                os.path.join(entry_dir, f'{name}.npy'),
+                mmap_mode='r' if name in MEMORY_MAPPED else None
+            )
+            for name in names
+        }
+    except (OSError, ValueError):
+        return None
+    return arrays
+
+
+def store(cache_dir, key, arrays):
+    """
+    Store arrays as a cache entry. The entry is written to a temporary folder first and then renamed, so concurrent
+    processes never read a half written entry. Entries of older versions of the png are removed.
+
+    :param cache_dir: path to the cache folder
+    :param key: cache key, see get_key
+    :param arrays: dict {name: numpy ndarray}
+    :return: True if the entry was stored
+    """
+    tmp_dir = None
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(dir=cache_dir, prefix='.tmp-')
+        for name, array in arrays.items():
+            np.save(os.path.join(tmp_dir, f'{name}.npy'), array)
+        # mkdtemp creates the folder for the current user only, entries get the permissions of the cache folder
+        os.chmod(tmp_dir, os.stat(cache_dir).st_mode & 0o777)
+    except OSError as error:
+        logger.warning(f"Could not write track cache in {cache_dir}: {error}")
+        if tmp_dir is not None:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        return False
+
+    try:
+        os.rename(tmp_dir, os.path.join(cache_dir, key))
+    except OSError:
+        # Another process stored the same entry first
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    png_hash = key.split('-')[0]
+    for entry in os.listdir(cache_dir):
+        if not entry.startswith(png_hash) and not entry.startswith('.tmp-'):
+            shutil.rmtree(os.path.join(cache_dir, entry), ignore_errors=True)
+    return True
+
+
+def clear(cache_dir):
+    """
+    Remove all cache entries of a track.
+
+    :param cache_dir: path to the cache folder
+    :return: Nothing
+    """
+    shutil.rmtree(cache_dir, ignore_errors=True)
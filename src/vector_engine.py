@@ -0,0 +1,89 @@
+"""
+:author: Laurens Koppenol
+
+Step many independent games in lockstep, for reinforcement learning libraries that expect a vectorized environment.
+Every game is a normal Engine with its own track and players, driven with Engine.reset() and Engine.step().
+
+"""
+
+
+class VectorEngine(object):
+    """
+    Wraps a list of engines and steps all of them with a single call. Engines should be created headless.
+
+    > vector_engine = VectorEngine([Engine(Environment('assen'), [NaiveAi()], headless=True) for _ in range(8)])
+    > observations = vector_engine.reset()
+    > observations, rewards, dones, infos = vector_engine.step(actions)
+    """
+    def __init__(self, engines, auto_reset=True):
+        """
+        :param engines: list of game.Engine objects
+        :param auto_reset: whether to reset an engine as soon as all of its players are done
+        """
+        self.engines = list(engines)
+        self.auto_reset = auto_reset
+        self._final_observations = [{} for _ in self.engines]  # {player index: last percepts} per engine
+
+    def __len__(self):
+        return len(self.engines)
+
+    def reset(self):
+        """
+        Reset every engine.
+
+        :return: list with the observations of every engine, see Engine.reset()
+        """
+        observations = [engine.reset() for engine in self.engines]
+        self._final_observations = [{} for _ in self.engines]
+        return observations
+
+    def step(self, actions=None):
+        """
+        Perform a single turn in every engine.
+
+        If auto_reset is on, an engine of which all players are done is reset right away. The observations returned
+        for it are then those of the new game, the last observations of the finished game are in the info of every
+        player under 'final_observation'.
+
+        :param actions: list with the actions of every engine, see Engine.step(). None lets all players plan.
+        :return: observations, rewards, dones, infos. Lists with the output of Engine.step() per engine.
+        """
+        if actions is None:
+            actions = [None] * len(self.engines)
+
+        observations = []
+        rewards = []
+        dones = []
+        infos = []
+        for engine, engine_actions, final_observations in zip(self.engines, actions, self._final_observations):
+            engine_observations, engine_rewards, engine_dones, engine_infos = engine.step(engine_actions)
+            for i, info in enumerate(engine_infos):
+                if 'final_observation' in info:
+                    final_observations[i] = info['final_observation']
+
+            if self.auto_reset and all(engine_dones):
+                for i, info in enumerate(engine_infos):
+                    info['final_observation'] = final_observations.get(i)
+                final_observations.clear()
+                engine_observations = engine.reset()
+
+            observations.append(engine_observations)
+            rewards.append(engine_rewards)
+            dones.append(engine_dones)
+            infos.append(engine_infos)
+        return observations, rewards, dones, infos
+
+    def close(self):
+        """
+        Close every engine, see Engine.close().
+
+        :return: Nothing
+        """
+        for engine in self.engines:
+            engine.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,37 @@
+"""
+:author: Laurens Koppenol
+
+Shared fixtures. Tracks are loaded from tracks/ relative to the working directory. Every test runs in a temporary copy
+of the track images, so track caches and bundles are never written to the source tree, and without a window.
+"""
+import os
+import shutil
+
+import pytest
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TRACKS = sorted(os.listdir(os.path.join(ROOT, 'tracks')))
+TRACK_FILES = ('track.png', 'track_bg.png')
+
+
+@pytest.fixture(scope='session')
+def tracks_copy(tmp_path_factory):
+    """
+    :return: path of a folder with a copy of the png files of all tracks in tracks/ and a link to visuals/
+    """
+    path = tmp_path_factory.mktemp('root')
+    os.symlink(os.path.join(ROOT, 'visuals'), path / 'visuals')
+    for track in TRACKS:
+        os.makedirs(path / 'tracks' / track)
+        for file_name in TRACK_FILES:
+            source = os.path.join(ROOT, 'tracks', track, file_name)
+            if os.path.exists(source):
+                shutil.copy(source, path / 'tracks' / track / file_name)
+    return path
+
+
+@pytest.fixture(autouse=True)
+def working_directory(tracks_copy, monkeypatch):
+    monkeypatch.chdir(tracks_copy)
@@ -0,0 +1,77 @@
+"""
+:author: Laurens Koppenol
+
+The iterative flood fill of Environment.get_distance_matrix must give exactly the distance matrix of the recursive
+version it replaced.
+"""
+import sys
+
+import numpy as np
+import pytest
+
+from src.game import Environment
+from tests.conftest import TRACKS
+
+
+def recursive_distance(boundaries, distance_matrix, points, distance):
+    """
+    The original Environment._recursive_distance, with the diagonal neighbourhood.
+    """
+    for point in points:
+        distance_matrix[point] = distance
+
+    valid_next_points = set()
+    for point in points:
+        for dx in [-1, 1]:
+            for dy in [-1, 1]:
+                one_further = (
+                    point[0] + dx,
+                    point[1] + dy
+                )
+                try:
+                    if (not boundaries[one_further]) and distance_matrix[one_further] == 0:
+                        valid_next_points.add(one_further)
+                except IndexError:
+                    pass
+
+    if len(valid_next_points) > 0:
+        distance_matrix = recursive_distance(boundaries, distance_matrix, valid_next_points, distance + 1)
+    return distance_matrix
+
+
+def get_recursive_distance_matrix(environment):
+    finish_points = [(i[0], i[1]) for i in environment.finish]
+    return recursive_distance(environment.boundaries, np.zeros(environment.boundaries.shape), finish_points, 1)
+
+
+@pytest.fixture
+def recursion_limit():
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(10000)
+    yield
+    sys.setrecursionlimit(limit)
+
+
+@pytest.mark.parametrize('track', TRACKS)
+def test_flood_fill_matches_recursive_version(track, recursion_limit):
+    environment = Environment(track, cache=False, bundle=False)
+    expected = get_recursive_distance_matrix(environment)
+
+    actual = environment.get_distance_matrix('diagonal')
+    assert actual.dtype == expected.dtype
+    assert np.array_equal(actual, expected)
+
+
+def test_flood_fill_matches_recursive_version_on_random_walls(recursion_limit):
+    rng = np.random.default_rng(0)
+    environment = Environment('assen', cache=False, bundle=False)
+    for _ in range(5):
+        # Walls on the border, so the recursive version never wraps around to the other side through index -1
+        boundaries = rng.random((60, 40)) < 0.3
+        boundaries[[0, -1], :] = True
+        boundaries[:, [0, -1]] = True
+        finish = np.transpose(np.nonzero(~boundaries))[rng.integers(0, (~boundaries).sum(), 3)]
+        environment.boundaries = boundaries
+        environment.finish = finish
+
+        assert np.array_equal(environment.get_distance_matrix('diagonal'), get_recursive_distance_matrix(environment))
@@ -0,0 +1,95 @@
+"""
+:author: Laurens Koppenol
+
+Environment.paint only floods the distance matrix again where it can have changed. After every edit the distance
+matrix must be exactly the one that get_distance_matrix() computes for the whole edited track.
+"""
+import numpy as np
+import pygame
+import pytest
+
+from src.game import Environment
+
+
+def paint_randomly(environment, rng, brushes):
+    """
+    Paint a random disc with a random brush, near the track so most edits change its distance matrix.
+
+    :return: (rect, brush) as returned by paint
+    """
+    xs, ys = np.nonzero(environment.distance_matrix > 0)
+    pick = rng.integers(0, len(xs))
+    position = (xs[pick] + rng.integers(-3, 4), ys[pick] + rng.integers(-3, 4))
+    brush = brushes[rng.integers(0, len(brushes))]
+    return environment.paint(position, int(rng.integers(0, 4)), brush), brush
+
+
+@pytest.mark.parametrize('neighbourhood', list(Environment.NEIGHBOURHOODS))
+def test_paint_matches_full_distance_matrix(neighbourhood):
+    environment = Environment('assen', neighbourhood=neighbourhood)
+    rng = np.random.default_rng(0)
+    for _ in range(60):
+        before = environment.distance_matrix.copy()
+        rect, brush = paint_randomly(environment, rng, ['wall', 'wall', 'track', 'finish'])
+
+        expected = environment.get_distance_matrix()
+        assert np.array_equal(environment.distance_matrix, expected), brush
+
+        changed = np.transpose(np.nonzero(before != expected))
+        if rect is None:
+            assert len(changed) == 0
+        elif len(changed) > 0:
+            assert rect.contains(pygame.Rect(
+                changed[:, 0].min(), changed[:, 1].min(),
+                np.ptp(changed[:, 0]) + 1, np.ptp(changed[:, 1]) + 1
+            ))
+
+
+def test_paint_compact_track():
+    environment = Environment('assen', compact=True)
+    rng = np.random.default_rng(1)
+    for _ in range(20):
+        paint_randomly(environment, rng, ['wall', 'track'])
+        assert np.array_equal(environment.distance_matrix, environment.get_distance_matrix())
+
+
+def test_paint_changes_track_hash():
+    environment = Environment('assen')
+    track_hash = environment.get_track_hash()
+    assert environment.paint((0, 0), 0, 'wall') is None  # Already a wall
+    assert environment.get_track_hash() == track_hash
+    environment.paint(tuple(environment.start), 1, 'wall')
+    assert environment.get_track_hash() != track_hash
+
+
+def test_unknown_brush():
+    with pytest.raises(ValueError):
+        Environment('assen').paint((10, 10), 1, 'water')
+
+
+def test_saved_track_loads_the_same(tmp_path, monkeypatch):
+    environment = Environment('assen')
+    rng = np.random.default_rng(2)
+    for _ in range(20):
+        paint_randomly(environment, rng, ['wall', 'track', 'finish'])
+    environment.move_start(tuple(environment.start + 1))
+    environment.save_track(str(tmp_path / 'tracks' / 'edited' / 'track.png'))
+
+    monkeypatch.chdir(tmp_path)
+    loaded = Environment('edited', cache=False, bundle=False)
+    assert np.array_equal(loaded.boundaries, environment.boundaries)
+    assert set(map(tuple, loaded.finish.tolist())) == set(map(tuple, environment.finish.tolist()))
+    assert tuple(loaded.start) == tuple(environment.start)
+    assert np.array_equal(loaded.distance_matrix, environment.distance_matrix)
+
+
+def test_wall_distance_table_of_edited_track():
+    environment = Environment('assen')
+    environment.enable_wall_distance_table(bins=36, depth=30)  # Stores the table of the original track in the cache
+    environment.paint(tuple(environment.start + (0, 5)), 1, 'wall')
+    assert environment.wall_distance_table is None
+
+    environment.enable_wall_distance_table(bins=36, depth=30)
+    assert np.array_equal(environment.wall_distance_table, environment._get_wall_distance_table(36, 30))
+    assert environment.ray_trace_to_wall(tuple(environment.start), 180, 30) == \
+        environment._ray_trace_batch_exact(np.array([environment.start]), np.array([180.]), np.array([30.]))[0]
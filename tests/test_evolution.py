@@ -0,0 +1,50 @@
+"""
+:author: Laurens Koppenol
+
+Neural players must sense and plan the same in scalar and vectorized mode, also when they are subclassed.
+"""
+import numpy as np
+
+from src.evolution import NeuralPlayer, Population
+from src.game import Engine, Environment
+from src.termination import MaxTicks
+
+
+class BlindSpotPlayer(NeuralPlayer):
+    """
+    Does not see walls further than 10 pixels.
+    """
+    def sense(self, track, keys):
+        return [min(percept, 10) for percept in super().sense(track, keys)]
+
+
+def race(player_class, vectorized):
+    population = Population.random(8, np.random.default_rng(0))
+    players = [player_class(population, i) for i in range(len(population))]
+    engine = Engine(Environment('assen'), players, headless=True, vectorized=vectorized,
+                    termination_policies=[MaxTicks(200)])
+    fingerprint = engine.fingerprint()
+    engine.play()
+    return fingerprint.hexdigest()
+
+
+def test_vectorized_matches_scalar():
+    assert race(NeuralPlayer, vectorized=True) == race(NeuralPlayer, vectorized=False)
+
+
+def test_subclass_that_overrides_sense():
+    assert race(BlindSpotPlayer, vectorized=True) == race(BlindSpotPlayer, vectorized=False)
+    assert race(BlindSpotPlayer, vectorized=True) != race(NeuralPlayer, vectorized=True)
+
+
+def test_sense_batch_with_other_sensor_count():
+    population = Population.random(3, np.random.default_rng(0))
+    players = [NeuralPlayer(population, i) for i in range(3)]
+    players[1].sensors = players[1].sensors[:2]
+    track = Environment('assen')
+    for player in players:
+        player.set_position(tuple(track.start))
+
+    percepts = NeuralPlayer.sense_batch(players, track, None)
+    assert [len(player_percepts) for player_percepts in percepts] == [5, 2, 5]
+    assert percepts == [player.sense(track, None) for player in players]
@@ -0,0 +1,59 @@
+"""
+:author: Laurens Koppenol
+
+PackedMask must behave like the numpy boolean mask it packs.
+"""
+import numpy as np
+import pytest
+
+from src.game import Environment
+from src.mask import PackedMask
+
+
+@pytest.mark.parametrize('shape', [(1, 1), (7, 13), (16, 16), (31, 9)])
+def test_packed_mask_matches_numpy(shape):
+    rng = np.random.default_rng(0)
+    mask = rng.random(shape) < 0.5
+    packed = PackedMask.pack(mask)
+
+    assert packed.shape == mask.shape
+    assert np.array_equal(packed.unpack(), mask)
+    assert np.array_equal(np.asarray(packed), mask)
+    assert np.array_equal(np.asarray(packed, dtype=np.uint8), mask.astype(np.uint8))
+
+    for x in range(-shape[0], shape[0]):
+        for y in range(-shape[1], shape[1]):
+            assert packed[x, y] == mask[x, y]
+
+    xs = rng.integers(-shape[0], shape[0], (5, 100))
+    ys = rng.integers(-shape[1], shape[1], (5, 100))
+    assert np.array_equal(packed[xs, ys], mask[xs, ys])
+
+
+@pytest.mark.parametrize('index', [(0, 13), (0, 15), (0, -14), (7, 0), (-8, 0)])
+def test_out_of_bounds(index):
+    mask = np.zeros((7, 13), dtype=bool)
+    with pytest.raises(IndexError):
+        mask[index]
+    with pytest.raises(IndexError):
+        PackedMask.pack(mask)[index]
+
+
+def test_out_of_bounds_array():
+    packed = PackedMask.pack(np.zeros((7, 13), dtype=bool))
+    with pytest.raises(IndexError):
+        packed[np.array([0, 1]), np.array([3, 14])]
+
+
+def test_compact_environment_plays_the_same():
+    environment = Environment('assen')
+    compact = Environment('assen', compact=True)
+    assert isinstance(compact.boundaries, PackedMask)
+    assert np.array_equal(np.asarray(compact.boundaries), environment.boundaries)
+
+    rng = np.random.default_rng(0)
+    positions = rng.uniform(0, 1, (500, 2)) * (environment.width - 1, environment.height - 1)
+    angles = rng.uniform(0, 360, 500)
+    assert np.array_equal(
+        compact.ray_trace_batch(positions, angles, 100), environment.ray_trace_batch(positions, angles, 100)
+    )
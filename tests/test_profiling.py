@@ -0,0 +1,38 @@
+"""
+:author: Laurens Koppenol
+
+Profiler summaries and traces of a game.
+"""
+import json
+
+import pytest
+
+from src.game import Engine, Environment
+from src.player import NaiveAi
+from src.profiling import Profiler
+from src.termination import MaxTicks
+
+
+@pytest.mark.parametrize('vectorized', [False, True])
+def test_profiled_game(vectorized, tmp_path):
+    profiler = Profiler(trace=True)
+    players = [NaiveAi() for _ in range(3)]
+    engine = Engine(Environment('assen'), players, headless=True, vectorized=vectorized, profiler=profiler,
+                    termination_policies=[MaxTicks(50)])
+    engine.play()
+
+    summary = profiler.summary()
+    assert {'sense', 'plan', 'act', 'resolve', 'end_turn'} <= set(summary)
+    assert summary['end_turn']['count'] == engine.tick
+    # NaiveAi plans one player at a time, so plan is measured per player in both modes
+    assert set(profiler.player_summary()) == {player.id for player in players}
+
+    profiler.to_chrome_trace(str(tmp_path / 'trace.json'))
+    with open(tmp_path / 'trace.json') as trace_file:
+        assert len(json.load(trace_file)['traceEvents']) == len(profiler.events) > 0
+
+
+def test_chrome_trace_requires_trace(tmp_path):
+    with pytest.raises(ValueError):
+        Profiler().to_chrome_trace(str(tmp_path / 'trace.json'))
+    assert not (tmp_path / 'trace.json').exists()
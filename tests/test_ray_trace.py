@@ -0,0 +1,66 @@
+"""
+:author: Laurens Koppenol
+
+Environment.ray_trace_batch must give the same distances as calling ray_trace_to_wall for every ray.
+"""
+import numpy as np
+import pytest
+
+from src.game import Environment
+from tests.conftest import TRACKS
+
+
+def get_rays(environment, count, seed=0):
+    """
+    :return: (positions, angles) of random rays that start on the track
+    """
+    rng = np.random.default_rng(seed)
+    xs, ys = np.nonzero(environment.distance_matrix)
+    picks = rng.integers(0, len(xs), count)
+    positions = np.stack([xs[picks], ys[picks]], axis=1) + rng.uniform(-0.49, 0.49, (count, 2))
+    angles = rng.uniform(0, 360, count)
+    return positions, angles
+
+
+def ray_trace_each(environment, positions, angles, depths):
+    distances = [
+        environment.ray_trace_to_wall(tuple(position), angle, depth)
+        for position, angle, depth in zip(positions.tolist(), angles.tolist(), depths.tolist())
+    ]
+    return np.array([-1 if distance is None else distance for distance in distances])
+
+
+@pytest.mark.parametrize('track', TRACKS)
+@pytest.mark.parametrize('depth', [1, 20, 100, 400])
+def test_batch_matches_ray_trace_to_wall(track, depth):
+    environment = Environment(track)
+    positions, angles = get_rays(environment, 2000)
+    depths = np.full(len(angles), depth)
+
+    expected = ray_trace_each(environment, positions, angles, depths)
+    assert np.array_equal(environment.ray_trace_batch(positions, angles, depth), expected)
+
+
+def test_batch_matches_ray_trace_to_wall_with_mixed_depths():
+    environment = Environment('assen')
+    positions, angles = get_rays(environment, 2000)
+    depths = np.random.default_rng(1).integers(0, 300, len(angles))
+
+    expected = ray_trace_each(environment, positions, angles, depths)
+    assert np.array_equal(environment.ray_trace_batch(positions, angles, depths), expected)
+
+
+def test_batch_matches_ray_trace_to_wall_with_wall_distance_table():
+    environment = Environment('assen')
+    environment.enable_wall_distance_table(bins=90, depth=50)
+    positions, angles = get_rays(environment, 2000)
+    # Rays up to the depth of the table are looked up, longer rays are traced
+    depths = np.random.default_rng(1).choice([10, 50, 100], len(angles))
+
+    expected = ray_trace_each(environment, positions, angles, depths)
+    assert np.array_equal(environment.ray_trace_batch(positions, angles, depths), expected)
+
+
+def test_empty_batch():
+    environment = Environment('assen')
+    assert len(environment.ray_trace_batch(np.empty((0, 2)), np.empty(0), 100)) == 0
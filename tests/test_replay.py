@@ -0,0 +1,64 @@
+"""
+:author: Laurens Koppenol
+
+A replay must contain the state of every player after every turn that was played.
+"""
+import numpy as np
+import pytest
+
+from src.game import Engine, Environment
+from src.player import NaiveAi
+from src.replay import ReplayViewer
+
+
+class StateLog(object):
+    """
+    Tick listener that keeps the state arrays of every turn.
+    """
+    def __init__(self):
+        self.turns = []
+
+    def on_tick(self, engine):
+        self.turns.append(dict(engine.get_state_arrays(), tick=engine.tick))
+
+    def close(self):
+        pass
+
+
+@pytest.mark.parametrize('compress', [False, True])
+def test_replay_round_trip(tmp_path, compress):
+    engine = Engine(Environment('assen'), [NaiveAi(), NaiveAi(), NaiveAi()], headless=True)
+    engine.record(str(tmp_path / 'replay'), compress=compress)
+    log = engine.add_tick_listener(StateLog())
+    engine.play()
+
+    viewer = ReplayViewer(str(tmp_path / 'replay'))
+    assert viewer.ticks == len(log.turns) == engine.tick
+    for index, expected in enumerate(log.turns):
+        turn = viewer.get_turn(index)
+        assert turn['tick'] == expected['tick']
+        for name in ('id', 'x', 'y', 'rotation', 'score', 'alive'):
+            assert np.allclose(turn[name], expected[name]), name
+    with pytest.raises(IndexError):
+        viewer.get_turn(viewer.ticks)
+
+
+def test_replay_of_stepped_game(tmp_path):
+    with Engine(Environment('assen'), [NaiveAi()], headless=True) as engine:
+        engine.record(str(tmp_path / 'replay'))
+        engine.reset()
+        for _ in range(10):
+            engine.step()
+
+    viewer = ReplayViewer(str(tmp_path / 'replay'))
+    assert viewer.ticks == 10
+    assert [viewer.get_turn(index)['tick'] for index in range(10)] == list(range(10))
+
+
+def test_empty_replay(tmp_path):
+    with Engine(Environment('assen'), [NaiveAi()], headless=True) as engine:
+        engine.record(str(tmp_path / 'replay'))
+
+    viewer = ReplayViewer(str(tmp_path / 'replay'))
+    assert viewer.ticks == 0
+    assert viewer.seek(5).position == 0
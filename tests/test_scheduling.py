@@ -0,0 +1,75 @@
+"""
+:author: Laurens Koppenol
+
+FixedTimestep only changes when turns are played and drawn, never the turns themselves: every mode must play the same
+number of turns with the same result as Engine.play.
+"""
+import pytest
+
+from src.game import Engine, Environment
+from src.player import NaiveAi
+from src.scheduling import FixedTimestep
+from src.termination import MaxTicks
+
+TICKS = 100
+
+
+def race(scheduler=None, headless=True, fps_limiter=True):
+    """
+    Race two players for TICKS turns.
+
+    :return: (engine, fingerprint hexdigest)
+    """
+    engine = Engine(Environment('assen'), [NaiveAi(), NaiveAi()], headless=headless,
+                    termination_policies=[MaxTicks(TICKS)], scheduler=scheduler)
+    engine.game_settings['fps_limiter'] = fps_limiter
+    fingerprint = engine.fingerprint()
+    engine.play()
+    return engine, fingerprint.hexdigest()
+
+
+@pytest.fixture
+def expected():
+    return race(fps_limiter=False)[1]  # Engine.play limits the frame rate, also when headless
+
+
+@pytest.mark.parametrize('headless', [True, False])
+def test_as_fast_as_possible(expected, headless):
+    scheduler = FixedTimestep(tick_rate=None, render_rate=None)
+    engine, fingerprint = race(scheduler, headless=headless)
+    assert (engine.tick, fingerprint) == (TICKS, expected)
+    # A frame after every turn but the last, which ended the game
+    assert scheduler.frames == (0 if headless else TICKS - 1)
+
+
+def test_render_every(expected):
+    scheduler = FixedTimestep(tick_rate=None, render_every=10)
+    engine, fingerprint = race(scheduler, headless=False)
+    assert (engine.tick, fingerprint) == (TICKS, expected)
+    assert scheduler.frames == TICKS // 10 - 1
+
+
+def test_tick_rate(expected):
+    scheduler = FixedTimestep(tick_rate=300, render_rate=120)
+    engine, fingerprint = race(scheduler, headless=False)
+    assert (engine.tick, fingerprint) == (TICKS, expected)
+    assert 0 < scheduler.frames < TICKS
+
+
+def test_fps_limiter_off(expected):
+    scheduler = FixedTimestep(tick_rate=1, render_every=10)
+    engine, fingerprint = race(scheduler, headless=False, fps_limiter=False)
+    assert (engine.tick, fingerprint) == (TICKS, expected)
+
+
+@pytest.mark.parametrize('settings', [
+    dict(tick_rate=None, render_rate=None),
+    dict(tick_rate=None, render_every=10),
+    dict(tick_rate=300, render_rate=120)
+])
+def test_threaded(expected, settings):
+    scheduler = FixedTimestep(threaded=True, **settings)
+    engine, fingerprint = race(scheduler, headless=False)
+    assert (engine.tick, fingerprint) == (TICKS, expected)
+    if settings['tick_rate'] is not None:
+        assert scheduler.frames > 0
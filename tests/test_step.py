@@ -0,0 +1,68 @@
+"""
+:author: Laurens Koppenol
+
+Driving the engine with reset() and step() must play the same game as play(), and report dead players correctly.
+"""
+import pytest
+
+from src.game import Engine, Environment
+from src.player import NaiveAi
+from src.termination import MaxTicks
+
+
+def step_until_done(engine, actions=None):
+    """
+    :return: list of (observations, rewards, dones, infos) of every step
+    """
+    steps = []
+    while not steps or not all(steps[-1][2]):
+        steps.append(engine.step(actions))
+    return steps
+
+
+@pytest.mark.parametrize('vectorized', [False, True])
+def test_step_plays_like_play(vectorized):
+    played = [NaiveAi(), NaiveAi()]
+    engine = Engine(Environment('assen'), played, headless=True, vectorized=vectorized,
+                    termination_policies=[MaxTicks(300)])
+    fingerprint = engine.fingerprint()
+    engine.play()
+
+    stepped = [NaiveAi(), NaiveAi()]
+    with Engine(Environment('assen'), stepped, headless=True, vectorized=vectorized,
+                termination_policies=[MaxTicks(300)]) as engine:
+        step_fingerprint = engine.fingerprint()
+        engine.reset()
+        steps = step_until_done(engine)
+
+    assert step_fingerprint.hexdigest() == fingerprint.hexdigest()
+    assert len(steps) == engine.tick
+    assert [player.death_reason for player in stepped] == [player.death_reason for player in played]
+
+
+def test_dead_players():
+    players = [NaiveAi(), NaiveAi()]
+    with Engine(Environment('assen'), players, headless=True) as engine:
+        engine.reset()
+        steps = step_until_done(engine, actions=[(1, 0), (0.5, 0)])
+
+    for i, player in enumerate(players):
+        dying = next(t for t, (_, _, dones, _) in enumerate(steps) if dones[i])
+        observations, rewards, dones, infos = steps[dying]
+        assert player.death_reason == 'collision'
+        assert infos[i]['tick'] == player.ending_tick == dying
+        assert observations[i] is None and len(infos[i]['final_observation']) == len(player.sensors)
+
+        for observations, rewards, dones, infos in steps[dying + 1:]:
+            assert observations[i] is None and rewards[i] == 0 and dones[i]
+            assert 'final_observation' not in infos[i]
+
+
+def test_reset_with_seed():
+    players = [NaiveAi()]
+    with Engine(Environment('assen'), players, headless=True, termination_policies=[MaxTicks(50)]) as engine:
+        observations = engine.reset(seed=1)
+        first = step_until_done(engine)
+        assert engine.reset(seed=1) == observations
+        assert step_until_done(engine) == first
+        assert players[0].starting_tick == 0
@@ -0,0 +1,114 @@
+"""
+:author: Laurens Koppenol
+
+Moves are checked along their whole path (Environment.sweep), so fast players cannot tunnel through thin walls.
+"""
+import numpy as np
+import pytest
+
+from src.game import Engine, Environment
+from src.player import Player
+
+
+class Coaster(Player):
+    """
+    Keeps its speed and direction.
+    """
+    def sense(self, track, keys):
+        return None
+
+    def plan(self, percepts):
+        return 0, 0
+
+
+def get_thin_wall_track():
+    """
+    :return: Environment of 60 by 40 pixels, with a vertical wall of a single pixel at x = 20 and a diagonal wall of
+        single pixels that only touch at their corners where x + y = 81
+    """
+    boundaries = np.zeros((60, 40), dtype=bool)
+    boundaries[[0, -1], :] = True
+    boundaries[:, [0, -1]] = True
+    boundaries[20, :] = True
+    xs = np.arange(42, 59)
+    boundaries[xs, 81 - xs] = True
+
+    finish = np.array([[58, 1]])
+    environment = Environment('thin_wall', arrays=dict(
+        boundaries=boundaries, finish=finish, start=np.array([5, 15]), distance_matrix=np.zeros(boundaries.shape)
+    ))
+    environment.distance_matrix = environment.get_distance_matrix()
+    return environment
+
+
+def test_sweep_stops_at_thin_wall():
+    environment = get_thin_wall_track()
+    location, collision = environment.sweep((10.2, 15.3), (30.7, 15.3))
+    assert collision
+    assert environment.location_to_pixel(location) == (20, 15)
+
+    location, collision = environment.sweep((30.7, 15.3), (10.2, 15.3))
+    assert collision
+    assert environment.location_to_pixel(location) == (20, 15)
+
+
+def test_sweep_stops_between_walls_that_touch_at_a_corner():
+    environment = get_thin_wall_track()
+    # The step from pixel (45, 35) to (46, 36) passes between the wall pixels (45, 36) and (46, 35)
+    assert not environment.boundaries[np.arange(36, 49), np.arange(26, 39)].any()
+    location, collision = environment.sweep((36, 26), (48, 38))
+    assert collision
+    assert environment.location_to_pixel(location) == (46, 36)
+
+
+def test_sweep_without_walls():
+    environment = get_thin_wall_track()
+    assert environment.sweep((3.2, 5.1), (17.9, 30.4)) == ((17.9, 30.4), False)
+
+
+def test_sweep_checks_destination_of_players_that_do_not_move():
+    environment = get_thin_wall_track()
+    assert environment.sweep((20, 15), (20, 15)) == ((20, 15), True)
+    assert environment.sweep((10, 15), (10, 15)) == ((10, 15), False)
+
+    xs, ys, collisions = environment.sweep_batch(
+        np.array([20., 10.]), np.array([15., 15.]), np.array([20., 10.]), np.array([15., 15.])
+    )
+    assert collisions.tolist() == [True, False]
+
+
+def test_sweep_batch_matches_sweep():
+    environment = Environment('assen')
+    rng = np.random.default_rng(0)
+    xs, ys = np.nonzero(environment.distance_matrix)
+    picks = rng.integers(0, len(xs), 3000)
+    origins_x = xs[picks] + rng.uniform(-0.49, 0.49, len(picks))
+    origins_y = ys[picks] + rng.uniform(-0.49, 0.49, len(picks))
+    distances = rng.choice([0, 0.5, 3, 15, 40], len(picks))
+    destinations_x, destinations_y = Environment.translate_batch(
+        origins_x, origins_y, distances, rng.uniform(0, 360, len(picks))
+    )
+    # Keep the destinations on the image, sweep only looks up pixels on the path
+    destinations_x = np.clip(destinations_x, 0, environment.width - 1)
+    destinations_y = np.clip(destinations_y, 0, environment.height - 1)
+
+    stops_x, stops_y, collisions = environment.sweep_batch(origins_x, origins_y, destinations_x, destinations_y)
+    for i in range(len(picks)):
+        location, collision = environment.sweep((origins_x[i], origins_y[i]), (destinations_x[i], destinations_y[i]))
+        assert (stops_x[i], stops_y[i]) == pytest.approx(location)
+        assert collisions[i] == collision
+
+
+@pytest.mark.parametrize('vectorized', [False, True])
+def test_fast_player_does_not_tunnel_through_thin_wall(vectorized):
+    player = Coaster()
+    engine = Engine(get_thin_wall_track(), [player], headless=True, vectorized=vectorized)
+    engine.reset()
+    player.position = (10.2, 15.3)
+    player.rotation = 90  # Towards positive x
+    player.speed = 15
+
+    engine.step()
+    assert not player.alive
+    assert player.death_reason == 'collision'
+    assert engine.track.location_to_pixel(player.position) == (20, 15)
@@ -0,0 +1,77 @@
+"""
+:author: Laurens Koppenol
+
+Telemetry files must hold a record per player for every few turns, with the state of the player after that turn.
+"""
+import csv
+import json
+
+import pytest
+
+from src.game import Engine, Environment
+from src.player import NaiveAi
+from src.telemetry import FIELDS, TelemetrySink
+from src.termination import MaxTicks
+from tests.test_replay import StateLog
+
+
+def race(path, every):
+    """
+    Race two players for 95 turns and stream their telemetry to path.
+
+    :return: (sink, list with the expected record of every player every turn)
+    """
+    engine = Engine(Environment('assen'), [NaiveAi(), NaiveAi()], headless=True, termination_policies=[MaxTicks(95)])
+    sink = engine.telemetry(str(path), every=every)
+    log = engine.add_tick_listener(StateLog())
+    engine.play()
+
+    expected = []
+    for turn in log.turns:
+        for i in range(len(turn['id'])):
+            expected.append({name: turn[name] if name == 'tick' else turn[name][i].item() for name in FIELDS})
+    return sink, expected
+
+
+def check_records(records, expected, every):
+    expected = [record for record in expected if record['tick'] % every == 0]
+    assert len(records) == len(expected)
+    for record, expected_record in zip(records, expected):
+        assert list(record) == list(FIELDS)
+        assert record['tick'] == expected_record['tick'] and record['id'] == expected_record['id']
+        assert bool(record['alive']) == bool(expected_record['alive'])
+        for name in ('x', 'y', 'speed', 'rotation', 'score', 'acceleration_command', 'rotation_command'):
+            assert record[name] == pytest.approx(expected_record[name]), name
+
+
+@pytest.mark.parametrize('every', [1, 10])
+def test_json_lines(tmp_path, every):
+    sink, expected = race(tmp_path / 'runs' / 'run.jsonl', every)
+    with open(tmp_path / 'runs' / 'run.jsonl') as telemetry_file:
+        records = [json.loads(line) for line in telemetry_file]
+    assert sink.written == 95 // every + (95 % every > 0) and sink.dropped == 0
+    check_records(records, expected, every)
+
+
+@pytest.mark.parametrize('every', [1, 10])
+def test_csv(tmp_path, every):
+    sink, expected = race(tmp_path / 'run.csv', every)
+    with open(tmp_path / 'run.csv', newline='') as telemetry_file:
+        records = [
+            {name: value == 'True' if name == 'alive' else float(value) for name, value in row.items()}
+            for row in csv.DictReader(telemetry_file)
+        ]
+    check_records(records, expected, every)
+
+
+def test_arrow(tmp_path):
+    ipc = pytest.importorskip('pyarrow.ipc')
+    race(tmp_path / 'run.arrow', 10)
+    table = ipc.open_file(str(tmp_path / 'run.arrow')).read_all()
+    assert table.column_names == list(FIELDS)
+    assert table.num_rows == 2 * 10
+
+
+def test_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        TelemetrySink(str(tmp_path / 'run.txt'))
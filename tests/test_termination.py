@@ -0,0 +1,74 @@
+"""
+:author: Laurens Koppenol
+
+Every player that dies gets the reason of its death: 'collision', 'finished' or the reason of the termination policy
+that stopped it.
+"""
+import pytest
+
+from src.game import Engine, Environment
+from src.player import NaiveAi, Player
+from src.termination import MaxTicks, NoProgress, Stall
+
+
+class ParkedPlayer(Player):
+    """
+    Stays at the start.
+    """
+    def sense(self, track, keys):
+        return []
+
+    def plan(self, percepts):
+        return 0, 0
+
+
+class StraightPlayer(Player):
+    """
+    Drives straight on at full speed.
+    """
+    def sense(self, track, keys):
+        return []
+
+    def plan(self, percepts):
+        return 1, 0
+
+
+@pytest.mark.parametrize('vectorized', [False, True])
+def test_death_reasons(vectorized):
+    players = [NaiveAi(), ParkedPlayer(), StraightPlayer()]
+    engine = Engine(Environment('assen'), players, headless=True, vectorized=vectorized,
+                    termination_policies=[MaxTicks(3000), Stall(20)])
+    engine.play()
+    assert [player.death_reason for player in players] == ['finished', 'stall', 'collision']
+    assert players[0].score == 1
+    assert players[1].ending_tick == 19
+
+
+@pytest.mark.parametrize('vectorized', [False, True])
+def test_max_ticks(vectorized):
+    players = [NaiveAi(), NaiveAi()]
+    engine = Engine(Environment('assen'), players, headless=True, vectorized=vectorized,
+                    termination_policies=[MaxTicks(100)])
+    engine.play()
+    assert engine.tick == 100
+    assert [(player.death_reason, player.ending_tick) for player in players] == [('max_ticks', 99)] * 2
+
+
+def test_no_progress():
+    players = [NaiveAi(), ParkedPlayer()]
+    engine = Engine(Environment('assen'), players, headless=True, termination_policies=[NoProgress(50)])
+    engine.play()
+    assert players[0].death_reason == 'finished'
+    assert (players[1].death_reason, players[1].ending_tick) == ('no_progress', 50)
+
+
+def test_reset_forgets_policy_state():
+    player = ParkedPlayer()
+    engine = Engine(Environment('assen'), [player], headless=True, termination_policies=[Stall(20)])
+    for _ in range(2):
+        engine.reset()
+        dones = [False]
+        while not dones[0]:
+            _, _, dones, infos = engine.step()
+        assert (player.death_reason, player.ending_tick, infos[0]['tick']) == ('stall', 19, 19)
+    engine.close()
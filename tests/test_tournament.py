@@ -0,0 +1,32 @@
+"""
+:author: Laurens Koppenol
+
+The results of a tournament must not depend on the number of worker processes or on earlier evaluations.
+"""
+from src.player import NaiveAi
+from src.tournament import Tournament, evaluate_population
+from tests.conftest import TRACKS
+from tests.test_termination import ParkedPlayer, StraightPlayer
+
+
+def get_players():
+    return [NaiveAi(), StraightPlayer(), NaiveAi(), ParkedPlayer()]
+
+
+def test_results_independent_of_workers():
+    results = [
+        evaluate_population(get_players(), TRACKS, max_ticks=500, workers=workers, fingerprint=True)
+        for workers in (0, 1, 2)
+    ]
+    assert results[0] == results[1] == results[2]
+    assert results[0][0] == results[0][2]
+    assert results[0][1]['assen']['death_reason'] == 'collision'
+    assert results[0][3]['assen']['death_reason'] == 'max_ticks'
+
+
+def test_players_are_not_changed():
+    players = get_players()
+    with Tournament(TRACKS, max_ticks=500, workers=2) as tournament:
+        first = tournament.evaluate(players)
+        assert tournament.evaluate(players) == first
+    assert all(player.alive and player.score == 0 for player in players)
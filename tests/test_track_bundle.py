@@ -0,0 +1,94 @@
+"""
+:author: Laurens Koppenol
+
+Validating and compiling tracks into bundles, see track_bundle.
+"""
+import shutil
+
+import numpy as np
+import pygame
+import pytest
+from PIL import Image
+
+from src import track_bundle
+from src.game import Environment
+
+
+def write_corner_track(tmp_path, monkeypatch):
+    """
+    Write a track of two rooms that only touch at a corner, the start in one and the finish in the other, and work in
+    tmp_path.
+
+    :return: name of the track
+    """
+    image = np.zeros((20, 20, 3), dtype=np.uint8)  # Indexed as (y, x) like an image
+    image[:, :, 0] = 255
+    image[2:9, 2:9, 0] = 0
+    image[9:17, 9:17, 0] = 0
+    image[3, 3, 1] = 255
+    image[15, 15, 2] = 255
+
+    (tmp_path / 'tracks' / 'corner').mkdir(parents=True)
+    Image.fromarray(image).save(tmp_path / 'tracks' / 'corner' / 'track.png')
+    monkeypatch.chdir(tmp_path)
+    return 'corner'
+
+
+def copy_track(tmp_path, monkeypatch):
+    """
+    Copy assen into tmp_path and work there.
+
+    :return: name of the track
+    """
+    shutil.copytree('tracks/assen', tmp_path / 'tracks' / 'copy')
+    monkeypatch.chdir(tmp_path)
+    return 'copy'
+
+
+def test_validate_with_neighbourhood(tmp_path, monkeypatch):
+    track = write_corner_track(tmp_path, monkeypatch)
+    assert track_bundle.validate(track) == []
+    assert track_bundle.validate(track, neighbourhood='8-connected') == []
+    assert track_bundle.validate(track, neighbourhood='4-connected') == ["finish cannot be reached from start (3, 3)"]
+
+
+def test_compile_validates_with_its_neighbourhood(tmp_path, monkeypatch):
+    track = write_corner_track(tmp_path, monkeypatch)
+    with pytest.raises(ValueError):
+        track_bundle.compile_track(track, neighbourhood='4-connected', wall_distance_depth=None, drawables=False)
+    assert not (tmp_path / 'tracks' / track / track_bundle.BUNDLE_FILE).exists()
+
+    track_bundle.compile_track(track, neighbourhood='8-connected', wall_distance_depth=None, drawables=False)
+    assert (tmp_path / 'tracks' / track / track_bundle.BUNDLE_FILE).exists()
+
+
+def test_bundle_matches_fresh_build(tmp_path, monkeypatch):
+    track = copy_track(tmp_path, monkeypatch)
+    track_bundle.compile_track(track, wall_distance_bins=36, wall_distance_depth=30)
+
+    bundled = Environment(track, cache=False)
+    fresh = Environment(track, cache=False, bundle=False)
+    assert bundled._bundle is not None
+    for name in Environment.CACHED_ARRAYS:
+        assert np.array_equal(getattr(bundled, name), getattr(fresh, name)), name
+
+    bundled.enable_wall_distance_table(bins=36, depth=30)
+    assert np.array_equal(bundled.wall_distance_table, fresh._get_wall_distance_table(36, 30))
+    for name in Environment.DRAWABLES:
+        assert np.array_equal(pygame.surfarray.array3d(bundled.get_drawable(name)),
+                              pygame.surfarray.array3d(fresh.get_drawable(name))), name
+
+
+def test_bundle_ignored_for_other_track_or_neighbourhood(tmp_path, monkeypatch):
+    track = copy_track(tmp_path, monkeypatch)
+    track_bundle.compile_track(track, wall_distance_depth=None, drawables=False)
+    assert Environment(track, neighbourhood='4-connected', cache=False)._bundle is None
+
+    image = np.array(Image.open(f'tracks/{track}/track.png').convert('RGB'))
+    start_y, start_x = np.argwhere(image[:, :, 1] >= 128)[0]
+    image[start_y + 1:start_y + 4, start_x - 1:start_x + 2] = (255, 0, 0)  # Wall below the start
+    Image.fromarray(image).save(f'tracks/{track}/track.png')
+
+    environment = Environment(track, cache=False)
+    assert environment._bundle is None
+    assert np.array_equal(environment.boundaries, Environment(track, cache=False, bundle=False).boundaries)
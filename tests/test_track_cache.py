@@ -0,0 +1,83 @@
+"""
+:author: Laurens Koppenol
+
+The track cache must never return the arrays of another version of a track or of other parameters.
+"""
+import os
+import stat
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from src import track_cache
+from src.game import Environment
+
+
+@pytest.fixture
+def track(tmp_path, monkeypatch):
+    """
+    Copy of assen in tmp_path, the working directory of the test.
+
+    :return: name of the track
+    """
+    (tmp_path / 'tracks' / 'copy').mkdir(parents=True)
+    Image.open('tracks/assen/track.png').save(tmp_path / 'tracks' / 'copy' / 'track.png')
+    monkeypatch.chdir(tmp_path)
+    return 'copy'
+
+
+def get_entries(track):
+    return sorted(os.listdir(track_cache.get_cache_dir(f'tracks/{track}/track.png')))
+
+
+def test_cache_hit(track):
+    environment = Environment(track)
+    assert len(get_entries(track)) == 1
+
+    cached = Environment(track)
+    for name in Environment.CACHED_ARRAYS:
+        assert np.array_equal(getattr(cached, name), getattr(environment, name))
+    assert isinstance(cached.distance_matrix, np.memmap)
+
+
+def test_cache_invalidated_when_png_changes(track):
+    Environment(track)
+    entries = get_entries(track)
+
+    image = np.array(Image.open(f'tracks/{track}/track.png').convert('RGB'))
+    start_y, start_x = np.argwhere(image[:, :, 1] >= 128)[0]
+    image[start_y + 1:start_y + 4, start_x - 1:start_x + 2] = (255, 0, 0)  # Wall below the start
+    Image.fromarray(image).save(f'tracks/{track}/track.png')
+
+    environment = Environment(track)
+    expected = Environment(track, cache=False)
+    assert np.array_equal(environment.boundaries, expected.boundaries)
+    assert np.array_equal(environment.distance_matrix, expected.distance_matrix)
+    # The entry of the old png was removed
+    assert len(get_entries(track)) == 1 and get_entries(track) != entries
+
+
+def test_cache_keyed_on_parameters(track):
+    diagonal = Environment(track)
+    connected = Environment(track, neighbourhood='4-connected')
+    assert len(get_entries(track)) == 2
+    assert not np.array_equal(diagonal.distance_matrix, connected.distance_matrix)
+    assert np.array_equal(Environment(track, neighbourhood='4-connected').distance_matrix, connected.distance_matrix)
+    assert np.array_equal(Environment(track).distance_matrix, diagonal.distance_matrix)
+
+
+def test_store_removes_temporary_folder_on_error(tmp_path, monkeypatch):
+    def fail(*args, **kwargs):
+        raise OSError('disk full')
+
+    monkeypatch.setattr(np, 'save', fail)
+    assert not track_cache.store(str(tmp_path), 'key', dict(a=np.zeros(3)))
+    assert os.listdir(tmp_path) == []
+
+
+def test_entries_get_permissions_of_cache_folder(tmp_path):
+    os.chmod(tmp_path, 0o755)
+    assert track_cache.store(str(tmp_path), 'key', dict(a=np.zeros(3)))
+    assert stat.S_IMODE(os.stat(tmp_path / 'key').st_mode) == 0o755
+    assert np.array_equal(track_cache.load(str(tmp_path), 'key', ['a'])['a'], np.zeros(3))
@@ -0,0 +1,80 @@
+"""
+:author: Laurens Koppenol
+
+The vectorized engine must play exactly the same game as the scalar engine, and players must keep working when their
+state is stored in a PlayerStates structure of arrays.
+"""
+import pytest
+
+from src.game import Engine, Environment
+from src.player import NaiveAi, Player
+from src.termination import MaxTicks
+from tests.conftest import TRACKS
+
+
+class RandomDriver(Player):
+    """
+    Drives randomly with its own random number generator, which the engine seeds.
+    """
+    def sense(self, track, keys):
+        return None
+
+    def plan(self, percepts):
+        return self.random.uniform(0, 1), self.random.uniform(-1, 1)
+
+
+def get_players():
+    players = [NaiveAi() for _ in range(6)]
+    for i, player in enumerate(players):
+        for sensor in player.sensors:
+            sensor.angle *= 1 + i / 4
+    return players + [RandomDriver() for _ in range(4)]
+
+
+def play(track, vectorized, ticks=400):
+    engine = Engine(Environment(track), get_players(), headless=True, vectorized=vectorized,
+                    termination_policies=[MaxTicks(ticks)])
+    fingerprint = engine.fingerprint(per_tick=True)
+    engine.play()
+    return engine, fingerprint
+
+
+@pytest.mark.parametrize('track', TRACKS)
+def test_vectorized_engine_matches_scalar_engine(track):
+    scalar, scalar_fingerprint = play(track, vectorized=False)
+    vectorized, vectorized_fingerprint = play(track, vectorized=True)
+
+    assert vectorized_fingerprint.tick_digests == scalar_fingerprint.tick_digests
+    assert vectorized.tick == scalar.tick
+    for scalar_player, vectorized_player in zip(scalar.players, vectorized.players):
+        assert vectorized_player.position == scalar_player.position
+        assert vectorized_player.score == scalar_player.score
+        assert vectorized_player.ending_tick == scalar_player.ending_tick
+        assert vectorized_player.death_reason == scalar_player.death_reason
+
+
+def test_step_matches_scalar_engine():
+    environment = Environment('assen')
+    engines = [Engine(environment, get_players(), headless=True, vectorized=vectorized) for vectorized in [False, True]]
+    for engine in engines:
+        engine.reset(seed=7)
+
+    for _ in range(200):
+        (scalar_observations, scalar_rewards, scalar_done, _), (observations, rewards, done, _) = [
+            engine.step() for engine in engines
+        ]
+        assert observations == scalar_observations
+        assert list(rewards) == list(scalar_rewards)
+        assert list(done) == list(scalar_done)
+
+
+def test_state_attributes():
+    player = NaiveAi()
+    engine = Engine(Environment('assen'), [player], headless=True, vectorized=True)
+    player.speed = 3
+    assert engine.states.speed[player._slot] == 3
+
+    unbound = NaiveAi()
+    del unbound.__dict__['score']
+    assert not hasattr(unbound, 'score')
+    assert getattr(unbound, 'score', None) is None